@@ -47,15 +47,45 @@ PARALLEL_EXECUTION = False
 # This option is ignored if PARALLEL_EXECUTION = False
 N_PROCESSES = cpu_count()
 
+# If True, experiments differing only by cache policy are run together:
+# topology and workload are set up once and the workload is replayed once,
+# feeding all cache policies in lockstep. Each experiment still produces its
+# own results. Results are the same as running experiments separately, unless
+# cache policies or strategies draw random numbers: these then share one
+# random number generator and their results differ from separate runs
+MULTI_POLICY_REPLAY = False
+
+# If True, each distinct topology spec of the experiment queue is built once,
+# along with its shortest paths, before starting simulations and then shared
+# by all experiments using it instead of being rebuilt by each of them
+SHARE_TOPOLOGIES = True
+
+# If True, the duration of each phase of each experiment (topology, workload,
+# cache placement, content placement and simulation) and the number of events
+# processed per second are stored in the TIMING subtree of its results.
+# If 'CPROFILE', each experiment is also profiled with cProfile and its
+# statistics are dumped to a file of PROFILE_DIR
+PROFILE = False
+PROFILE_DIR = 'profiles'
+
 # Granularity of caching.
 # Currently, only OBJECT is supported
 CACHING_GRANULARITY = 'OBJECT'
 
 # Format in which results are saved.
-# Result readers and writers are located in module ./icarus/results/readwrite.py
-# Currently only PICKLE is supported 
+# Result readers and writers are located in module ./icarus/io/readwrite.py
+# Supported formats are PICKLE, SPICKLE and RECORDS, the latter optionally
+# compressed with RECORDS_GZIP or RECORDS_ZSTD. SPICKLE files can be converted
+# to RECORDS with scripts/convertresults.py. COLUMNAR only saves parameters
+# and scalar results, as a table which can be queried quickly
 RESULTS_FORMAT = 'SPICKLE'
 
+# If True, the results of each experiment are appended to the results file as
+# soon as the experiment completes instead of being kept in memory until all
+# experiments are done. The results format must support appending, e.g.
+# RECORDS or SPICKLE
+STREAM_RESULTS = True
+
 ########################## EXPERIMENTS CONFIGURATION ##########################
 
 # whether the experiments will be based on synthetic data or traces
@@ -64,6 +94,17 @@ SYNTHETIC_EXPERIMENT = False
 TRACE_DRIVEN_EXPERIMENTS = False
 DETERMINISTIC_TRACE_DRIVEN_EXPERIMENTS = True
 
+# whether trace-driven workloads read requests from a memory-mapped binary
+# copy of the trace (created next to the trace on first use) instead of
+# parsing the CSV trace at every run
+BINARY_TRACES = True
+
+# Number of requests drawn at once by synthetic workloads, e.g. 2**16. Drawing
+# requests in blocks is faster, but changes the sequence of requests generated
+# for a given seed, so that results are not comparable with results of runs
+# drawing one request at a time (None)
+WORKLOAD_BLOCK_SIZE = None
+
 # List of metrics to be measured in the experiments
 # The implementation of data collectors are located in ./icarus/execution/collectors.py
 # Remove collectors not needed
@@ -130,6 +171,9 @@ use_ARC = True
 use_LRU = True
 use_KLRU = True
 use_WLRU = True
+# Belady's optimal offline policy, only meaningful in deterministic trace-driven
+# experiments where a single cache serves all requests (e.g. PATH with n=3)
+use_OPT = False
 
 if use_SS:
     CACHE_POLICY.append('SS')
@@ -258,6 +302,12 @@ if use_KLRU:
                            subwindow_size=True, lru_portion=True, hypothesis_check_period=True, hypothesis_check_A=True,
                            hypothesis_check_epsilon=True)
 
+if use_OPT:
+    CACHE_POLICY.append('OPT')
+    append_default(CACHE_POLICY_PARAMETERS, monitored=True, window_size=True, subwindows=True, subwindow_size=True,
+                   segments=True, cached_segments=True, lru_portion=True, hypothesis_check_period=True,
+                   hypothesis_check_A=True, hypothesis_check_epsilon=True)
+
 # Instantiate experiment queue
 EXPERIMENT_QUEUE = deque()
 
@@ -315,7 +365,8 @@ if SYNTHETIC_EXPERIMENT:
                                                       'n_warmup': N_CONTENTS,
                                                       'n_measured': N_REQUESTS - N_CONTENTS,
                                                       'weights': 'UNIFORM',
-                                                      'seed': seeds[rep]
+                                                      'seed': seeds[rep],
+                                                      'block_size': WORKLOAD_BLOCK_SIZE
                                                       }
                             experiment['cache_placement']['name'] = 'UNIFORM'
                             experiment['content_placement']['name'] = 'UNIFORM'
@@ -389,7 +440,8 @@ if TRACE_DRIVEN_EXPERIMENTS:
                                                   'n_warmup': WARMUP,
                                                   'n_measured': N_REQUESTS - WARMUP,
                                                   'reqs_file': 'resources/' + trace_name,
-                                                  'weights': weights
+                                                  'weights': weights,
+                                                  'binary_trace': BINARY_TRACES
                                                   }
                         experiment['cache_placement']['name'] = 'UNIFORM'
                         experiment['content_placement']['name'] = 'UNIFORM'
@@ -460,7 +512,8 @@ if DETERMINISTIC_TRACE_DRIVEN_EXPERIMENTS:
                                                   'n_warmup': WARMUP,
                                                   'n_measured': N_REQUESTS - WARMUP,
                                                   'reqs_file': 'resources/' + trace_name,
-                                                  'weights': weights
+                                                  'weights': weights,
+                                                  'binary_trace': BINARY_TRACES
                                                   }
                         experiment['cache_placement']['name'] = 'UNIFORM'
                         experiment['content_placement']['name'] = 'UNIFORM'
@@ -474,6 +527,10 @@ if DETERMINISTIC_TRACE_DRIVEN_EXPERIMENTS:
                         experiment['cache_policy']['name'] = cache_policy
                         for param_name, param_value_list in list(CACHE_POLICY_PARAMETERS.items()):
                             experiment['cache_policy'][param_name] = param_value_list[cache_policy_index]
+                        if cache_policy == 'OPT':
+                            # OPT reads the future requests from the trace
+                            experiment['cache_policy']['reqs_file'] = 'resources/' + trace_name
+                            experiment['cache_policy']['binary_trace'] = BINARY_TRACES
                         experiment['cache_placement']['network_cache_per_node'] = NETWORK_CACHE_PER_NODE
                         experiment['cache_placement']['network_cache_all_nodes'] = NETWORK_CACHE_ALL_NODES
                         experiment['cache_placement']['network_cache_absolute'] = NETWORK_CACHE_ABSOLUTE
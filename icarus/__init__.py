@@ -25,9 +25,11 @@ __modules_to_register = [
      'icarus.models.data_stream_caching_algorithm',
      'icarus.models.adaptive_replacement_cache',
      'icarus.models.k_lru',
+     'icarus.models.belady',
      'icarus.models.strategy',
      'icarus.execution.collectors', 
      'icarus.io.readwrite',
+     'icarus.io.columnar',
      'icarus.scenarios.topology',
      'icarus.scenarios.contentplacement',
      'icarus.scenarios.cacheplacement',
@@ -164,6 +164,10 @@ class CollectorProxy(DataCollector):
     An instance of this class registers itself with the network controller and
     it receives notifications for all events. This class is responsible for
     dispatching events of interests to concrete collectors.
+    
+    The events with at least one subscriber are listed in the *events*
+    attribute, so that the network controller does not notify the others.
+    Events with a single subscriber are dispatched to it directly.
     """
     
     EVENTS = ('start_session', 'end_session', 'cache_hit', 'cache_miss', 'server_hit',
@@ -182,6 +186,11 @@ class CollectorProxy(DataCollector):
         self.view = view
         self.collectors = {e: [c for c in collectors if e in type(c).__dict__]
                            for e in self.EVENTS}
+        self.events = frozenset(e for e in self.EVENTS
+                                if e != 'results' and self.collectors[e])
+        for event in self.events:
+            if len(self.collectors[event]) == 1:
+                setattr(self, event, getattr(self.collectors[event][0], event))
     
     @inheritdoc(DataCollector)
     def start_session(self, timestamp, receiver, content, weight):
@@ -8,10 +8,11 @@ and providing them to a strategy instance.
 from icarus.execution import NetworkModel, NetworkView, NetworkController, CollectorProxy
 from icarus.registry import DATA_COLLECTOR, STRATEGY
 import logging
+from time import perf_counter
 
 
 
-__all__ = ['exec_experiment']
+__all__ = ['exec_experiment', 'exec_multi_policy_experiment']
 
 logger = logging.getLogger('execution')
 
@@ -29,7 +30,8 @@ def exec_experiment(topology, workload, netconf, strategy, cache_policy, collect
         An iterable object whose elements are (time, event) tuples, where time
         is a float type indicating the timestamp of the event to be executed
         and event is a dictionary storing all the attributes of the event to
-        execute
+        execute. If the workload has a *batches* method, events are instead
+        delivered to the strategy in the batches it returns
     netconf : dict
         Dictionary of attributes to inizialize the network model
     strategy : tree
@@ -61,13 +63,129 @@ def exec_experiment(topology, workload, netconf, strategy, cache_policy, collect
     strategy_args = {k: v for k, v in list(strategy.items()) if k != 'name'}
     strategy_inst = STRATEGY[strategy_name](view, controller, **strategy_args)
 
-    processed_events = 0
+    _run_workload(workload, [strategy_inst], desc)
+    return collector.results()
+
+
+def exec_multi_policy_experiment(topology, workload, netconf, strategy,
+                                 cache_policies, collectors, desc,
+                                 return_durations=False):
+    """Execute the simulation of a scenario with several cache policies at
+    the same time.
+
+    Each cache policy gets its own network model, strategy instance and
+    collectors, while the topology, its shortest paths and the workload are
+    shared. Every event of the workload is read once and is then processed
+    by all strategy instances in lockstep. The results are the same as
+    running *exec_experiment* once per cache policy, unless the strategy or
+    the cache policies draw random numbers, in which case policies share
+    the same random number generator.
+
+    Parameters
+    ----------
+    topology : Topology
+        The FNSS Topology object modelling the network topology on which
+        experiments are run.
+    workload : iterable
+        An iterable object whose elements are (time, event) tuples, where time
+        is a float type indicating the timestamp of the event to be executed
+        and event is a dictionary storing all the attributes of the event to
+        execute. If the workload has a *batches* method, events are instead
+        delivered to the strategy in the batches it returns
+    netconf : dict
+        Dictionary of attributes to inizialize the network model
+    strategy : tree
+        Strategy definition. It is tree describing the name of the strategy
+        to use and a list of initialization attributes
+    cache_policies : list of trees
+        Cache policy definitions. Each of them is a tree describing the name
+        of the cache policy to use and a list of initialization attributes
+    collectors: dict
+        The collectors to be used. It is a dictionary in which keys are the
+        names of collectors to use and values are dictionaries of attributes
+        for the collector they refer to.
+    desc : str
+        Description of the scenario, used for logging
+    return_durations : bool, optional
+        If *True*, the time spent by each cache policy, its strategy and
+        collectors processing the events is returned as well
+
+    Returns
+    -------
+    results : list of Tree
+        The aggregated simulation results from all collectors, one tree per
+        cache policy, in the same order as *cache_policies*
+    durations : list of float
+        The processing time of each cache policy in seconds, in the same order
+        as *cache_policies*. Only returned if *return_durations* is *True*
+    """
+    strategy_name = strategy['name']
+    strategy_args = {k: v for k, v in list(strategy.items()) if k != 'name'}
+    shortest_path = netconf.get('shortest_path', None)
+    netconf = {k: v for k, v in list(netconf.items()) if k != 'shortest_path'}
+
+    collector_proxies = []
+    strategy_insts = []
+    for cache_policy in cache_policies:
+        model = NetworkModel(topology, cache_policy, shortest_path=shortest_path, **netconf)
+        # All models share the shortest paths computed by the first one
+        shortest_path = model.shortest_path
+        view = NetworkView(model)
+        controller = NetworkController(model)
+
+        collectors_inst = [DATA_COLLECTOR[name](view, **params)
+                           for name, params in list(collectors.items())]
+        collector = CollectorProxy(view, collectors_inst)
+        controller.attach_collector(collector)
+        collector_proxies.append(collector)
+        strategy_insts.append(STRATEGY[strategy_name](view, controller, **strategy_args))
+
+    durations = _run_workload(workload, strategy_insts, desc)
+    results = [collector.results() for collector in collector_proxies]
+    return (results, durations) if return_durations else results
+
+
+def _run_workload(workload, strategy_insts, desc):
+    """Deliver all events of a workload to strategies.
 
+    If the workload provides batches of events, each batch is processed by
+    each strategy in turn, otherwise events are delivered one at a time.
+
+    Parameters
+    ----------
+    workload : iterable
+        The workload
+    strategy_insts : list
+        The strategies processing the events
+    desc : str
+        The description of the experiment used in progress logs
+
+    Returns
+    -------
+    durations : list of float
+        The time spent by each strategy processing the events, in seconds
+    """
+    processed_events = 0
+    durations = [0.0] * len(strategy_insts)
+    batches = getattr(workload, 'batches', None)
+    if batches is not None:
+        for batch in batches():
+            for i, strategy_inst in enumerate(strategy_insts):
+                start = perf_counter()
+                strategy_inst.process_events(batch)
+                durations[i] += perf_counter() - start
+            previous = processed_events
+            processed_events += len(batch)
+            if processed_events // 1000000 > previous // 1000000:
+                logger.info('Progress: %s, %f' % (desc, float(processed_events) / float(workload.n_measured)))
+        return durations
     for time, event in workload:
-        strategy_inst.process_event(time, **event)
+        for i, strategy_inst in enumerate(strategy_insts):
+            start = perf_counter()
+            strategy_inst.process_event(time, **event)
+            durations[i] += perf_counter() - start
         processed_events += 1
 
         if processed_events % 1000000 == 0:
             logger.info('Progress: %s, %f' % (desc, float(processed_events) / float(workload.n_measured)))
-
-    return collector.results()
+    return durations
@@ -13,6 +13,7 @@ The `NetworkController` is also responsible to notify a `DataCollectorProxy`
 of all relevant events.
 """
 import logging
+import collections
 
 import networkx as nx
 import fnss
@@ -21,6 +22,8 @@ from icarus.registry import CACHE_POLICY
 from icarus.util import path_links
 
 __all__ = [
+    'CompiledPath',
+    'LazyShortestPaths',
     'NetworkModel',
     'NetworkView',
     'NetworkController'
@@ -54,6 +57,162 @@ def symmetrify_paths(shortest_paths):
     return shortest_paths
 
 
+class LazyShortestPaths(object):
+    """All pairs shortest paths computed on demand
+
+    This object can be indexed as the dict of dict of all pairs shortest
+    paths, i.e. *shortest_paths[s][t]* is the shortest path from *s* to *t*,
+    but it only runs a single-source Dijkstra from a node the first time a
+    path from or to that node is requested. The shortest path trees are kept
+    in an LRU cache so that memory is bounded on large topologies, where in
+    practice only paths from receivers to sources and caches are requested.
+
+    Paths are symmetric and identical to those returned by
+    *symmetrify_paths(dict(nx.all_pairs_dijkstra_path(topology)))*: the path
+    between two nodes is taken from the shortest path tree rooted at the one
+    coming last in the node order of the topology.
+    """
+
+    def __init__(self, topology, maxlen=512):
+        """Constructor
+
+        Parameters
+        ----------
+        topology : fnss.Topology
+            The topology
+        maxlen : int, optional
+            The maximum number of shortest path trees kept in memory
+        """
+        if maxlen < 1:
+            raise ValueError('maxlen must be positive')
+        self.topology = topology
+        self.maxlen = maxlen
+        self._node_order = {v: i for i, v in enumerate(topology.nodes())}
+        self._trees = collections.OrderedDict()
+
+    def __getitem__(self, s):
+        if s not in self._node_order:
+            raise KeyError(s)
+        return _LazyShortestPathsFrom(self, s)
+
+    def __contains__(self, s):
+        return s in self._node_order
+
+    def __iter__(self):
+        return iter(self._node_order)
+
+    def __len__(self):
+        return len(self._node_order)
+
+    def path(self, s, t):
+        """Return the shortest path from *s* to *t*
+
+        Parameters
+        ----------
+        s : any hashable type
+            Origin node
+        t : any hashable type
+            Destination node
+
+        Returns
+        -------
+        shortest_path : list
+            List of nodes of the shortest path (origin and destination
+            included)
+        """
+        if self._node_order[s] >= self._node_order[t]:
+            return self._tree(s)[t]
+        return list(reversed(self._tree(t)[s]))
+
+    def _tree(self, root):
+        """Return the shortest path tree rooted at a node"""
+        trees = self._trees
+        if root in trees:
+            trees.move_to_end(root)
+            return trees[root]
+        tree = nx.single_source_dijkstra_path(self.topology, root)
+        trees[root] = tree
+        if len(trees) > self.maxlen:
+            trees.popitem(last=False)
+        return tree
+
+
+class _LazyShortestPathsFrom(object):
+    """Shortest paths from a given node, returned by indexing
+    *LazyShortestPaths*"""
+
+    __slots__ = ('paths', 's')
+
+    def __init__(self, paths, s):
+        self.paths = paths
+        self.s = s
+
+    def __getitem__(self, t):
+        return self.paths.path(self.s, t)
+
+    def __contains__(self, t):
+        return t in self.paths
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+
+CompiledPath = collections.namedtuple('CompiledPath', [
+    'nodes', 'hops', 'caching', 'caches', 'delays', 'types', 'reverse'])
+CompiledPath.__doc__ = """Precompiled representation of a path
+
+Attributes
+----------
+nodes : tuple
+    The nodes of the path, origin and destination included
+hops : tuple of int
+    The dense integer identifiers of the nodes of the path
+caching : tuple of bool
+    Whether the node at each position of the path has a cache
+caches : tuple of int
+    The positions along the path of the nodes having a cache
+delays : tuple of float
+    The delay of each link of the path, *delays[i]* being the delay of link
+    *(nodes[i], nodes[i + 1])*
+types : tuple of str
+    The type of each link of the path
+reverse : CompiledPath
+    The reversed path, whose own *reverse* attribute is *None*
+"""
+
+
+def compile_path(model, path):
+    """Build the compiled representation of a path and of its reverse
+
+    Parameters
+    ----------
+    model : NetworkModel
+        The network model
+    path : list
+        List of nodes of the path
+
+    Returns
+    -------
+    compiled_path : CompiledPath
+        The compiled path
+    """
+    def compile_one(nodes, reverse):
+        nodes = tuple(nodes)
+        caching = tuple(v in model.cache for v in nodes)
+        links = path_links(nodes)
+        return CompiledPath(nodes,
+                            tuple(model.node_index[v] for v in nodes),
+                            caching,
+                            tuple(i for i, c in enumerate(caching) if c),
+                            tuple(model.link_delay.get(e) for e in links),
+                            tuple(model.link_type.get(e) for e in links),
+                            reverse)
+    return compile_one(path, compile_one(reversed(path), None))
+
+
 class NetworkView(object):
     """Network view
     
@@ -128,6 +287,34 @@ class NetworkView(object):
         """
         return self.model.shortest_path[s][t]
     
+    def compiled_path(self, s, t):
+        """Return the compiled representation of the shortest path from *s*
+        to *t*
+
+        Compiled paths are built the first time they are requested and then
+        reused, so that strategies can iterate plain tuples instead of looking
+        up caches, link delays and link types at each hop.
+
+        Parameters
+        ----------
+        s : any hashable type
+            Origin node
+        t : any hashable type
+            Destination node
+
+        Returns
+        -------
+        compiled_path : CompiledPath
+            The compiled shortest path, whose *reverse* attribute is the path
+            from *t* to *s* taken by the content
+        """
+        try:
+            return self.model.compiled_path[(s, t)]
+        except KeyError:
+            path = compile_path(self.model, self.model.shortest_path[s][t])
+            self.model.compiled_path[(s, t)] = path
+            return path
+
     def all_pairs_shortest_paths(self):
         """Return all pairs shortest paths
         
@@ -271,7 +458,8 @@ class NetworkModel(object):
     calls to the network controller.
     """
     
-    def __init__(self, topology, cache_policy, shortest_path=None):
+    def __init__(self, topology, cache_policy, shortest_path=None,
+                 lazy_shortest_paths=False, max_shortest_path_trees=512):
         """Constructor
         
         Parameters
@@ -284,6 +472,14 @@ class NetworkModel(object):
             policy
         shortest_path : dict of dict, optional
             The all-pair shortest paths of the network
+        lazy_shortest_paths : bool, optional
+            If *True* and *shortest_path* is not provided, shortest paths are
+            computed on demand by a *LazyShortestPaths* object instead of
+            computing all pairs shortest paths upfront. Paths are the same
+            in both cases
+        max_shortest_path_trees : int, optional
+            The maximum number of shortest path trees kept in memory when
+            shortest paths are computed on demand
         """
         # Filter inputs
         if not isinstance(topology, fnss.Topology):
@@ -291,12 +487,23 @@ class NetworkModel(object):
                              'fnss.Topology or any of its subclasses.')
         
         # Shortest paths of the network
-        self.shortest_path = shortest_path if shortest_path is not None \
-                             else symmetrify_paths(dict(nx.all_pairs_dijkstra_path(topology)))
+        if shortest_path is not None:
+            self.shortest_path = shortest_path
+        elif lazy_shortest_paths:
+            self.shortest_path = LazyShortestPaths(topology, max_shortest_path_trees)
+        else:
+            self.shortest_path = symmetrify_paths(dict(nx.all_pairs_dijkstra_path(topology)))
         
         # Network topology
         self.topology = topology
         
+        # Dense integer identifiers of nodes, used by compiled paths
+        self.node_index = {v: i for i, v in enumerate(topology.nodes())}
+
+        # Compiled shortest paths keyed by (origin, destination), built lazily
+        # by NetworkView.compiled_path
+        self.compiled_path = {}
+
         # Dictionary mapping each content object to its source
         # dict of location of contents keyed by content ID
         self.content_source = {}
@@ -341,12 +548,27 @@ class NetworkModel(object):
                           for node in self.cache_size}
 
 
+# Events that a data collector can be notified of by the network controller
+COLLECTOR_EVENTS = ('start_session', 'end_session', 'cache_hit', 'cache_miss',
+                    'server_hit', 'request_hop', 'content_hop')
+
+
+def _ignore_event(*args, **kwargs):
+    """Hook of an event without subscribers"""
+    pass
+
+
 class NetworkController(object):
     """Network controller
     
     This class is in charge of executing operations on the network model on
     behalf of a strategy implementation. It is also in charge of notifying
     data collectors of relevant events.
+    
+    Notifications are dispatched by hooks compiled when a collector is
+    attached: events to which the collector does not subscribe are bound to
+    no-ops and, if no collector subscribes to request or content hops, the
+    methods forwarding requests and contents do nothing at all.
     """
     
     def __init__(self, model):
@@ -357,9 +579,56 @@ class NetworkController(object):
         model : NetworkModel
             Instance of the network model
         """
-        self.session = None
         self.model = model
         self.collector = None
+        self._end_session_state()
+        self._compile_hooks()
+    
+    def _end_session_state(self):
+        """Reset the state of the current session"""
+        self.timestamp = None
+        self.receiver = None
+        self.content = None
+        self.log = False
+        self.weight = None
+        self.in_session = False
+    
+    @property
+    def session(self):
+        """Dictionary of the attributes of the current session or *None* if
+        there is no session in progress"""
+        if not self.in_session:
+            return None
+        return dict(timestamp=self.timestamp, receiver=self.receiver,
+                    content=self.content, log=self.log, weight=self.weight)
+    
+    def _compile_hooks(self):
+        """Bind the hook of each event to the attached collector if it
+        subscribes to that event or to a no-op otherwise.
+        
+        A collector lists the events it subscribes to in its *events*
+        attribute. Collectors without it subscribe to all events.
+        """
+        if self.collector is None:
+            events = ()
+        else:
+            events = getattr(self.collector, 'events', COLLECTOR_EVENTS)
+        for event in COLLECTOR_EVENTS:
+            hook = getattr(self.collector, event) if event in events \
+                   else _ignore_event
+            setattr(self, '_' + event, hook)
+        # Forwarding a request or content only notifies the collector, so
+        # instance attributes shadow these methods if nobody is listening
+        for event, methods in (('request_hop', ('forward_request_path',
+                                                'forward_request_hop')),
+                               ('content_hop', ('forward_content_path',
+                                                'forward_content_hop'))):
+            for method in methods:
+                if event in events:
+                    self.__dict__.pop(method, None)
+                else:
+                    setattr(self, method, _ignore_event)
+        self.events = frozenset(events)
     
     def attach_collector(self, collector):
         """Attaches a data collector to which all events will be reported.
@@ -370,11 +639,13 @@ class NetworkController(object):
             The data collector
         """
         self.collector = collector
+        self._compile_hooks()
         
     def detach_collector(self):
         """Detaches the data collector.
         """
         self.collector = None
+        self._compile_hooks()
     
     def start_session(self, timestamp, receiver, content, log, weight):
         """Instruct the controller to start a new session (i.e. the retrieval
@@ -394,13 +665,14 @@ class NetworkController(object):
         weight : int
             The weight/priority of the content
         """
-        self.session = dict(timestamp=timestamp,
-                            receiver=receiver,
-                            content=content,
-                            log=log,
-                            weight=weight)
-        if self.collector is not None and self.session['log']:
-            self.collector.start_session(timestamp, receiver, content, weight)
+        self.timestamp = timestamp
+        self.receiver = receiver
+        self.content = content
+        self.log = log
+        self.weight = weight
+        self.in_session = True
+        if log:
+            self._start_session(timestamp, receiver, content, weight)
     
     def forward_request_path(self, s, t, path=None, main_path=True):
         """Forward a request from node *s* to node *t* over the provided path.
@@ -414,10 +686,13 @@ class NetworkController(object):
         path : list, optional
             The path to use. If not provided, shortest path is used
         """
+        if not self.log:
+            return
         if path is None:
             path = self.model.shortest_path[s][t]
+        request_hop = self._request_hop
         for u, v in path_links(path):
-            self.forward_request_hop(u, v)
+            request_hop(u, v)
     
     def forward_content_path(self, u, v, path=None, main_path=True):
         """Forward a content from node *s* to node *t* over the provided path.
@@ -431,10 +706,13 @@ class NetworkController(object):
         path : list, optional
             The path to use. If not provided, shortest path is used
         """
+        if not self.log:
+            return
         if path is None:
             path = self.model.shortest_path[u][v]
+        content_hop = self._content_hop
         for u, v in path_links(path):
-            self.forward_content_hop(u, v)
+            content_hop(u, v)
     
     def forward_request_hop(self, u, v, main_path=True):
         """Forward a request over link  u -> v.
@@ -446,8 +724,8 @@ class NetworkController(object):
         v : any hashable type
             Destination node
         """
-        if self.collector is not None and self.session['log']:
-            self.collector.request_hop(u, v, main_path)
+        if self.log:
+            self._request_hop(u, v, main_path)
     
     def forward_content_hop(self, u, v, main_path=True):
         """Forward a content over link  u -> v.
@@ -459,8 +737,8 @@ class NetworkController(object):
         v : any hashable type
             Destination node
         """
-        if self.collector is not None and self.session['log']:
-            self.collector.content_hop(u, v, main_path)
+        if self.log:
+            self._content_hop(u, v, main_path)
     
     def put_content(self, node):
         """Store content in the specified node.
@@ -481,7 +759,7 @@ class NetworkController(object):
             The evicted object or *None* if no contents were evicted.
         """
         if node in self.model.cache:
-            return self.model.cache[node].put(self.session['content'], self.session['weight'])
+            return self.model.cache[node].put(self.content, self.weight)
     
     def get_content(self, node):
         """Get a content from a server or a cache.
@@ -497,17 +775,17 @@ class NetworkController(object):
             True if the content is available, False otherwise
         """
         if node in self.model.cache:
-            cache_hit = self.model.cache[node].get(self.session['content'], self.session['weight'])
-            if self.session['log']:
+            cache_hit = self.model.cache[node].get(self.content, self.weight)
+            if self.log:
                 if cache_hit:
-                    self.collector.cache_hit(node)
+                    self._cache_hit(node)
                 else:
-                    self.collector.cache_miss(node)
+                    self._cache_miss(node)
             return cache_hit
         name, props = fnss.get_stack(self.model.topology, node)
-        if name == 'source' and self.session['content'] in props['contents']:
-            if self.collector is not None and self.session['log']:
-                self.collector.server_hit(node)
+        if name == 'source' and self.content in props['contents']:
+            if self.log:
+                self._server_hit(node)
             return True
         else:
             return False
@@ -526,7 +804,7 @@ class NetworkController(object):
             *True* if the entry was in the cache, *False* if it was not.
         """
         if node in self.model.cache:
-            return self.model.cache[node].remove(self.session['content'])
+            return self.model.cache[node].remove(self.content)
 
     def end_session(self, success=True):
         """Close a session
@@ -536,9 +814,9 @@ class NetworkController(object):
         success : bool, optional
             *True* if the session was completed successfully, *False* otherwise
         """
-        if self.collector is not None and self.session['log']:
-            self.collector.end_session(success)
-        self.session = None
+        if self.log:
+            self._end_session(success)
+        self._end_session_state()
 
     def remove_link(self, u, v):
         raise NotImplementedError('Method not yet implemented')
@@ -1,2 +1,3 @@
 from .readwrite import *
-from .spickle import *
\ No newline at end of file
+from .spickle import *
+from .columnar import *
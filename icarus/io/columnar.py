@@ -0,0 +1,351 @@
+"""Columnar store of experiment results.
+
+Each experiment is a row of a table whose columns are the paths of its
+parameters tree and of the scalar values of its results tree, e.g.
+*('cache_policy', 'name')* or *('CACHE_HIT_RATIO', 'MEAN')*. Non-scalar
+values, such as latency CDFs, are not stored. Each column is a NumPy array:
+columns of floats are float arrays where missing values are NaN, columns of
+integers without missing values are integer arrays, while all other columns
+are object arrays where missing values are *None*.
+
+Queries select rows with vectorised predicates over the columns, which is
+much faster than unpickling and matching the trees of every experiment.
+Tables are saved to NumPy *.npz* files.
+"""
+import numbers
+
+import numpy as np
+
+from icarus.util import Tree
+from icarus.registry import register_results_reader, register_results_writer
+
+__all__ = [
+    'ColumnarResults',
+    'write_results_columnar',
+    'read_results_columnar'
+           ]
+
+
+def _is_scalar(val):
+    """Return True if a value can be stored in a column"""
+    return val is None or isinstance(val, (numbers.Number, str, np.generic))
+
+
+def _column(values):
+    """Return the array of a column given its values, *None* for missing"""
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, numbers.Real) and not isinstance(v, numbers.Integral)
+                       for v in present):
+        return np.array([np.nan if v is None else v for v in values],
+                        dtype=np.float64)
+    if len(present) == len(values) and \
+            all(isinstance(v, numbers.Integral) and not isinstance(v, (bool, np.bool_))
+                for v in values):
+        return np.array(values, dtype=np.int64)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+class ColumnarResults(object):
+    """Table of experiment parameters and scalar results, one row per
+    experiment.
+    """
+
+    def __init__(self, parameters=None, results=None):
+        """Constructor
+
+        Parameters
+        ----------
+        parameters : dict, optional
+            Dictionary mapping parameter paths to columns
+        results : dict, optional
+            Dictionary mapping result paths to columns
+        """
+        self.parameters = parameters if parameters is not None else {}
+        self.results = results if results is not None else {}
+        columns = list(self.parameters.values()) + list(self.results.values())
+        self._len = len(columns[0]) if columns else 0
+        if any(len(c) != self._len for c in columns):
+            raise ValueError('All columns must have the same length')
+
+    @classmethod
+    def from_results(cls, resultset):
+        """Build the table of a result set.
+
+        Parameters
+        ----------
+        resultset : iterable
+            The result set or any iterable of (parameters, results) tuples.
+            It is read only once
+
+        Returns
+        -------
+        table : ColumnarResults
+            The table
+        """
+        rows = []
+        param_paths = {}
+        result_paths = {}
+        for parameters, results in resultset:
+            params = {path: val for path, val in Tree(parameters).paths().items()
+                      if _is_scalar(val)}
+            res = {path: val for path, val in Tree(results).paths().items()
+                   if _is_scalar(val)}
+            # Dictionaries used as ordered sets
+            param_paths.update(dict.fromkeys(params))
+            result_paths.update(dict.fromkeys(res))
+            rows.append((params, res))
+        parameters = {path: _column([r[0].get(path) for r in rows])
+                      for path in param_paths}
+        results = {path: _column([r[1].get(path) for r in rows])
+                   for path in result_paths}
+        return cls(parameters, results)
+
+    @classmethod
+    def load(cls, path):
+        """Load a table from a *.npz* file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file
+
+        Returns
+        -------
+        table : ColumnarResults
+            The table
+        """
+        with np.load(path, allow_pickle=True) as data:
+            kinds = data['kinds']
+            paths = data['paths']
+            columns = [data['c%d' % i] for i in range(len(paths))]
+        parameters = {}
+        results = {}
+        for kind, path, column in zip(kinds, paths, columns):
+            (parameters if kind == 'p' else results)[tuple(path)] = column
+        return cls(parameters, results)
+
+    def save(self, path):
+        """Save the table to a *.npz* file.
+
+        Parameters
+        ----------
+        path : str
+            The path of the file. Note that NumPy appends the *.npz*
+            extension if missing
+        """
+        items = [('p', k, v) for k, v in self.parameters.items()] + \
+                [('r', k, v) for k, v in self.results.items()]
+        paths = np.empty(len(items), dtype=object)
+        for i, (_, k, _) in enumerate(items):
+            paths[i] = k
+        arrays = {'c%d' % i: v for i, (_, _, v) in enumerate(items)}
+        np.savez(path, kinds=np.array([kind for kind, _, _ in items], dtype='U1'),
+                 paths=paths, **arrays)
+
+    def __len__(self):
+        """Returns the number of experiments of the table"""
+        return self._len
+
+    def __iter__(self):
+        """Returns iterator over the rows of the table, each of them as a
+        (parameters, results) tuple of trees, without the missing values
+
+        Returns
+        -------
+        iter : iterator
+            Iterator over the rows
+        """
+        for parameters, results in self.items():
+            yield self._tree(parameters), self._tree(results)
+
+    def __getitem__(self, i):
+        return self.row(i)
+
+    def row(self, i):
+        """Return a row of the table as a (parameters, results) tuple of
+        trees, without the missing values
+
+        Parameters
+        ----------
+        i : int
+            The index of the row
+
+        Returns
+        -------
+        row : tuple
+            The (parameters, results) tuple
+        """
+        if i < 0:
+            i += self._len
+        if i < 0 or i >= self._len:
+            raise IndexError('row index out of range')
+        return next(iter(self.select([i])))
+
+    def items(self):
+        """Returns iterator over the rows of the table, each of them as a
+        (parameters, results) tuple of lists of (path, value) pairs, without
+        the missing values.
+
+        This is faster than iterating over the trees of the rows.
+
+        Returns
+        -------
+        iter : iterator
+            Iterator over the rows
+        """
+        def lists(columns):
+            return [(path, column.tolist()) for path, column in columns.items()]
+        parameters = lists(self.parameters)
+        results = lists(self.results)
+        # NaN, the missing value of float columns, is not equal to itself
+        for i in range(self._len):
+            yield [(path, values[i]) for path, values in parameters
+                   if values[i] is not None and values[i] == values[i]], \
+                  [(path, values[i]) for path, values in results
+                   if values[i] is not None and values[i] == values[i]]
+
+    @staticmethod
+    def _tree(items):
+        """Return the tree of a list of (path, value) pairs"""
+        tree = Tree()
+        for path, val in items:
+            tree.setval(path, val)
+        return tree
+
+    def parameter(self, path):
+        """Return the column of a parameter
+
+        Parameters
+        ----------
+        path : tuple
+            The path of the parameter in the parameters tree
+
+        Returns
+        -------
+        column : numpy.ndarray
+            The values of the parameter, NaN or *None* where missing
+        """
+        return self._get(self.parameters, path)
+
+    def metric(self, path):
+        """Return the column of a scalar result
+
+        Parameters
+        ----------
+        path : tuple
+            The path of the result in the results tree
+
+        Returns
+        -------
+        column : numpy.ndarray
+            The values of the result, NaN or *None* where missing
+        """
+        return self._get(self.results, path)
+
+    def _get(self, columns, path):
+        path = tuple(path)
+        if path in columns:
+            return columns[path]
+        column = np.empty(self._len, dtype=object)
+        column[:] = None
+        return column
+
+    def mask(self, condition):
+        """Return which experiments match a condition on their parameters.
+
+        Like *ResultSet.filter*, a parameter matches *None* if it is missing.
+
+        Parameters
+        ----------
+        condition : dict
+            Dictionary listing all parameters and values to be matched, as
+            accepted by *ResultSet.filter*
+
+        Returns
+        -------
+        mask : numpy.ndarray
+            Boolean array, True for each matching experiment
+        """
+        mask = np.ones(self._len, dtype=bool)
+        for path, val in Tree(condition).paths().items():
+            column = self.parameter(path)
+            if column.dtype == object:
+                mask &= np.fromiter((v == val for v in column), dtype=bool,
+                                    count=self._len)
+            elif val is None:
+                # Only columns of floats can have missing values
+                mask &= np.isnan(column) if column.dtype.kind == 'f' else False
+            elif isinstance(val, numbers.Number):
+                mask &= column == val
+            else:
+                # A column of numbers never matches a non-numeric value
+                mask[:] = False
+        return mask
+
+    def select(self, mask):
+        """Return the table of the experiments selected by a mask or array of
+        indices
+
+        Parameters
+        ----------
+        mask : array-like
+            Boolean array or array of row indices
+
+        Returns
+        -------
+        table : ColumnarResults
+            The table of selected experiments
+        """
+        return ColumnarResults({k: v[mask] for k, v in self.parameters.items()},
+                               {k: v[mask] for k, v in self.results.items()})
+
+    def filter(self, condition):
+        """Return the table of the experiments matching a condition on their
+        parameters, as done by *ResultSet.filter*
+
+        Parameters
+        ----------
+        condition : dict
+            Dictionary listing all parameters and values to be matched
+
+        Returns
+        -------
+        table : ColumnarResults
+            The table of matching experiments
+        """
+        return self.select(self.mask(condition))
+
+
+@register_results_writer('COLUMNAR')
+def write_results_columnar(results, path):
+    """Write the parameters and scalar results of a resultset to a columnar
+    *.npz* file. Non-scalar results are not written.
+
+    Parameters
+    ----------
+    results : ResultSet
+        The set of results
+    path : str
+        The path of the file to which write
+    """
+    with open(path, 'wb') as f:
+        ColumnarResults.from_results(results).save(f)
+
+
+@register_results_reader('COLUMNAR')
+def read_results_columnar(path):
+    """Reads a columnar table of results from a *.npz* file.
+
+    Parameters
+    ----------
+    path : str
+        The file path from which results are read
+
+    Returns
+    -------
+    results : ColumnarResults
+        The table of results
+    """
+    return ColumnarResults.load(path)
@@ -2,18 +2,32 @@
 """
 import collections
 import copy
+import functools
+import os
 try:
     import pickle as pickle
 except ImportError:
     import pickle
 from icarus.util import Tree
-from icarus.registry import register_results_reader, register_results_writer
+from icarus.registry import register_results_reader, register_results_writer, \
+                            register_results_appender, RESULTS_READER, \
+                            RESULTS_WRITER, RESULTS_APPENDER
 from . import spickle
+from .records import MAGIC, RecordFile, write_records, append_records
 
 __all__ = [
     'ResultSet',
+    'StreamedResultSet',
+    'ResultsJournal',
+    'rotate_file',
     'write_results_pickle',
-    'read_results_pickle'
+    'read_results_pickle',
+    'write_results_spickle',
+    'append_results_spickle',
+    'read_results_spickle',
+    'write_results_records',
+    'append_results_records',
+    'read_results_records'
            ]
 
 class ResultSet(object):
@@ -163,6 +177,220 @@ class ResultSet(object):
         return filtered_resultset
 
 
+class StreamedResultSet(ResultSet):
+    """Result set stored in a results file instead of memory.
+
+    Each result added is appended right away to the file, using the appender
+    registered for the results format, so that memory usage does not grow
+    with the number of results. Results are read back lazily from the file,
+    one at a time, when iterating over the result set.
+
+    Only result formats with a registered appender can be streamed.
+    """
+
+    def __init__(self, path, format, create=False, attr=None):
+        """Constructor
+
+        Parameters
+        ----------
+        path : str
+            The path of the results file
+        format : str
+            The results format, e.g. 'SPICKLE'
+        create : bool, optional
+            If *True*, create a new empty results file, overwriting any
+            existing one, otherwise results already in the file are part of
+            the result set
+        attr : dict, optional
+            Dictionary of common attributes to all experiments
+        """
+        if format not in RESULTS_APPENDER:
+            raise ValueError('Results format %s does not support appending'
+                             % format)
+        super(StreamedResultSet, self).__init__(attr)
+        self.path = path
+        self.format = format
+        if create:
+            RESULTS_WRITER[format]([], path)
+            self._len = 0
+        else:
+            # Counted on first request
+            self._len = None
+
+    def __len__(self):
+        if self._len is None:
+            reader = RESULTS_READER[self.format](self.path)
+            self._len = len(reader) if hasattr(reader, '__len__') \
+                        else sum(1 for _ in reader)
+        return self._len
+
+    def __iter__(self):
+        for parameters, results in RESULTS_READER[self.format](self.path):
+            yield parameters, results
+
+    def __getitem__(self, i):
+        reader = RESULTS_READER[self.format](self.path)
+        if hasattr(reader, '__getitem__'):
+            return reader[i]
+        if i < 0:
+            i += len(self)
+        if i >= 0:
+            for j, result in enumerate(self):
+                if j == i:
+                    return result
+        raise IndexError('result set index out of range')
+
+    def __add__(self, resultset):
+        if self.attr != resultset.attr:
+            raise ValueError('The resultsets cannot be merged because '
+                             'they have different global attributes')
+        rs = ResultSet(copy.deepcopy(self.attr))
+        for i in self:
+            rs.add(*i)
+        for i in resultset:
+            rs.add(*i)
+        return rs
+
+    def add(self, parameters, results):
+        if not isinstance(parameters, Tree):
+            parameters = Tree(parameters)
+        if not isinstance(results, Tree):
+            results = Tree(results)
+        RESULTS_APPENDER[self.format]([(parameters, results)], self.path)
+        if self._len is not None:
+            self._len += 1
+
+    def dump(self):
+        return list(self)
+
+    def filter(self, condition):
+        """Return subset of results matching specific conditions
+
+        Results are read from the file one at a time and only the matching
+        ones are kept in memory.
+
+        Parameters
+        ----------
+        condition : dict
+            Dictionary listing all parameters and values to be matched in the
+            results set. Each parameter, i.e., each key of the dictionary must
+            be an iterable object containing the path in the parameters tree
+            to the required parameter
+
+        Returns
+        -------
+        filtered_results : ResultSet
+            In-memory result set of the matching results
+        """
+        filtered_resultset = ResultSet()
+        for parameters, results in self:
+            parameters = Tree(parameters)
+            if parameters.match(condition):
+                filtered_resultset.add(parameters, results)
+        return filtered_resultset
+
+
+def rotate_file(path):
+    """Move a non-empty file out of the way by renaming it with the first
+    free numeric suffix, e.g. *results.journal.1*, so that it is not
+    overwritten.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file
+
+    Returns
+    -------
+    rotated_path : str
+        The new path of the file or *None* if it did not exist or was empty
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    i = 1
+    while os.path.exists('%s.%d' % (path, i)):
+        i += 1
+    rotated_path = '%s.%d' % (path, i)
+    os.rename(path, rotated_path)
+    return rotated_path
+
+
+class ResultsJournal(object):
+    """Append-only journal of the results of completed experiments.
+
+    Each (parameters, results) pair is pickled to the end of the journal file
+    and flushed to disk as soon as it is appended, so that the results of all
+    completed experiments survive a crash of the simulator. A record only
+    partially written when the process died is discarded when the journal is
+    read or reopened.
+    """
+
+    def __init__(self, path, resume=False):
+        """Constructor
+
+        Parameters
+        ----------
+        path : str
+            The path of the journal file
+        resume : bool, optional
+            If *True*, keep the records of an existing journal and append new
+            records after them, otherwise start from an empty journal. A
+            non-empty existing journal is then rotated with *rotate_file*
+            rather than truncated
+        """
+        self.path = path
+        end = 0
+        if not resume:
+            rotate_file(path)
+        elif os.path.exists(path):
+            with open(path, 'rb') as journal_file:
+                for _ in self._records(journal_file):
+                    end = journal_file.tell()
+        self._file = open(path, 'ab')
+        # Drop a truncated record left at the end of the journal
+        self._file.truncate(end)
+
+    @staticmethod
+    def _records(journal_file):
+        """Yield all complete records of an open journal file"""
+        while True:
+            try:
+                yield pickle.load(journal_file)
+            except (EOFError, pickle.UnpicklingError):
+                return
+
+    def __iter__(self):
+        """Returns iterator over the results of the journal
+
+        Returns
+        -------
+        iter : iterator
+            Iterator over (parameters, results) tuples
+        """
+        with open(self.path, 'rb') as journal_file:
+            for record in self._records(journal_file):
+                yield record
+
+    def append(self, parameters, results):
+        """Append the results of an experiment to the journal and flush them
+        to disk.
+
+        Parameters
+        ----------
+        parameters : Tree
+            Tree of experiment parameters
+        results : Tree
+            Tree of experiment results
+        """
+        pickle.dump((parameters, results), self._file, pickle.HIGHEST_PROTOCOL)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        """Close the journal file"""
+        self._file.close()
+
+
 @register_results_writer('PICKLE')
 def write_results_pickle(results, path):
     """Write a resultset to a pickle file
@@ -211,6 +439,21 @@ def write_results_spickle(results, path):
         spickle.s_dump(results, spickle_file)
 
 
+@register_results_appender('SPICKLE')
+def append_results_spickle(results, path):
+    """Append results to a streaming pickle file, creating it if needed
+
+    Parameters
+    ----------
+    results : iterable
+        The (parameters, results) tuples to append
+    path : str
+        The path of the file to which append
+    """
+    with open(path, 'ab') as spickle_file:
+        spickle.s_dump(results, spickle_file)
+
+
 @register_results_reader('SPICKLE')
 def read_results_spickle(path):
     """Reads a resultset from a streaming pickle file. This allows for iterative file reading instead of loading the
@@ -223,17 +466,90 @@ def read_results_spickle(path):
 
     Returns
     -------
+    results : iterator
+        Iterator over the (parameters, results) tuples of the file
+    """
+    with open(path, 'rb') as spickle_file:
+        for result in spickle.s_load(spickle_file):
+            yield result
+
+@register_results_writer('RECORDS')
+def write_results_records(results, path, compression=None):
+    """Write a resultset to a record file, where each result is pickled with
+    the highest protocol and prefixed by its length
+
+    Parameters
+    ----------
     results : ResultSet
-        The read result set
+        The set of results
+    path : str
+        The path of the file to which write
+    compression : str, optional
+        The compression of each result: *None*, 'gzip' or 'zstd'
     """
-    return spickle.s_load(open(path, 'rb'))
+    write_records(results, path, compression)
+
+
+@register_results_appender('RECORDS')
+def append_results_records(results, path, compression=None):
+    """Append results to a record file, creating it if needed
+
+    Parameters
+    ----------
+    results : iterable
+        The (parameters, results) tuples to append
+    path : str
+        The path of the file to which append
+    compression : str, optional
+        The compression of each result if the file is created
+    """
+    append_records(results, path, compression)
+
+
+@register_results_reader('RECORDS')
+def read_results_records(path):
+    """Reads a resultset from a record file. Results are read lazily and any
+    of them can be accessed by index without reading the previous ones.
+
+    The compression of the file, if any, is detected automatically, hence
+    this reader also reads RECORDS_GZIP and RECORDS_ZSTD files.
+
+    Parameters
+    ----------
+    path : str
+        The file path from which results are read
+
+    Returns
+    -------
+    results : RecordFile
+        Sequence of the (parameters, results) tuples of the file
+    """
+    return RecordFile(path)
+
+
+# Compressed variants of the RECORDS format. Partial functions are registered
+# so that each format gets its own name
+for _compression in ('gzip', 'zstd'):
+    _format = 'RECORDS_%s' % _compression.upper()
+    register_results_writer(_format)(
+            functools.partial(write_results_records, compression=_compression))
+    register_results_appender(_format)(
+            functools.partial(append_results_records, compression=_compression))
+    register_results_reader(_format)(functools.partial(read_results_records))
+
 
 def read_results(path, format):
+    # RECORDS files are recognized by their header whatever their extension
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            return read_results_records(path)
     if format == '.pickle':
         return read_results_pickle(path)
     elif format == '.spickle':
         return read_results_spickle(path)
+    elif format == '.records':
+        return read_results_records(path)
     else:
-        raise ValueError('format has to be either .pickle or .spickle')
+        raise ValueError('format has to be either .pickle, .spickle or .records')
 
 
@@ -0,0 +1,258 @@
+"""Length-prefixed record files.
+
+A record file stores a sequence of objects, each of them pickled with the
+highest protocol available and optionally compressed on its own. The file
+starts with a header identifying the format and the compression and is
+followed by the records, each of them prefixed by its length as an 8-byte
+little-endian unsigned integer::
+
+    | magic | version | compression | length | record | length | record | ...
+
+Since records are never rewritten, new records can be appended to an
+existing file. The offset of each record is also written to an index file
+next to the record file, named after it with an *.idx* suffix, so that any
+record can be read without reading the previous ones. If the index is
+missing or does not match the record file, e.g. because the process writing
+them died, it is rebuilt by skipping from one length prefix to the next.
+
+Supported compressions are *gzip* and *zstd*, the latter requiring the
+*zstandard* package.
+"""
+import gzip
+import os
+import pickle
+import struct
+from array import array
+
+__all__ = [
+    'RecordFile',
+    'write_records',
+    'append_records'
+           ]
+
+
+# Magic bytes and version of the record file format
+MAGIC = b'ICRECS'
+VERSION = 1
+
+# Code stored in the header of each supported compression
+COMPRESSION_CODES = {None: 0, 'gzip': 1, 'zstd': 2}
+
+_HEADER = struct.Struct('<6sBB')
+_LENGTH = struct.Struct('<Q')
+
+
+def _compressors(compression):
+    """Return the (compress, decompress) functions of a compression"""
+    if compression is None:
+        return None, None
+    if compression == 'gzip':
+        # Low compression level: results are mostly numbers and pickles of
+        # similar trees, which compress well anyway
+        return (lambda data: gzip.compress(data, 1)), gzip.decompress
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError('The zstandard package is needed to use zstd '
+                              'compression')
+        return zstandard.ZstdCompressor().compress, \
+               zstandard.ZstdDecompressor().decompress
+    raise ValueError('Unsupported compression %s' % str(compression))
+
+
+def _index_path(path):
+    """Return the path of the index of a record file"""
+    return path + '.idx'
+
+
+class RecordFile(object):
+    """Read-only view of a record file.
+
+    Records are read lazily: iterating reads them sequentially, while
+    indexing seeks directly to the requested record using the offset index.
+    """
+
+    def __init__(self, path):
+        """Constructor
+
+        Parameters
+        ----------
+        path : str
+            The path of the record file
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError('%s is not a record file' % path)
+        magic, version, code = _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('%s is not a record file' % path)
+        codes = {v: k for k, v in COMPRESSION_CODES.items()}
+        if code not in codes:
+            raise ValueError('Unsupported compression code %d' % code)
+        self.compression = codes[code]
+        self._decompress = _compressors(self.compression)[1]
+        self._offsets = None
+
+    @property
+    def offsets(self):
+        """The offset of each record in the file, read from the index or
+        rebuilt if the index is out of date"""
+        if self._offsets is None:
+            self._offsets = _load_index(self.path)
+        return self._offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        with open(self.path, 'rb') as f:
+            f.seek(_HEADER.size)
+            while True:
+                record = self._read(f)
+                if record is None:
+                    return
+                yield record
+
+    def __getitem__(self, i):
+        offsets = self.offsets
+        if i < 0:
+            i += len(offsets)
+        if i < 0 or i >= len(offsets):
+            raise IndexError('record index out of range')
+        with open(self.path, 'rb') as f:
+            f.seek(offsets[i])
+            return self._read(f)
+
+    def _read(self, f):
+        """Read the record at the current position of a file, *None* at the
+        end of the file or if the record is truncated"""
+        prefix = f.read(_LENGTH.size)
+        if len(prefix) < _LENGTH.size:
+            return None
+        length, = _LENGTH.unpack(prefix)
+        data = f.read(length)
+        if len(data) < length:
+            return None
+        if self._decompress is not None:
+            data = self._decompress(data)
+        return pickle.loads(data)
+
+
+def _scan_offsets(f, size):
+    """Return the offsets of all complete records of an open record file by
+    following the length prefixes"""
+    offsets = array('Q')
+    offset = _HEADER.size
+    f.seek(offset)
+    while offset + _LENGTH.size <= size:
+        length, = _LENGTH.unpack(f.read(_LENGTH.size))
+        end = offset + _LENGTH.size + length
+        if end > size:
+            break
+        offsets.append(offset)
+        offset = end
+        f.seek(offset)
+    return offsets
+
+
+def _load_index(path):
+    """Return the offsets of the records of a file, rebuilding its index if
+    it does not match the file"""
+    size = os.path.getsize(path)
+    offsets = array('Q')
+    index_path = _index_path(path)
+    if os.path.exists(index_path):
+        with open(index_path, 'rb') as f:
+            data = f.read()
+        offsets.frombytes(data[:len(data) - len(data) % offsets.itemsize])
+    with open(path, 'rb') as f:
+        if len(offsets) > 0:
+            # The index is valid if its last record ends at the end of file
+            f.seek(offsets[-1])
+            prefix = f.read(_LENGTH.size)
+            if len(prefix) == _LENGTH.size and \
+                    offsets[-1] + _LENGTH.size + _LENGTH.unpack(prefix)[0] == size:
+                return offsets
+        elif size <= _HEADER.size:
+            return offsets
+        offsets = _scan_offsets(f, size)
+    with open(index_path, 'wb') as f:
+        offsets.tofile(f)
+    return offsets
+
+
+def _append(records, path, compression, create):
+    """Append records to a file, creating it if needed"""
+    if create or not os.path.exists(path) or \
+            os.path.getsize(path) < _HEADER.size:
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, COMPRESSION_CODES[compression]))
+        offsets = array('Q')
+    else:
+        # Existing files keep their compression
+        compression = RecordFile(path).compression
+        offsets = _load_index(path)
+    compress = _compressors(compression)[0]
+    with open(path, 'r+b') as f:
+        # Drop any truncated record left at the end of the file
+        if len(offsets) > 0:
+            f.seek(offsets[-1])
+            length, = _LENGTH.unpack(f.read(_LENGTH.size))
+            end = offsets[-1] + _LENGTH.size + length
+        else:
+            end = _HEADER.size
+        f.truncate(end)
+        f.seek(end)
+        n_indexed = len(offsets)
+        for record in records:
+            data = pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+            if compress is not None:
+                data = compress(data)
+            offsets.append(f.tell())
+            f.write(_LENGTH.pack(len(data)))
+            f.write(data)
+        # Appended records must survive a crash, the index can be rebuilt
+        f.flush()
+        os.fsync(f.fileno())
+    with open(_index_path(path), 'r+b' if n_indexed > 0 else 'wb') as f:
+        f.truncate(n_indexed * offsets.itemsize)
+        f.seek(n_indexed * offsets.itemsize)
+        offsets[n_indexed:].tofile(f)
+
+
+def write_records(records, path, compression=None):
+    """Write objects to a new record file, overwriting any existing one.
+
+    Parameters
+    ----------
+    records : iterable
+        The objects to write
+    path : str
+        The path of the record file
+    compression : str, optional
+        The compression of each record: *None*, 'gzip' or 'zstd'
+    """
+    if compression not in COMPRESSION_CODES:
+        raise ValueError('Unsupported compression %s' % str(compression))
+    _append(records, path, compression, create=True)
+
+
+def append_records(records, path, compression=None):
+    """Append objects to a record file, creating it if it does not exist.
+
+    Parameters
+    ----------
+    records : iterable
+        The objects to append
+    path : str
+        The path of the record file
+    compression : str, optional
+        The compression of each record if the file is created. Records
+        appended to an existing file use the compression of that file
+    """
+    if compression not in COMPRESSION_CODES:
+        raise ValueError('Unsupported compression %s' % str(compression))
+    _append(records, path, compression, create=False)
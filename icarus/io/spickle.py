@@ -25,7 +25,7 @@ def s_dump(iterable_to_pickle, file_obj):
 
 def s_dump_elt(elt_to_pickle, file_obj):
     """ dumps one element to file_obj, a file opened in write mode """
-    pickled_elt_str = dumps(elt_to_pickle)
+    pickled_elt_str = dumps(elt_to_pickle, 0)
     file_obj.write(pickled_elt_str)
     # record separator is a blank line
     # (since pickled_elt_str might contain its own newlines)
@@ -39,7 +39,7 @@ def s_load(file_obj):
         cur_elt.append(line)
 
         if line == b'\n':
-            pickled_elt_str = ''.join(cur_elt)
+            pickled_elt_str = b''.join(cur_elt)
             elt = loads(pickled_elt_str)
             cur_elt = []
             yield elt
\ No newline at end of file
@@ -5,8 +5,10 @@ from .cache import *
 from .cachenet import *
 from .strategy import *
 from .space_saving import *
+from .count_min_sketch import *
 from .data_stream_caching_algorithm import *
 from .adaptive_replacement_cache import *
+from .belady import *
 
 def policy_parameter_usage(policy):
     # the returned values indicate whether a parameter is used by the queried policy
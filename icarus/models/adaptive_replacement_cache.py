@@ -1,4 +1,4 @@
-from icarus.models import Cache, LinkedSet
+from icarus.models import Cache, make_linked_set
 from icarus.registry import register_cache_policy
 from icarus.util import inheritdoc
 from copy import deepcopy
@@ -24,15 +24,15 @@ class AdaptiveReplacementCache(Cache):
     """
 
     @inheritdoc(Cache)
-    def __init__(self, maxlen, **kwargs):
-        # ARC has two caches: a recency cache and a frequency cache
-        self._recency_cache_top = LinkedSet()  # paper: T_1
-        self._recency_cache_bottom = LinkedSet()  # paper: B_1
-        self._frequency_cache_top = LinkedSet()  # paper: T_2
-        self._frequency_cache_bottom = LinkedSet()  # paper: B_2
+    def __init__(self, maxlen, linked_set='LINKED', **kwargs):
         self._maxlen = int(maxlen)  # paper: c
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
+        # ARC has two caches: a recency cache and a frequency cache
+        self._recency_cache_top = make_linked_set(linked_set, self._maxlen + 1)  # paper: T_1
+        self._recency_cache_bottom = make_linked_set(linked_set, self._maxlen + 1)  # paper: B_1
+        self._frequency_cache_top = make_linked_set(linked_set, self._maxlen + 1)  # paper: T_2
+        self._frequency_cache_bottom = make_linked_set(linked_set, self._maxlen + 1)  # paper: B_2
         # _p is the target number of elements for the recency cache top
         # which means that _maxlen - _p is the target number of elements for the frequency cache top
         # It is the target number since it will be a real number at some point and not a natural number.
@@ -0,0 +1,206 @@
+"""Implementation of Belady's optimal offline cache replacement policy"""
+import os
+import heapq
+import weakref
+
+from icarus.models import Cache
+from icarus.registry import register_cache_policy
+from icarus.tools import trace_contents, next_occurrences
+from icarus.util import inheritdoc
+
+__all__ = ['BeladyCache']
+
+
+class _Trace(object):
+    """Contents and next occurrences of the requests of a trace"""
+
+    __slots__ = ('contents', 'next', '__weakref__')
+
+    def __init__(self, contents, next):
+        self.contents = contents
+        self.next = next
+
+
+# Traces loaded by caches still alive, shared by all the caches of a network
+# and keyed by the path, size and modification time of the trace. A trace is
+# released as soon as the last cache using it is garbage collected
+_traces = weakref.WeakValueDictionary()
+
+
+def _load_trace(reqs_file, binary_trace):
+    """Return the contents and the next occurrences of a request trace"""
+    stat = os.stat(reqs_file)
+    key = (reqs_file, binary_trace, stat.st_size, stat.st_mtime_ns)
+    trace = _traces.get(key)
+    if trace is None:
+        contents = trace_contents(reqs_file, binary_trace)
+        trace = _Trace(contents, next_occurrences(contents))
+        _traces[key] = trace
+    return trace
+
+
+@register_cache_policy('OPT')
+class BeladyCache(Cache):
+    """Belady's optimal offline replacement policy (OPT, also known as MIN)
+    from
+
+    L. A. Belady
+    "A study of replacement algorithms for a virtual-storage computer"
+    IBM Systems Journal, 5(2), 1966
+
+    Upon insertion of a new item, OPT evicts the item requested the furthest
+    in the future. If the new item is requested further in the future than
+    all cached items or never requested again, it is not inserted at all.
+
+    Since OPT needs to know the future, it reads the request trace that will
+    be fed to the cache and assumes that each call to *get* corresponds to
+    the next request of the trace. This holds for a deterministic
+    trace-driven workload served by a single cache on the path of all
+    requests, e.g. a PATH topology with 3 nodes and the LCE strategy. A
+    ValueError is raised as soon as a request does not match the trace.
+
+    The index of the next request for the same content is precomputed for
+    each request of the trace and cached items are kept in a max-heap ordered
+    by their next request, whose outdated entries are discarded lazily.
+    """
+
+    def __init__(self, maxlen, reqs_file=None, binary_trace=True, **kwargs):
+        """Constructor
+
+        Parameters
+        ----------
+        maxlen : int
+            The maximum number of items the cache can store
+        reqs_file : str
+            The path to the CSV trace of the requests served by the cache
+        binary_trace : bool, optional
+            If *True*, read the trace from its memory-mapped binary version
+        """
+        self._maxlen = int(maxlen)
+        if self._maxlen <= 0:
+            raise ValueError('maxlen must be positive')
+        if reqs_file is None:
+            raise ValueError('OPT requires the path of the request trace')
+        self._trace = _load_trace(reqs_file, binary_trace)
+        self._contents = self._trace.contents
+        self._next = self._trace.next
+        self._n_requests = len(self._contents)
+        # Index of the last request looked up
+        self._req = -1
+        # Map item -> index of its next request
+        self._cache = {}
+        # Max-heap of (-next request, item) entries, some of which are outdated
+        self._heap = []
+
+    @inheritdoc(Cache)
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    @inheritdoc(Cache)
+    def maxlen(self):
+        return self._maxlen
+
+    @inheritdoc(Cache)
+    def dump(self):
+        return sorted(self._cache, key=self._cache.get)
+
+    def position(self, k):
+        """Return the current position of an item in the cache. Position *0*
+        refers to the item requested the soonest in the future, while position
+        *maxlen - 1* refers to the item requested the furthest in the future.
+
+        This method does not change the internal state of the cache.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item looked up in the cache
+
+        Returns
+        -------
+        position : int
+            The current position of the item in the cache
+        """
+        if k not in self._cache:
+            raise ValueError('The item %s is not in the cache' % str(k))
+        return self.dump().index(k)
+
+    @inheritdoc(Cache)
+    def has(self, k):
+        return k in self._cache
+
+    @inheritdoc(Cache)
+    def get(self, k, weight):
+        self._req += 1
+        if self._req >= self._n_requests or self._contents[self._req] != k:
+            raise ValueError('Request %d for item %s does not match the trace'
+                             % (self._req, str(k)))
+        if k not in self._cache:
+            return False
+        self._update(k, int(self._next[self._req]))
+        return True
+
+    def put(self, k, weight):
+        """Insert an item in the cache if it is requested again before all
+        the cached items.
+
+        The item must be the one of the last request looked up with *get*.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item to be inserted
+        weight : int
+            The weight of the item
+
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted object or *None* if no contents were evicted.
+        """
+        if k in self._cache:
+            return None
+        if self._req < 0 or self._contents[self._req] != k:
+            raise ValueError('Item %s is not the one of the last request'
+                             % str(k))
+        next_req = int(self._next[self._req])
+        if next_req == self._n_requests:
+            # Never requested again
+            return None
+        evicted = None
+        if len(self._cache) >= self._maxlen:
+            heap = self._heap
+            while self._cache.get(heap[0][1]) != -heap[0][0]:
+                heapq.heappop(heap)
+            if -heap[0][0] < next_req:
+                return None
+            evicted = heapq.heappop(heap)[1]
+            del self._cache[evicted]
+        self._update(k, next_req)
+        return evicted
+
+    def _update(self, k, next_req):
+        """Set the index of the next request of a cached item"""
+        if next_req == self._n_requests:
+            # Never requested again, it can be dropped right away
+            del self._cache[k]
+            return
+        self._cache[k] = next_req
+        heapq.heappush(self._heap, (-next_req, k))
+        if len(self._heap) > 2 * len(self._cache) + 64:
+            self._heap = [(-r, c) for c, r in self._cache.items()]
+            heapq.heapify(self._heap)
+
+    @inheritdoc(Cache)
+    def remove(self, k):
+        if k in self._cache:
+            del self._cache[k]
+            return True
+        else:
+            return False
+
+    @inheritdoc(Cache)
+    def clear(self):
+        self._cache.clear()
+        self._heap = []
@@ -4,6 +4,8 @@ This module contains the implementations of all the cache replacement policies
 provided by Icarus.
 """
 from collections import deque, defaultdict
+from array import array
+import heapq
 import random
 import abc
 import copy
@@ -16,6 +18,8 @@ from icarus.registry import register_cache_policy
 
 __all__ = [
         'LinkedSet',
+        'ArrayLinkedSet',
+        'make_linked_set',
         'Cache',
         'NullCache',
         'LruCache',
@@ -46,6 +50,8 @@ class LinkedSet(object):
     """
     class _Node(object):
         """Class implementing a node of the linked list"""
+
+        __slots__ = ('val', 'up', 'down')
         
         def __init__(self, val, up=None, down=None):
             """Constructor
@@ -448,6 +454,304 @@ class LinkedSet(object):
         self._map.clear()
 
 
+class ArrayLinkedSet(object):
+    """An array-backed doubly-linked set.
+
+    It provides the same interface and time complexities of
+    :class:`LinkedSet` but, instead of allocating a node object per item, it
+    stores the links of all items in two preallocated integer arrays indexed
+    by slot. A dictionary maps each item to its slot and the slots released by
+    removed items are kept in a free list and reused by subsequent insertions.
+
+    This reduces considerably the memory footprint of large caches, at the
+    cost of a slightly higher constant factor of each operation. The arrays
+    are doubled in size whenever all slots are in use, so the capacity passed
+    to the constructor is only a hint.
+    """
+    # Slot index used as null pointer
+    _NIL = -1
+
+    def __init__(self, iterable=[], capacity=0):
+        """Constructor
+
+        Parameters
+        ----------
+        iterable : iterable type
+            An iterable type to initialize the data structure.
+            It must contain only one instance of each element
+        capacity : int, optional
+            The number of slots to preallocate
+        """
+        self._val = []
+        self._up = array('i')
+        self._down = array('i')
+        self._free = self._NIL
+        self._top = self._NIL
+        self._bottom = self._NIL
+        self._map = {}
+        if capacity > 0:
+            self._grow(int(capacity))
+        if iterable:
+            if len(set(iterable)) < len(iterable):
+                raise ValueError('The iterable parameter contains repeated '
+                                 'elements')
+            for i in iterable:
+                self.append_bottom(i)
+
+    def _grow(self, n):
+        """Add *n* slots to the arrays and put them in the free list"""
+        start = len(self._val)
+        self._val.extend([None] * n)
+        self._up.extend([self._NIL] * n)
+        self._down.extend(range(start + 1, start + n + 1))
+        self._down[-1] = self._free
+        self._free = start
+
+    def _alloc(self, k):
+        """Store an item in a free slot and return the slot"""
+        if self._free == self._NIL:
+            self._grow(max(len(self._val), 16))
+        i = self._free
+        self._free = self._down[i]
+        self._val[i] = k
+        self._map[k] = i
+        return i
+
+    def _release(self, i):
+        """Remove the item stored in a slot, already unlinked, and return it"""
+        k = self._val[i]
+        self._val[i] = None
+        del self._map[k]
+        self._down[i] = self._free
+        self._free = i
+        return k
+
+    def _unlink(self, i):
+        up, down = self._up[i], self._down[i]
+        if up == self._NIL:
+            self._top = down
+        else:
+            self._down[up] = down
+        if down == self._NIL:
+            self._bottom = up
+        else:
+            self._up[down] = up
+
+    def _link_above(self, i, j):
+        """Link slot *i* right above slot *j*, or on top if *j* is null"""
+        if j == self._NIL:
+            up = self._NIL
+            self._bottom = i
+        else:
+            up = self._up[j]
+            self._up[j] = i
+        self._up[i] = up
+        self._down[i] = j
+        if up == self._NIL:
+            self._top = i
+        else:
+            self._down[up] = i
+
+    def _link_below(self, i, j):
+        """Link slot *i* right below slot *j*, or at the bottom if *j* is null"""
+        if j == self._NIL:
+            down = self._NIL
+            self._top = i
+        else:
+            down = self._down[j]
+            self._down[j] = i
+        self._down[i] = down
+        self._up[i] = j
+        if down == self._NIL:
+            self._bottom = i
+        else:
+            self._up[down] = i
+
+    def _slot(self, k):
+        try:
+            return self._map[k]
+        except KeyError:
+            raise KeyError('Item %s not in the set' % str(k))
+
+    @inheritdoc(LinkedSet)
+    def __len__(self):
+        return len(self._map)
+
+    @inheritdoc(LinkedSet)
+    def __iter__(self):
+        val, down = self._val, self._down
+        cur = self._top
+        while cur != self._NIL:
+            # Read the link before yielding so that the iteration survives
+            # the removal of the current item, as it happens with LinkedSet
+            nxt = down[cur]
+            yield val[cur]
+            cur = nxt
+
+    @inheritdoc(LinkedSet)
+    def __reversed__(self):
+        val, up = self._val, self._up
+        cur = self._bottom
+        while cur != self._NIL:
+            # Read the link before yielding so that the iteration survives
+            # the removal of the current item, as it happens with LinkedSet
+            nxt = up[cur]
+            yield val[cur]
+            cur = nxt
+
+    @inheritdoc(LinkedSet)
+    def __str__(self):
+        return self.__class__.__name__ + "([" + "".join("%s, " % str(i) for i in self)[:-2] + "])"
+
+    @inheritdoc(LinkedSet)
+    def __contains__(self, k):
+        return k in self._map
+
+    @property
+    @inheritdoc(LinkedSet)
+    def top(self):
+        return self._val[self._top] if self._top != self._NIL else None
+
+    @property
+    @inheritdoc(LinkedSet)
+    def bottom(self):
+        return self._val[self._bottom] if self._bottom != self._NIL else None
+
+    @inheritdoc(LinkedSet)
+    def pop_top(self):
+        i = self._top
+        if i == self._NIL:  # No elements to pop
+            return None
+        self._unlink(i)
+        return self._release(i)
+
+    @inheritdoc(LinkedSet)
+    def pop_bottom(self):
+        i = self._bottom
+        if i == self._NIL:  # No elements to pop
+            return None
+        self._unlink(i)
+        return self._release(i)
+
+    @inheritdoc(LinkedSet)
+    def append_top(self, k):
+        if k in self._map:
+            raise KeyError('The item %s is already in the set' % str(k))
+        self._link_above(self._alloc(k), self._top)
+
+    @inheritdoc(LinkedSet)
+    def append_bottom(self, k):
+        if k in self._map:
+            raise KeyError('The item %s is already in the set' % str(k))
+        self._link_below(self._alloc(k), self._bottom)
+
+    @inheritdoc(LinkedSet)
+    def move_up(self, k):
+        i = self._slot(k)
+        up = self._up[i]
+        if up == self._NIL:  # already on top or there is only one element
+            return
+        self._unlink(i)
+        self._link_above(i, up)
+
+    @inheritdoc(LinkedSet)
+    def move_down(self, k):
+        i = self._slot(k)
+        down = self._down[i]
+        if down == self._NIL:  # already at the bottom or there is only one element
+            return
+        self._unlink(i)
+        self._link_below(i, down)
+
+    @inheritdoc(LinkedSet)
+    def move_to_top(self, k):
+        i = self._slot(k)
+        if self._up[i] == self._NIL:  # already on top or there is only one element
+            return
+        self._unlink(i)
+        self._link_above(i, self._top)
+
+    @inheritdoc(LinkedSet)
+    def move_to_bottom(self, k):
+        i = self._slot(k)
+        if self._down[i] == self._NIL:  # already at bottom or there is only one element
+            return
+        self._unlink(i)
+        self._link_below(i, self._bottom)
+
+    @inheritdoc(LinkedSet)
+    def insert_above(self, i, k):
+        if k in self._map:
+            raise KeyError('Item %s already in the set' % str(k))
+        j = self._slot(i)
+        self._link_above(self._alloc(k), j)
+
+    @inheritdoc(LinkedSet)
+    def insert_below(self, i, k):
+        if k in self._map:
+            raise KeyError('Item %s already in the set' % str(k))
+        j = self._slot(i)
+        self._link_below(self._alloc(k), j)
+
+    @inheritdoc(LinkedSet)
+    def index(self, k):
+        if k not in self._map:
+            raise KeyError('The item %s is not in the set' % str(k))
+        i = self._map[k]
+        index = 0
+        cur = self._top
+        down = self._down
+        while cur != i:
+            cur = down[cur]
+            index += 1
+        return index
+
+    @inheritdoc(LinkedSet)
+    def remove(self, k):
+        i = self._slot(k)
+        self._unlink(i)
+        self._release(i)
+
+    @inheritdoc(LinkedSet)
+    def clear(self):
+        # Slots are kept allocated and all of them go back to the free list
+        n = len(self._val)
+        self._val = [None] * n
+        self._down = array('i', range(1, n + 1))
+        self._up = array('i', [self._NIL] * n)
+        self._free = self._NIL
+        if n > 0:
+            self._down[-1] = self._NIL
+            self._free = 0
+        self._top = self._NIL
+        self._bottom = self._NIL
+        self._map.clear()
+
+
+def make_linked_set(impl='LINKED', capacity=0):
+    """Create an empty linked set with the requested implementation.
+
+    Parameters
+    ----------
+    impl : str, optional
+        The implementation: *LINKED* for :class:`LinkedSet` or *ARRAY* for
+        :class:`ArrayLinkedSet`
+    capacity : int, optional
+        The expected maximum number of items of the set. It is only used by
+        array-backed sets to preallocate their slots
+
+    Returns
+    -------
+    linked_set : LinkedSet or ArrayLinkedSet
+        The linked set
+    """
+    if impl == 'LINKED':
+        return LinkedSet()
+    elif impl == 'ARRAY':
+        return ArrayLinkedSet(capacity=capacity)
+    raise ValueError('Unknown linked set implementation %s' % str(impl))
+
+
 class Cache(object):
     """Base implementation of a cache object"""
     
@@ -753,6 +1057,10 @@ class LruCache(Cache):
     This eviction policy is efficient for line speed operations because both
     search and replacement tasks can be performed in constant time (*O(1)*).
     
+    The order of the items is kept in a :class:`LinkedSet` or, if the
+    *linked_set* parameter is *ARRAY*, in a more compact
+    :class:`ArrayLinkedSet`.
+    
     This policy has been shown to perform well in the presence of temporal
     locality in the request pattern. However, its performance drops under the
     Independent Reference Model (IRM) assumption (i.e. the probability that an
@@ -760,11 +1068,11 @@ class LruCache(Cache):
     """
         
     @inheritdoc(Cache)
-    def __init__(self, maxlen, **kwargs):
-        self._cache = LinkedSet()
+    def __init__(self, maxlen, linked_set='LINKED', **kwargs):
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
+        self._cache = make_linked_set(linked_set, self._maxlen + 1)
 
     @inheritdoc(Cache)
     def __len__(self):
@@ -847,6 +1155,32 @@ class LruCache(Cache):
         self._cache.remove(k)
         return True
 
+    def resize(self, maxlen):
+        """Change the size of the cache in place.
+
+        If the cache holds more items than its new size, the least recently
+        used ones are evicted.
+
+        Parameters
+        ----------
+        maxlen : int
+            The new size of the cache
+
+        Returns
+        -------
+        evicted : list
+            The evicted items, from the most to the least recently used one
+        """
+        maxlen = int(maxlen)
+        if maxlen <= 0:
+            raise ValueError('maxlen must be positive')
+        evicted = []
+        while len(self._cache) > maxlen:
+            evicted.append(self._cache.pop_bottom())
+        evicted.reverse()
+        self._maxlen = maxlen
+        return evicted
+
     @inheritdoc(Cache)
     def clear(self):
         self._cache.clear()
@@ -869,7 +1203,7 @@ class SegmentedLruCache(Cache):
     and recency of item reference.
     """
         
-    def __init__(self, maxlen, segments=2, **kwargs):
+    def __init__(self, maxlen, segments=2, linked_set='LINKED', **kwargs):
         """Constructor
         
         Parameters
@@ -878,17 +1212,21 @@ class SegmentedLruCache(Cache):
             The maximum number of items the cache can store
         segments : int
             The number of segments
+        linked_set : str, optional
+            The implementation of the segments, either *LINKED* or *ARRAY*
+            (see :func:`make_linked_set`)
         """
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
         if not isinstance(segments, int) or segments <= 0 or segments > maxlen:
             raise ValueError('segments must be an integer and 0 < segments <= maxlen')
-        self._segment = [LinkedSet() for _ in range(segments)]
         quotient = self._maxlen // segments
         self._segment_maxlen = [quotient for _ in range(segments)]
         for i in range(self._maxlen % segments):
             self._segment_maxlen[i] += 1
+        self._segment = [make_linked_set(linked_set, seg_maxlen + 1)
+                         for seg_maxlen in self._segment_maxlen]
         # This map is a dictionary mapping each item in the cache with the
         # segment in which it is located. This is not strictly necessary to
         # locate an item as we could have used the map in each segment.
@@ -1018,6 +1356,79 @@ class SegmentedLruCache(Cache):
         return list(iter(self._segment[id]))
 
 
+class _LfuHeap(object):
+    """Priority queue of cached items ordered by (frequency, insertion time).
+
+    It is the eviction engine of the LFU-based cache policies. Items are
+    stored in a binary heap whose entries are invalidated lazily: when the
+    frequency of an item changes, a new entry is pushed and the previous one
+    is discarded only once it reaches the top of the heap. The heap is
+    compacted whenever stale entries outnumber live ones, so that memory stays
+    proportional to the number of cached items.
+
+    All operations take *O(log n)* amortized time, as opposed to the *O(n)*
+    scan required to find the item to evict with a plain dictionary. Ties of
+    both frequency and time are broken in favour of the item pushed first.
+    """
+
+    def __init__(self):
+        self._heap = []
+        # Map item -> its current heap entry [freq, t, seq, item]
+        self._entry = {}
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._entry)
+
+    def __contains__(self, k):
+        return k in self._entry
+
+    def __iter__(self):
+        return iter(self._entry)
+
+    def key(self, k):
+        """Return the (frequency, time) tuple of an item"""
+        entry = self._entry[k]
+        return entry[0], entry[1]
+
+    def push(self, k, freq, t):
+        """Insert an item or update its frequency and time"""
+        self._seq += 1
+        entry = (freq, t, self._seq, k)
+        self._entry[k] = entry
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * len(self._entry) + 64:
+            self._heap = list(self._entry.values())
+            heapq.heapify(self._heap)
+
+    def increment(self, k, amount=1):
+        """Increase the frequency of an item, preserving its time"""
+        freq, t = self.key(k)
+        self.push(k, freq + amount, t)
+
+    def pop_min(self):
+        """Remove and return the item with the smallest (frequency, time)"""
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            k = entry[3]
+            if self._entry.get(k) is entry:
+                del self._entry[k]
+                return k
+        return None
+
+    def remove(self, k):
+        """Remove an item, returning *True* if it was present"""
+        return self._entry.pop(k, None) is not None
+
+    def sorted(self, reverse=False):
+        """Return the items sorted by (frequency, time)"""
+        return [entry[3] for entry in sorted(self._entry.values(), reverse=reverse)]
+
+    def clear(self):
+        self._heap = []
+        self._entry.clear()
+
+
 @register_cache_policy('IN_CACHE_LFU')
 class InCacheLfuCache(Cache):
     """In-cache Least Frequently Used (LFU) cache implementation
@@ -1036,13 +1447,14 @@ class InCacheLfuCache(Cache):
     In-cache LFU performs better than LRU under IRM demands.
     However, its implementation is computationally expensive since it
     cannot be implemented in such a way that both search and replacement tasks
-    can be executed in constant time. This makes it particularly unfit for
-    large caches and line speed operations.
+    can be executed in constant time. Here items are kept in a heap ordered
+    by frequency and insertion time, so that replacement takes logarithmic
+    time and ties of frequency are broken evicting the oldest item.
     """
     
     @inheritdoc(Cache)
     def __init__(self, maxlen, **kwargs):
-        self._cache = {}
+        self._cache = _LfuHeap()
         self.t = 0
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
@@ -1059,7 +1471,7 @@ class InCacheLfuCache(Cache):
     
     @inheritdoc(Cache)
     def dump(self):
-        return sorted(self._cache, key=lambda x: self._cache[x], reverse=True) 
+        return self._cache.sorted(reverse=True)
 
     @inheritdoc(Cache)
     def has(self, k):
@@ -1068,8 +1480,7 @@ class InCacheLfuCache(Cache):
     @inheritdoc(Cache)
     def get(self, k, weight):
         if self.has(k):
-            freq, t = self._cache[k]
-            self._cache[k] = freq+1, t 
+            self._cache.increment(k)
             return True
         else:
             return False
@@ -1078,20 +1489,14 @@ class InCacheLfuCache(Cache):
     def put(self, k, weight):
         if not self.has(k):
             self.t += 1
-            self._cache[k] = (1, self.t)
+            self._cache.push(k, 1, self.t)
             if len(self._cache) > self._maxlen:
-                evicted = min(self._cache, key=lambda x: self._cache[x])
-                self._cache.pop(evicted)
-                return evicted
+                return self._cache.pop_min()
         return None
     
     @inheritdoc(Cache)
     def remove(self, k):
-        if k in self._cache:
-            self._cache.pop(k)
-            return True
-        else:
-            return False
+        return self._cache.remove(k)
         
     @inheritdoc(Cache)
     def clear(self):
@@ -1115,16 +1520,16 @@ class PerfectLfuCache(Cache):
     In contrast to LRU, Perfect-LFU has been shown to perform optimally under
     IRM demands. However, its implementation is computationally expensive since
     it cannot be implemented in such a way that both search and replacement
-    tasks can be executed in constant time. This makes it particularly unfit
-    for large caches and line speed operations.
+    tasks can be executed in constant time. Here cached items are kept in a
+    heap ordered by their counters, so that replacement takes logarithmic time.
     """
     
     @inheritdoc(Cache)
     def __init__(self, maxlen, **kwargs):
         # Dict storing counter for all contents, not only those in cache
         self._counter = {}
-        # Set storing only items currently in cache
-        self._cache = set()
+        # Heap storing only items currently in cache, keyed by their counter
+        self._cache = _LfuHeap()
         self.t = 0
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
@@ -1141,7 +1546,7 @@ class PerfectLfuCache(Cache):
     
     @inheritdoc(Cache)
     def dump(self):
-        return sorted(self._cache, key=lambda x: self._counter[x], reverse=True) 
+        return self._cache.sorted(reverse=True)
 
     @inheritdoc(Cache)
     def has(self, k):
@@ -1156,6 +1561,7 @@ class PerfectLfuCache(Cache):
         else:
             self._counter[k] = 1, self.t
         if self.has(k):
+            self._cache.push(k, *self._counter[k])
             return True
         else:
             return False
@@ -1170,20 +1576,14 @@ class PerfectLfuCache(Cache):
                 # If I always call a get before a put, this line should never
                 # be executed
                 self._counter[k] = (1, self.t)
-            self._cache.add(k)
+            self._cache.push(k, *self._counter[k])
             if len(self._cache) > self._maxlen:
-                evicted = min(self._cache, key=lambda x: self._counter[x])
-                self._cache.remove(evicted)
-                return evicted
+                return self._cache.pop_min()
         return None
     
     @inheritdoc(Cache)
     def remove(self, k):
-        if k in self._cache:
-            self._cache.pop(k)
-            return True
-        else:
-            return False
+        return self._cache.remove(k)
         
     @inheritdoc(Cache)
     def clear(self):
@@ -1294,11 +1694,11 @@ class ClimbCache(Cache):
     """
       
     @inheritdoc(Cache)
-    def __init__(self, maxlen, **kwargs):
-        self._cache = LinkedSet()
+    def __init__(self, maxlen, linked_set='LINKED', **kwargs):
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
+        self._cache = make_linked_set(linked_set, self._maxlen + 1)
 
     @inheritdoc(Cache)
     def __len__(self):
@@ -1900,8 +2300,7 @@ class WeightedLruCache(InCacheLfuCache):
     @inheritdoc(InCacheLfuCache)
     def get(self, k, weight):
         if self.has(k):
-            freq, t = self._cache[k]
-            self._cache[k] = freq + weight, t
+            self._cache.increment(k, weight)
             return True
         else:
             return False
@@ -1910,9 +2309,7 @@ class WeightedLruCache(InCacheLfuCache):
     def put(self, k, weight):
         if not self.has(k):
             self.t += 1
-            self._cache[k] = (weight, self.t)
+            self._cache.push(k, weight, self.t)
             if len(self._cache) > self._maxlen:
-                evicted = min(self._cache, key=lambda x: self._cache[x])
-                self._cache.pop(evicted)
-                return evicted
+                return self._cache.pop_min()
         return None
\ No newline at end of file
@@ -0,0 +1,332 @@
+"""Count-Min Sketch frequency estimator.
+
+The Count-Min Sketch was proposed in
+
+Cormode, Graham, and S. Muthukrishnan.
+"An improved data stream summary: the count-min sketch and its applications."
+Journal of Algorithms 55.1 (2005): 58-75.
+
+It estimates the frequencies of all items of a stream in a fixed-size table of
+counters, at the cost of overestimating them because of hash collisions. The
+estimator of this module combines a sketch updated conservatively, which
+reduces overestimation, with a small heap tracking the most frequent items, so
+that it can replace the Stream-Summary table of Space Saving in the DSCA
+family of cache policies with a memory footprint that does not depend on the
+number of monitored items.
+"""
+import heapq
+
+import numpy as np
+
+__all__ = ['CountMinSketch',
+           'CountMinSketchTopK']
+
+
+# Mersenne prime modulus of the hash functions, small enough for the products
+# of the hash computation to fit in 64-bit integers
+_PRIME = 2**31 - 1
+
+
+class CountMinSketch(object):
+    """Count-Min Sketch with conservative update.
+
+    The sketch is a *depth* x *width* table of counters, stored in a single
+    NumPy array. Each row has its own hash function mapping items to a column.
+    The estimated frequency of an item is the minimum of its counters, which
+    is never lower than its actual frequency. With conservative update, an
+    occurrence only raises the counters of the item that are lower than its
+    new estimated frequency.
+    """
+
+    def __init__(self, width, depth=4, seed=0):
+        """Constructor
+
+        Parameters
+        ----------
+        width : int
+            The number of counters of each row
+        depth : int, optional
+            The number of rows, i.e. of hash functions
+        seed : int, optional
+            The seed of the hash functions
+        """
+        self.width = int(width)
+        self.depth = int(depth)
+        if self.width <= 0 or self.depth <= 0:
+            raise ValueError('width and depth must be positive')
+        rng = np.random.RandomState(seed)
+        # (offset of the row in the flattened table, a, b) of the hash
+        # function (a * x + b) mod p of each row
+        self._rows = [(i * self.width, int(a), int(b)) for i, (a, b) in
+                      enumerate(zip(rng.randint(1, _PRIME, size=self.depth),
+                                    rng.randint(0, _PRIME, size=self.depth)))]
+        self._table = np.zeros(self.depth * self.width, dtype=np.int64)
+        # Reading and writing a few counters through a memory view is much
+        # faster than through NumPy indexing
+        self._counters = memoryview(self._table)
+
+    @property
+    def nbytes(self):
+        """The number of bytes of the table of counters"""
+        return self._table.nbytes
+
+    def _indices(self, k):
+        """Return the index of the counter of each row for an item"""
+        x = hash(k) % _PRIME
+        width = self.width
+        return [offset + (a * x + b) % _PRIME % width for offset, a, b in self._rows]
+
+    def add(self, k, weight=1):
+        """Record occurrences of an item.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item
+        weight : int, optional
+            The number of occurrences
+
+        Returns
+        -------
+        estimate : int
+            The estimated frequency of the item after the update
+        """
+        counters = self._counters
+        indices = self._indices(k)
+        estimate = min([counters[i] for i in indices]) + weight
+        for i in indices:
+            if counters[i] < estimate:
+                counters[i] = estimate
+        return estimate
+
+    def estimate(self, k):
+        """Return the estimated frequency of an item.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item
+
+        Returns
+        -------
+        estimate : int
+            The estimated frequency, an upper bound of the actual one
+        """
+        counters = self._counters
+        return min([counters[i] for i in self._indices(k)])
+
+    def clear(self):
+        """Reset all counters"""
+        self._table[:] = 0
+
+
+class CountMinSketchTopK(object):
+    """Frequency estimator tracking the most frequent items of a stream with a
+    Count-Min Sketch and a heap.
+
+    Every occurrence updates the sketch, while only the *capacity* items with
+    the highest estimated frequencies are tracked in a min-heap. For each
+    tracked item, the estimator keeps its estimated frequency, an upper bound
+    of its actual frequency, and the number of occurrences since it started
+    being tracked, a lower bound. Since no item leaves the heap with a higher
+    estimate than the items it contains, the frequency of any untracked item is
+    bounded as well, which allows to guarantee the top-k elements as Space
+    Saving does.
+
+    This class exposes the same interface as the *SpaceSavingCache* objects
+    used by the DSCA family of cache policies to rank items.
+    """
+
+    def __init__(self, capacity, width, depth=4, seed=0):
+        """Constructor
+
+        Parameters
+        ----------
+        capacity : int
+            The number of tracked items
+        width : int
+            The number of counters of each row of the sketch
+        depth : int, optional
+            The number of rows of the sketch
+        seed : int, optional
+            The seed of the hash functions of the sketch
+        """
+        self._capacity = int(capacity)
+        if self._capacity <= 0:
+            raise ValueError('capacity must be positive')
+        self._sketch = CountMinSketch(width, depth, seed)
+        # item -> [estimate, occurrences since tracked, sequence number, item]
+        self._tracked = {}
+        # heap of the entries of tracked items, possibly stale, i.e. not
+        # anymore in _tracked, which is checked by identity
+        self._heap = []
+        self._seq = 0
+        # highest estimate of an item not tracked anymore or never tracked
+        self._floor = 0
+
+    def __len__(self):
+        return len(self._tracked)
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def has(self, k):
+        """Return whether an item has been observed since the last reset.
+
+        Untracked items are looked up in the sketch, hence an item never
+        observed may be reported as observed because of hash collisions.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item
+
+        Returns
+        -------
+        observed : bool
+            *True* if the item has (probably) been observed
+        """
+        return k in self._tracked or self._sketch.estimate(k) > 0
+
+    def frequency(self, k):
+        """Return the estimated frequency of an item
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item
+
+        Returns
+        -------
+        frequency : int
+            The estimated frequency
+        """
+        entry = self._tracked.get(k)
+        return entry[0] if entry is not None else self._sketch.estimate(k)
+
+    def put(self, k, weight):
+        """Record an occurrence of an item.
+
+        Parameters
+        ----------
+        k : any hashable type
+            The item
+        weight : int
+            The weight of the item
+
+        Returns
+        -------
+        evicted : any hashable type
+            The item that stopped being tracked or *None* if no items did
+        """
+        estimate = self._sketch.add(k, weight)
+        entry = self._tracked.get(k)
+        if entry is not None:
+            self._push(k, estimate, entry[1] + weight)
+            return None
+        if len(self._tracked) < self._capacity:
+            self._push(k, estimate, weight)
+            return None
+        lowest = self._lowest()
+        if estimate <= lowest[0]:
+            self._floor = max(self._floor, estimate)
+            return None
+        heapq.heappop(self._heap)
+        del self._tracked[lowest[3]]
+        self._floor = max(self._floor, lowest[0])
+        self._push(k, estimate, weight)
+        return lowest[3]
+
+    def _push(self, k, estimate, occurrences):
+        """Track an item with a new entry, making its previous one stale"""
+        self._seq += 1
+        entry = [estimate, occurrences, self._seq, k]
+        self._tracked[k] = entry
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * self._capacity + 16:
+            # drop stale entries
+            self._heap = list(self._tracked.values())
+            heapq.heapify(self._heap)
+
+    def _lowest(self):
+        """Return the entry of the tracked item with the lowest estimate"""
+        heap = self._heap
+        while self._tracked.get(heap[0][3]) is not heap[0]:
+            heapq.heappop(heap)
+        return heap[0]
+
+    def _ranked(self):
+        """Return the entries of all tracked items from the most to the least
+        frequent one"""
+        return sorted(self._tracked.values(), key=lambda e: (-e[0], -e[1], e[2]))
+
+    def dump(self):
+        """Return the tracked items from the most to the least frequent one
+
+        Returns
+        -------
+        dump : list
+            The tracked items
+        """
+        return [e[3] for e in self._ranked()]
+
+    def top(self, n):
+        """Return the n most frequent tracked items
+
+        Parameters
+        ----------
+        n : int
+            The number of items
+
+        Returns
+        -------
+        top : list
+            The items, from the most to the least frequent one
+        """
+        return [e[3] for e in self._ranked()[:n]]
+
+    def guaranteed_top_k(self, k, return_frequencies=False):
+        """Return the ranks of the tracked items which are guaranteed to be
+        among the top-k items, i.e. whose number of occurrences since tracked
+        is at least as high as the estimated frequency of the k+1th item.
+
+        Parameters
+        ----------
+        k : int
+            The number of considered items
+        return_frequencies : bool, optional
+            If *True*, also return the sum of the estimated frequencies and the
+            sum of the guaranteed frequencies of the guaranteed items
+
+        Returns
+        -------
+        guaranteed_indices : list
+            The ranks of the guaranteed items in the list returned by *dump*
+        """
+        ranked = self._ranked()
+        max_frequency = self._floor
+        if k < len(ranked):
+            max_frequency = max(max_frequency, ranked[k][0])
+        guaranteed_indices = []
+        total_top_k_frequency = 0
+        total_top_k_occurrences = 0
+        for i, entry in enumerate(ranked[:k]):
+            if entry[1] >= max_frequency:
+                guaranteed_indices.append(i)
+                total_top_k_frequency += entry[0]
+                total_top_k_occurrences += entry[1]
+        if return_frequencies:
+            return guaranteed_indices, total_top_k_frequency, total_top_k_occurrences
+        return guaranteed_indices
+
+    def clear(self):
+        """Forget all occurrences"""
+        self._sketch.clear()
+        self._tracked.clear()
+        self._heap = []
+        self._floor = 0
+
+    def print_buckets(self):
+        for entry in self._ranked():
+            print("%d: %s (%d)" % (entry[0], str(entry[3]), entry[1]))
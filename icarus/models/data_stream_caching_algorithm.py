@@ -1,8 +1,11 @@
 
-from icarus.models import Cache, LruCache, SpaceSavingCache, NullCache, WeightedStreamSummary, LinkedSet
+from icarus.models import Cache, LruCache, SpaceSavingCache, SlidingWindowSpaceSavingCache, NullCache, \
+    make_linked_set
+from icarus.models.count_min_sketch import CountMinSketchTopK
 from icarus.registry import register_cache_policy
 from icarus.util import inheritdoc
 from copy import deepcopy
+from itertools import islice
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
 
@@ -12,7 +15,38 @@ __all__ = ['DataStreamCachingAlgorithmCache',
            'DataStreamCachingAlgorithmWithFixedSplitsCache',
            'AdaptiveDataStreamCachingAlgorithmWithStaticTopKCache',
            'AdaptiveDataStreamCachingAlgorithmWithAdaptiveTopKCache',
-           'DataStreamCachingAlgorithmWithAdaptiveWindowSizeCache']
+           'DataStreamCachingAlgorithmWithAdaptiveWindowSizeCache',
+           'make_frequency_estimator']
+
+
+def make_frequency_estimator(impl, maxlen, monitored, sketch_width=1.0, sketch_depth=4):
+    """Create the frequency estimator ranking the items observed in a window by a policy of the DSCA family.
+
+    Parameters
+    ----------
+    impl : str
+        The implementation: *SS* for the exact Stream-Summary table of Space Saving monitoring *monitored* items or
+        *CMS* for a Count-Min Sketch tracking the *maxlen* + 1 most frequent items, whose memory footprint is a small
+        fraction of that of the Stream-Summary table
+    maxlen : int
+        The size of the cache
+    monitored : int
+        The number of monitored items
+    sketch_width : float, optional
+        The number of counters of each row of the Count-Min Sketch, relative to *monitored*
+    sketch_depth : int, optional
+        The number of rows of the Count-Min Sketch
+
+    Returns
+    -------
+    estimator : SpaceSavingCache or CountMinSketchTopK
+        The frequency estimator
+    """
+    if impl == 'SS':
+        return SpaceSavingCache(monitored, monitored)
+    elif impl == 'CMS':
+        return CountMinSketchTopK(maxlen + 1, max(1, int(sketch_width * monitored)), sketch_depth)
+    raise ValueError('Unknown frequency estimator %s' % str(impl))
 
 
 @register_cache_policy('DSCA')
@@ -28,10 +62,16 @@ class DataStreamCachingAlgorithmCache(Cache):
     filled with elements as determined by LRU. Initially k is 0, but after the first window of N the top-k guarantee
     can be determined. The top-k elements from a window i will remain in the cache throughout window i+1. In the
     meanwhile, LRU only considers elements that are not among the top-k anyway to avoid redundancy.
+
+    The occurrences of each window are counted by Space Saving by default. Setting *frequency_estimator* to *CMS*
+    counts them with a Count-Min Sketch instead, see *make_frequency_estimator*, which bounds the memory needed at
+    the cost of guaranteeing fewer top-k elements. All policies of the DSCA family with jumping windows accept the
+    same parameters.
     """
 
     @inheritdoc(Cache)
-    def __init__(self, maxlen, monitored=2.0, window_size=4.0, **kwargs):
+    def __init__(self, maxlen, monitored=2.0, window_size=4.0, frequency_estimator='SS', sketch_width=1.0,
+                 sketch_depth=4, **kwargs):
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
@@ -41,8 +81,10 @@ class DataStreamCachingAlgorithmCache(Cache):
 
         # initially only LRU
         self._lru_cache = LruCache(self._maxlen)
-        self._ss_cache = SpaceSavingCache(self._monitored, self._monitored)
+        self._ss_cache = make_frequency_estimator(frequency_estimator, self._maxlen, self._monitored,
+                                                  sketch_width, sketch_depth)
         self._guaranteed_top_k = []  # from previous window
+        self._guaranteed_top_k_set = set()  # members of _guaranteed_top_k for constant time lookups
 
         # to keep track of the windows, there is a counter and the (fixed) size of each window
         self._window_size = int(window_size * self._monitored)
@@ -61,7 +103,7 @@ class DataStreamCachingAlgorithmCache(Cache):
 
     @inheritdoc(Cache)
     def dump(self):
-        whole_cache = deepcopy(self._guaranteed_top_k)
+        whole_cache = list(self._guaranteed_top_k)
         whole_cache.extend(self._lru_cache.dump())
         return whole_cache
 
@@ -88,19 +130,20 @@ class DataStreamCachingAlgorithmCache(Cache):
         position : int
             The current position of the item in the cache
         """
-        dump = self.dump()
-        if k not in dump:
+        if k in self._guaranteed_top_k_set:
+            return self._guaranteed_top_k.index(k)
+        if not self._lru_cache.has(k):
             raise ValueError('The item %s is not in the cache' % str(k))
-        return dump.index(k)
+        return len(self._guaranteed_top_k) + self._lru_cache.position(k)
 
     @inheritdoc(Cache)
     def has(self, k):
-        return k in self.dump()
+        return k in self._guaranteed_top_k_set or self._lru_cache.has(k)
 
     @inheritdoc(Cache)
     def get(self, k, weight):
         # check in both LRU and top-k list
-        top_k_hit = k in self._guaranteed_top_k
+        top_k_hit = k in self._guaranteed_top_k_set
         lru_hit = False
         if not top_k_hit:
             lru_hit = self._lru_cache.get(k, weight)
@@ -134,7 +177,7 @@ class DataStreamCachingAlgorithmCache(Cache):
             The evicted object or *None* if no contents were evicted.
         """
         self._ss_cache.put(k, weight)
-        if not(k in self._guaranteed_top_k):
+        if k not in self._guaranteed_top_k_set:
             if not self._lru_cache.get(k, weight):
                 evicted = self._lru_cache.put(k, weight)
                 # counter is only increased if there is no cache hit
@@ -154,8 +197,9 @@ class DataStreamCachingAlgorithmCache(Cache):
 
     @inheritdoc(Cache)
     def remove(self, k):
-        if k in self._guaranteed_top_k:
+        if k in self._guaranteed_top_k_set:
             self._guaranteed_top_k.remove(k)
+            self._guaranteed_top_k_set.remove(k)
             return True
         else:
             return self._lru_cache.remove(k)
@@ -164,6 +208,33 @@ class DataStreamCachingAlgorithmCache(Cache):
     def clear(self):
         self._lru_cache.clear()
         self._guaranteed_top_k = []
+        self._guaranteed_top_k_set.clear()
+
+    def _update_guaranteed_top_k(self, top_k):
+        """Replace the guaranteed top-k elements with the ones of the window that just ended.
+
+        The membership set is updated in place and only the elements entering the top-k are removed from the LRU
+        cache, since elements that already were guaranteed are never in the LRU cache.
+
+        Parameters
+        ----------
+        top_k : list
+            The new guaranteed top-k elements
+
+        Returns
+        -------
+        expired : list
+            The former top-k elements that are no longer guaranteed, in their previous order
+        """
+        new_members = set(top_k)
+        expired = [element for element in self._guaranteed_top_k if element not in new_members]
+        for element in top_k:
+            if element not in self._guaranteed_top_k_set:
+                self._lru_cache.remove(element)
+        self._guaranteed_top_k_set.difference_update(expired)
+        self._guaranteed_top_k_set.update(top_k)
+        self._guaranteed_top_k = top_k
+        return expired
 
     def _end_of_window_operation(self):
         """ At the end of every window the top k from the space saving cache are put into the _guaranteed_top_k list.
@@ -171,41 +242,39 @@ class DataStreamCachingAlgorithmCache(Cache):
         The elements in the LRU cache carry over from one period to the next.
         """
         self._window_counter = 0
-        whole_dump = self._ss_cache.dump()
-
-        new_guaranteed_indices = self._ss_cache.guaranteed_top_k(min(self._maxlen, len(whole_dump) - 1))
-        new_k = new_guaranteed_indices.__len__()
-        if new_k > self._maxlen:
-            new_k = self._maxlen
-        prev_k = len(self._guaranteed_top_k)
-        prev_top_k = self._guaranteed_top_k
-        self._guaranteed_top_k = [whole_dump[i] for i in new_guaranteed_indices]
-        self._ss_cache = SpaceSavingCache(self._monitored, self._monitored)
-        lru_cache_size = self._maxlen - new_k
-
-        for still_existing_element in set(self._guaranteed_top_k) & set(prev_top_k):
-            prev_top_k.remove(still_existing_element)
+        # the estimator keeps its items sorted, so only the candidates for the top-k are read
+        top = self._ss_cache.top(min(self._maxlen, len(self._ss_cache) - 1))
+        new_guaranteed_indices = self._ss_cache.guaranteed_top_k(len(top))
+        prev_top_k = self._update_guaranteed_top_k([top[i] for i in new_guaranteed_indices])
+        self._ss_cache.clear()
+        self._resize_lru(self._maxlen - len(self._guaranteed_top_k), prev_top_k)
 
-        for element in self._guaranteed_top_k:
-            self._lru_cache.remove(element)
+    def _resize_lru(self, lru_cache_size, prev_top_k):
+        """Resize the LRU cache to the space left by the guaranteed top-k elements and, if there is still space, fill
+        it with the former top-k elements that are no longer guaranteed.
 
-        if new_k == prev_k:
-            pass  # continue with current LRU cache
-        else:
-            lru_elements = self._lru_cache.dump()[:lru_cache_size]
-            lru_elements.reverse()
-            if new_k == self._maxlen:
-                self._lru_cache = NullCache()  # empty LRU cache
-            else:
-                self._lru_cache = LruCache(lru_cache_size)
-                for element in lru_elements:
-                    self._lru_cache.put(element, 1)  # weight is irrelevant here
+        The LRU cache is resized in place, evicting its least recently used elements if it shrinks, so the cost only
+        depends on the number of elements entering or leaving it. It is only replaced when no space is left for it,
+        by a NullCache, or when space becomes available again.
 
-        # if there's still space keep some of the otherwise evicted former top-k elements
-        if type(self._lru_cache) is not NullCache:
-            while len(self._lru_cache) < self._lru_cache._maxlen and len(prev_top_k) > 0:
-                self._lru_cache._cache.append_bottom(prev_top_k[0])
-                prev_top_k = prev_top_k[1:]
+        Parameters
+        ----------
+        lru_cache_size : int
+            The new size of the LRU cache
+        prev_top_k : list
+            The former top-k elements that are no longer guaranteed, in their previous order
+        """
+        if lru_cache_size <= 0:
+            if type(self._lru_cache) is not NullCache:
+                self._lru_cache = NullCache()  # empty LRU cache
+            return
+        if type(self._lru_cache) is NullCache:
+            self._lru_cache = LruCache(lru_cache_size)
+        elif self._lru_cache.maxlen != lru_cache_size:
+            self._lru_cache.resize(lru_cache_size)
+        lru_elements = self._lru_cache._cache
+        for element in islice(prev_top_k, lru_cache_size - len(lru_elements)):
+            lru_elements.append_bottom(element)
 
 
 @register_cache_policy('2DSCA')
@@ -235,7 +304,7 @@ class DataStreamCachingAlgorithmCache(DataStreamCachingAlgorithmCache):
         evicted = None
 
         self._ss_cache.put(k, weight)
-        if not(k in self._guaranteed_top_k):
+        if k not in self._guaranteed_top_k_set:
             if not self._lru_cache.get(k, weight):
                 # if it's in neither top-k nor LRU, check whether it's in the Space Saving table
                 if monitored_before:
@@ -262,10 +331,16 @@ class DataStreamCachingAlgorithmWithSlidingWindowCache(DataStreamCachingAlgorith
     """Based on DSCA, DSCASW considers multiple subwindows that make up the whole window. Whenever a subwindow is full,
     the oldest subwindow expires and is removed. This process eliminates the purely jumping window from DSCA in favor
     of a sliding (or partially jumping) window.
+
+    The occurrences of the whole window are counted by a SlidingWindowSpaceSavingCache, which subtracts the
+    occurrences of the expired subwindow from the elements that occurred in it, so that the cost of a subwindow
+    transition does not grow with the number of subwindows or of monitored elements.
     """
 
     @inheritdoc(DataStreamCachingAlgorithmCache)
-    def __init__(self, maxlen, monitored=2.0, subwindow_size=1.0, subwindows=2, **kwargs):
+    def __init__(self, maxlen, monitored=2.0, subwindow_size=1.0, subwindows=2, frequency_estimator='SS', **kwargs):
+        if frequency_estimator != 'SS':
+            raise ValueError('DSCASW only supports the SS frequency estimator')
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
@@ -281,10 +356,10 @@ class DataStreamCachingAlgorithmWithSlidingWindowCache(DataStreamCachingAlgorith
         if self._subwindows < 2:
             raise ValueError('Number of subwindows is less than 2, but it has to be at least 2.')
 
-        # the cache at 0 is the cache for the previous subwindow, the cache at len-1 is the one that will expire next
-        self._window_caches = []
-        self._ss_cache = SpaceSavingCache(self._monitored, monitored=self._monitored)
+        self._ss_cache = SlidingWindowSpaceSavingCache(self._monitored, monitored=self._monitored,
+                                                       subwindows=self._subwindows)
         self._guaranteed_top_k = []  # from previous window
+        self._guaranteed_top_k_set = set()
 
         # to keep track of the windows, there is a counter and the (fixed) size of each window
         self._window_counter = 0
@@ -301,12 +376,6 @@ class DataStreamCachingAlgorithmWithSlidingWindowCache(DataStreamCachingAlgorith
     def maxlen(self):
         return self._maxlen
 
-    @inheritdoc(DataStreamCachingAlgorithmCache)
-    def dump(self):
-        whole_cache = deepcopy(self._guaranteed_top_k)
-        whole_cache.extend(self._lru_cache.dump())
-        return whole_cache
-
     def print_caches(self):
         print('LRU:' + self._lru_cache.dump())
         print('top-k:' + self._guaranteed_top_k)
@@ -314,21 +383,10 @@ class DataStreamCachingAlgorithmWithSlidingWindowCache(DataStreamCachingAlgorith
         print('Cumulative SS-Cache:')
         self._ss_cache.print_buckets()
 
-    @inheritdoc(DataStreamCachingAlgorithmCache)
-    def position(self, k):
-        dump = self.dump()
-        if k not in dump:
-            raise ValueError('The item %s is not in the cache' % str(k))
-        return dump.index(k)
-
-    @inheritdoc(DataStreamCachingAlgorithmCache)
-    def has(self, k):
-        return k in self.dump()
-
     @inheritdoc(DataStreamCachingAlgorithmCache)
     def get(self, k, weight):
         # check in both LRU and top-k list
-        top_k_hit = k in self._guaranteed_top_k
+        top_k_hit = k in self._guaranteed_top_k_set
         lru_hit = False
         if not top_k_hit:
             lru_hit = self._lru_cache.get(k, weight)
@@ -345,7 +403,7 @@ class DataStreamCachingAlgorithmWithSlidingWindowCache(DataStreamCachingAlgorith
     @inheritdoc(DataStreamCachingAlgorithmCache)
     def put(self, k, weight):
         self._ss_cache.put(k, weight)
-        if not(k in self._guaranteed_top_k):
+        if k not in self._guaranteed_top_k_set:
             if not self._lru_cache.get(k, weight):
                 evicted = self._lru_cache.put(k, weight)
                 # counter is only increased if there is no cache hit
@@ -363,107 +421,18 @@ class DataStreamCachingAlgorithmWithSlidingWindowCache(DataStreamCachingAlgorith
             # element is in top-k, cache hit
             return None
 
-    @inheritdoc(Cache)
-    def remove(self, k):
-        if k in self._guaranteed_top_k:
-            self._guaranteed_top_k.remove(k)
-            return True
-        else:
-            return self._lru_cache.remove(k)
-
-    @inheritdoc(Cache)
-    def clear(self):
-        self._lru_cache.clear()
-        self._guaranteed_top_k = []
-
     def _end_of_window_operation(self):
-        """ At the end of every subwindow the top k from the space saving cache are put into the _guaranteed_top_k list.
-        The Space Saving Cache is not re-initialized but instead the expired window will be subtracted.
+        """ At the end of every subwindow the top k from the space saving cache of the whole window are put into the
+        _guaranteed_top_k list. The Space Saving Cache is not re-initialized but instead the oldest subwindow expires.
         The rest of the actual cache is then from the LRU cache. The elements in the LRU cache carry over from
         one period to the next.
         """
         self._window_counter = 0
-
-        self._window_caches.insert(0, self._ss_cache.get_stream_summary().convert_to_dictionary())
-        if len(self._window_caches) >= self._subwindows:
-            self._remove_last_window()
-
-        whole_dump = self._ss_cache.dump()
-
-        new_guaranteed_indices = self._ss_cache.guaranteed_top_k(min(self._maxlen, len(whole_dump) - 1))
-        new_k = new_guaranteed_indices.__len__()
-        if new_k > self._maxlen:
-            new_k = self._maxlen
-        prev_k = len(self._guaranteed_top_k)
-        prev_top_k = self._guaranteed_top_k
-        self._guaranteed_top_k = [whole_dump[i] for i in new_guaranteed_indices]
-        lru_cache_size = self._maxlen - new_k
-
-        for still_existing_element in set(self._guaranteed_top_k) & set(prev_top_k):
-            prev_top_k.remove(still_existing_element)
-
-        for element in self._guaranteed_top_k:
-            self._lru_cache.remove(element)
-
-        if new_k == prev_k:
-            pass  # continue with current LRU cache
-        else:
-            lru_elements = self._lru_cache.dump()[:lru_cache_size]
-            lru_elements.reverse()
-            if new_k == self._maxlen:
-                self._lru_cache = NullCache()  # empty LRU cache
-            else:
-                self._lru_cache = LruCache(lru_cache_size)
-                for element in lru_elements:
-                    self._lru_cache.put(element, 1)  # weight is irrelevant here
-
-        # if there's still space keep some of the otherwise evicted former top-k elements
-        if type(self._lru_cache) is not NullCache:
-            while len(self._lru_cache) < self._lru_cache._maxlen and len(prev_top_k) > 0:
-                self._lru_cache._cache.append_bottom(prev_top_k[0])
-                prev_top_k = prev_top_k[1:]
-
-    def _remove_last_window(self):
-        """ Given the current cumulative Space Saving cache and the Stream Summary data structures from the previous
-        subwindows that have not yet expired the last window records are removed and all the subwindow records have to
-        be updated by subtracting the information from their cumulative data. This will also reset the current Space
-        Saving cache.
-        """
-
-        expired_window_table = self._window_caches[-1]
-        self._window_caches = self._window_caches[:-1]
-
-        self._ss_cache.clear()
-
-        # expire elements that occurred in expired window by reducing their counts
-        for expiring_element_id in expired_window_table:
-            self._expire_entry(expiring_element_id, expired_window_table)
-
-        # put updated Stream Summary data structure into current SS cache
-        new_stream_summary = WeightedStreamSummary(self._monitored, monitored_items=self._monitored)
-
-        for id in self._window_caches[0]:
-            new_stream_summary.safe_insert_node(
-                WeightedStreamSummary.Node(id, self._window_caches[0][id]['max_error'],
-                                           self._window_caches[0][id]['weight']),
-                    self._window_caches[0][id]['frequency'])
-
-        self._ss_cache._cache = new_stream_summary
-
-
-    def _expire_entry(self, expiring_element_id, expired_window_table):
-        for i in range(len(self._window_caches) - 1, -1):
-            if expiring_element_id not in self._window_caches[i]:
-                # element was evicted in this subwindow
-                break
-            elif self._window_caches[i][expiring_element_id]['max_error'] > expired_window_table[expiring_element_id]['max_error']:
-                # error has increased, so element was evicted in this subwindow and occurred again
-                break
-            else:
-                # element is still in the table and has not been evicted
-                self._window_caches[i][expiring_element_id]['frequency'] -= expired_window_table[expiring_element_id]['frequency']
-                self._window_caches[i][expiring_element_id]['max_error'] -= expired_window_table[expiring_element_id]['max_error']
-
+        top = self._ss_cache.top(min(self._maxlen, len(self._ss_cache) - 1))
+        new_guaranteed_indices = self._ss_cache.guaranteed_top_k(len(top))
+        prev_top_k = self._update_guaranteed_top_k([top[i] for i in new_guaranteed_indices])
+        self._ss_cache.slide()
+        self._resize_lru(self._maxlen - len(self._guaranteed_top_k), prev_top_k)
 
 
 @register_cache_policy('DSCAFS')
@@ -475,7 +444,8 @@ class DataStreamCachingAlgorithmWithFixedSplitsCache(Cache):
     """
 
     @inheritdoc(Cache)
-    def __init__(self, maxlen, lru_portion = 0.5, monitored=2.0, window_size=4.0, **kwargs):
+    def __init__(self, maxlen, lru_portion = 0.5, monitored=2.0, window_size=4.0, frequency_estimator='SS',
+                 sketch_width=1.0, sketch_depth=4, **kwargs):
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
@@ -487,8 +457,10 @@ class DataStreamCachingAlgorithmWithFixedSplitsCache(Cache):
             raise ValueError('The portion of the LRU cache is not valid. It needs to be between 0 and 1.')
 
         self._lru_cache = LruCache(int(lru_portion * self._maxlen))
-        self._ss_cache = SpaceSavingCache(self._monitored, self._monitored)
+        self._ss_cache = make_frequency_estimator(frequency_estimator, self._maxlen, self._monitored,
+                                                  sketch_width, sketch_depth)
         self._top_k = [] # from previous window
+        self._top_k_set = set()  # members of _top_k for constant time lookups
         self._k = self.maxlen - self._lru_cache.maxlen
 
         # to keep track of the windows, there is a counter and the (fixed) size of each window
@@ -508,7 +480,7 @@ class DataStreamCachingAlgorithmWithFixedSplitsCache(Cache):
 
     @inheritdoc(Cache)
     def dump(self):
-        whole_cache = deepcopy(self._top_k)
+        whole_cache = list(self._top_k)
         whole_cache.extend(self._lru_cache.dump())
         return whole_cache
 
@@ -535,19 +507,20 @@ class DataStreamCachingAlgorithmWithFixedSplitsCache(Cache):
         position : int
             The current position of the item in the cache
         """
-        dump = self.dump()
-        if k not in dump:
+        if k in self._top_k_set:
+            return self._top_k.index(k)
+        if not self._lru_cache.has(k):
             raise ValueError('The item %s is not in the cache' % str(k))
-        return dump.index(k)
+        return len(self._top_k) + self._lru_cache.position(k)
 
     @inheritdoc(Cache)
     def has(self, k):
-        return k in self.dump()
+        return k in self._top_k_set or self._lru_cache.has(k)
 
     @inheritdoc(Cache)
     def get(self, k, weight):
         # check in both LRU and top-k list
-        top_k_hit = k in self._top_k
+        top_k_hit = k in self._top_k_set
         lru_hit = False
         if not top_k_hit:
             lru_hit = self._lru_cache.get(k, weight)
@@ -579,7 +552,7 @@ class DataStreamCachingAlgorithmWithFixedSplitsCache(Cache):
             The evicted object or *None* if no contents were evicted.
         """
         self._ss_cache.put(k, weight)
-        if not(k in self._top_k):
+        if k not in self._top_k_set:
             if not self._lru_cache.get(k, weight):
                 evicted = self._lru_cache.put(k, weight)
                 # counter is only increased if there is no cache hit
@@ -599,8 +572,9 @@ class DataStreamCachingAlgorithmWithFixedSplitsCache(Cache):
 
     @inheritdoc(Cache)
     def remove(self, k):
-        if k in self._top_k:
+        if k in self._top_k_set:
             self._top_k.remove(k)
+            self._top_k_set.remove(k)
             return True
         else:
             return self._lru_cache.remove(k)
@@ -609,6 +583,7 @@ class DataStreamCachingAlgorithmWithFixedSplitsCache(Cache):
     def clear(self):
         self._lru_cache.clear()
         self._top_k = []
+        self._top_k_set.clear()
 
     def _end_of_window_operation(self):
         """ At the end of every window the top k from the space saving cache are put into the _top_k list.
@@ -616,24 +591,23 @@ class DataStreamCachingAlgorithmWithFixedSplitsCache(Cache):
         The elements in the LRU cache carry over from one period to the next.
         """
         self._window_counter = 0
-        whole_dump = self._ss_cache.dump()
-        prev_top_k = self._top_k
-        self._top_k = whole_dump[:self._k]
+        top_k = self._ss_cache.top(self._k)
+        new_members = set(top_k)
+        prev_top_k = [element for element in self._top_k if element not in new_members]
 
-        for still_existing_element in set(self._top_k) & set(prev_top_k):
-            prev_top_k.remove(still_existing_element)
-
-        self._ss_cache = SpaceSavingCache(self._monitored, self._monitored)
+        self._ss_cache.clear()
 
-        for element in self._top_k:
-            self._lru_cache.remove(element)
+        # only elements entering the top-k can be in the LRU cache
+        for element in top_k:
+            if element not in self._top_k_set:
+                self._lru_cache.remove(element)
+        self._top_k_set.difference_update(prev_top_k)
+        self._top_k_set.update(top_k)
+        self._top_k = top_k
 
         # append former top-k elements in case LRU cache is not full
-        lru_size = len(self._lru_cache)
-        while lru_size < self._lru_cache._maxlen and len(prev_top_k) > 0:
-            self._lru_cache._cache.append_bottom(prev_top_k[0])
-            lru_size += 1
-            prev_top_k = prev_top_k[1:]
+        for element in islice(prev_top_k, self._lru_cache.maxlen - len(self._lru_cache)):
+            self._lru_cache._cache.append_bottom(element)
 
 @register_cache_policy('ADSCASTK')
 class AdaptiveDataStreamCachingAlgorithmWithStaticTopKCache(Cache):
@@ -642,7 +616,8 @@ class AdaptiveDataStreamCachingAlgorithmWithStaticTopKCache(Cache):
     """
 
     @inheritdoc(Cache)
-    def __init__(self, maxlen, monitored=2.0, window_size=4.0, **kwargs):
+    def __init__(self, maxlen, monitored=2.0, window_size=4.0, linked_set='LINKED', frequency_estimator='SS',
+                 sketch_width=1.0, sketch_depth=4, **kwargs):
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
@@ -652,9 +627,10 @@ class AdaptiveDataStreamCachingAlgorithmWithStaticTopKCache(Cache):
 
         # Initially there is only the recency cache
         self._recency_cache_top_length = 0
-        self._recency_cache_top = LinkedSet()  # ARC paper: T_1
-        self._recency_cache_bottom = LinkedSet()  # ARC paper: B_1
-        self._ss_cache = SpaceSavingCache(self._monitored, self._monitored)
+        self._recency_cache_top = make_linked_set(linked_set, self._maxlen + 1)  # ARC paper: T_1
+        self._recency_cache_bottom = make_linked_set(linked_set, self._maxlen + 1)  # ARC paper: B_1
+        self._ss_cache = make_frequency_estimator(frequency_estimator, self._maxlen, self._monitored,
+                                                  sketch_width, sketch_depth)
         self._top_k_cached_length = 0
         self._top_k = []  # from previous window
 
@@ -838,11 +814,9 @@ class AdaptiveDataStreamCachingAlgorithmWithStaticTopKCache(Cache):
         are also in the _top_k list.
         """
         self._window_counter = 0
-        whole_dump = self._ss_cache.dump()
-
         prev_top_k = self._top_k
-        self._top_k = whole_dump[:self.maxlen]
-        self._ss_cache = SpaceSavingCache(self._monitored, self._monitored)
+        self._top_k = self._ss_cache.top(self.maxlen)
+        self._ss_cache.clear()
 
         for still_existing_element in set(self._top_k) & set(prev_top_k):
             prev_top_k.remove(still_existing_element)
@@ -871,9 +845,9 @@ class AdaptiveDataStreamCachingAlgorithmWithStaticTopKCache(Cache):
             self._recency_cache_top_length += 1
 
         # if there's still space add elements that were "evicted" from top-k
-        while self._recency_cache_top_length + self._top_k_cached_length < self.maxlen and len(prev_top_k) > 0:
-            self._recency_cache_top.append_bottom(prev_top_k[0])
-            prev_top_k = prev_top_k[1:]
+        free = max(0, self.maxlen - self._recency_cache_top_length - self._top_k_cached_length)
+        for element in islice(prev_top_k, free):
+            self._recency_cache_top.append_bottom(element)
             self._recency_cache_top_length += 1
 
 
@@ -886,7 +860,8 @@ class AdaptiveDataStreamCachingAlgorithmWithAdaptiveTopKCache(Cache):
     """
 
     @inheritdoc(Cache)
-    def __init__(self, maxlen, monitored=2.0, window_size=4.0, **kwargs):
+    def __init__(self, maxlen, monitored=2.0, window_size=4.0, linked_set='LINKED', frequency_estimator='SS',
+                 sketch_width=1.0, sketch_depth=4, **kwargs):
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
@@ -896,12 +871,13 @@ class AdaptiveDataStreamCachingAlgorithmWithAdaptiveTopKCache(Cache):
 
         # Initially there is only the recency cache
         self._recency_cache_top_length = 0
-        self._recency_cache_top = LinkedSet()  # ARC paper: T_1
-        self._recency_cache_bottom = LinkedSet()  # ARC paper: B_1
-        self._ss_cache = SpaceSavingCache(self._monitored, self._monitored)
+        self._recency_cache_top = make_linked_set(linked_set, self._maxlen + 1)  # ARC paper: T_1
+        self._recency_cache_bottom = make_linked_set(linked_set, self._maxlen + 1)  # ARC paper: B_1
+        self._ss_cache = make_frequency_estimator(frequency_estimator, self._maxlen, self._monitored,
+                                                  sketch_width, sketch_depth)
         self._top_k_cached_length = 0
-        self._top_k_cached = LinkedSet()
-        self._top_k_uncached = LinkedSet()
+        self._top_k_cached = make_linked_set(linked_set, self._maxlen + 1)
+        self._top_k_uncached = make_linked_set(linked_set, self._maxlen + 1)
 
         # to keep track of the windows, there is a counter and the (fixed) size of each window
         self._window_size = int(window_size * self._monitored)
@@ -1089,18 +1065,16 @@ class AdaptiveDataStreamCachingAlgorithmWithAdaptiveTopKCache(Cache):
         are also in the _top_k list.
         """
         self._window_counter = 0
-        whole_dump = self._ss_cache.dump()
-
         prev_top_k = list(iter(self._top_k_cached))
         prev_top_k.extend(list(iter(self._top_k_uncached)))
         self._top_k_cached.clear()
         self._top_k_uncached.clear()
         self._top_k_cached_length = 0
 
-        new_top_k = whole_dump[:self.maxlen]
+        new_top_k = self._ss_cache.top(self.maxlen)
         for still_existing_element in set(new_top_k) & set(prev_top_k):
             prev_top_k.remove(still_existing_element)
-        self._ss_cache = SpaceSavingCache(self._monitored, self._monitored)
+        self._ss_cache.clear()
 
         # set up whole cache to be LRU cache before removing the top-k elements from the LRU cache
         for _ in self._recency_cache_bottom:
@@ -1131,9 +1105,9 @@ class AdaptiveDataStreamCachingAlgorithmWithAdaptiveTopKCache(Cache):
             self._recency_cache_top_length += 1
 
         # if there's still space add elements that were "evicted" from top-k
-        while self._recency_cache_top_length + self._top_k_cached_length < self.maxlen and len(prev_top_k) > 0:
-            self._recency_cache_top.append_bottom(prev_top_k[0])
-            prev_top_k = prev_top_k[1:]
+        free = max(0, self.maxlen - self._recency_cache_top_length - self._top_k_cached_length)
+        for element in islice(prev_top_k, free):
+            self._recency_cache_top.append_bottom(element)
             self._recency_cache_top_length += 1
 
 
@@ -1148,7 +1122,8 @@ class DataStreamCachingAlgorithmWithAdaptiveWindowSizeCache(DataStreamCachingAlg
 
     @inheritdoc(DataStreamCachingAlgorithmCache)
     def __init__(self, maxlen, monitored=2.0, hypothesis_check_period=1, hypothesis_check_A=0.33,
-                 hypothesis_check_epsilon=0.005, **kwargs):
+                 hypothesis_check_epsilon=0.005, frequency_estimator='SS', sketch_width=1.0, sketch_depth=4,
+                 **kwargs):
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
@@ -1158,8 +1133,10 @@ class DataStreamCachingAlgorithmWithAdaptiveWindowSizeCache(DataStreamCachingAlg
 
         # initially only LRU
         self._lru_cache = LruCache(self._maxlen)
-        self._ss_cache = SpaceSavingCache(self._monitored, self._monitored)
+        self._ss_cache = make_frequency_estimator(frequency_estimator, self._maxlen, self._monitored,
+                                                  sketch_width, sketch_depth)
         self._guaranteed_top_k = [] # from previous window
+        self._guaranteed_top_k_set = set()
 
         # to keep track of the windows, there is a counter and the (fixed) size of each window
         self._hypothesis_check_period = hypothesis_check_period
@@ -1181,7 +1158,7 @@ class DataStreamCachingAlgorithmWithAdaptiveWindowSizeCache(DataStreamCachingAlg
     @inheritdoc(DataStreamCachingAlgorithmCache)
     def get(self, k, weight):
         # check in both LRU and top-k list
-        top_k_hit = k in self._guaranteed_top_k
+        top_k_hit = k in self._guaranteed_top_k_set
         lru_hit = False
         if not top_k_hit:
             lru_hit = self._lru_cache.get(k, weight)
@@ -1204,7 +1181,7 @@ class DataStreamCachingAlgorithmWithAdaptiveWindowSizeCache(DataStreamCachingAlg
     @inheritdoc(DataStreamCachingAlgorithmCache)
     def put(self, k, weight):
         self._ss_cache.put(k, weight)
-        if not(k in self._guaranteed_top_k):
+        if k not in self._guaranteed_top_k_set:
             if not self._lru_cache.get(k, weight):
                 evicted = self._lru_cache.put(k, weight)
                 # counter is only increased if there is no cache hit
@@ -1276,7 +1253,7 @@ class DataStreamCachingAlgorithmWithAdaptiveWindowSizeCache(DataStreamCachingAlg
         evicted = None
 
         self._ss_cache.put(k, weight)
-        if not(k in self._guaranteed_top_k):
+        if k not in self._guaranteed_top_k_set:
             if not self._lru_cache.get(k, weight):
                 if monitored_before:
                     evicted = self._lru_cache.put(k, weight)
@@ -1310,7 +1287,8 @@ class DataStreamCachingAlgorithmWithFrequencyThresholdCache(DataStreamCachingAlg
 
     @inheritdoc(DataStreamCachingAlgorithmCache)
     def __init__(self, maxlen, monitored=2.0, window_size=4.0, threshold=0.0025, **kwargs):
-        DataStreamCachingAlgorithmCache.__init__(self, maxlen=maxlen, monitored=monitored, window_size=window_size)
+        DataStreamCachingAlgorithmCache.__init__(self, maxlen=maxlen, monitored=monitored, window_size=window_size,
+                                                 **kwargs)
 
         # determine min threshold for LFU consideration
         self.threshold = int(self._window_size * threshold)
@@ -1321,45 +1299,15 @@ class DataStreamCachingAlgorithmWithFrequencyThresholdCache(DataStreamCachingAlg
         The elements in the LRU cache carry over from one period to the next.
         """
         self._window_counter = 0
-        whole_dump = self._ss_cache.dump()
-
-        new_guaranteed_indices = self._ss_cache.guaranteed_top_k(min(self._maxlen, len(whole_dump) - 1))
+        top = self._ss_cache.top(min(self._maxlen, len(self._ss_cache) - 1))
+        new_guaranteed_indices = self._ss_cache.guaranteed_top_k(len(top))
 
         # check which elements satisfy the threshold frequency
         for index in new_guaranteed_indices:
-            if self._ss_cache._cache.id_to_bucket_map[whole_dump[index]] < self.threshold:
+            if self._ss_cache.frequency(top[index]) < self.threshold:
                 new_guaranteed_indices.remove(index)
 
-        new_k = len(new_guaranteed_indices)
-        if new_k > self._maxlen:
-            new_k = self._maxlen
-        prev_k = len(self._guaranteed_top_k)
-        prev_top_k = self._guaranteed_top_k
-        self._guaranteed_top_k = [whole_dump[i] for i in new_guaranteed_indices]
-        self._ss_cache = SpaceSavingCache(self._monitored, self._monitored)
-        lru_cache_size = self._maxlen - new_k
-
-        for still_existing_element in set(self._guaranteed_top_k) & set(prev_top_k):
-            prev_top_k.remove(still_existing_element)
-
-        for element in self._guaranteed_top_k:
-            self._lru_cache.remove(element)
-
-        if new_k == prev_k:
-            pass  # continue with current LRU cache
-        else:
-            lru_elements = self._lru_cache.dump()[:lru_cache_size]
-            lru_elements.reverse()
-            if new_k == self._maxlen:
-                self._lru_cache = NullCache()  # empty LRU cache
-            else:
-                self._lru_cache = LruCache(lru_cache_size)
-                for element in lru_elements:
-                    self._lru_cache.put(element, 1)  # weight is irrelevant here
-
-        # if there's still space keep some of the otherwise evicted former top-k elements
-        if type(self._lru_cache) is not NullCache:
-            while len(self._lru_cache) < self._lru_cache._maxlen and len(prev_top_k) > 0:
-                self._lru_cache._cache.append_bottom(prev_top_k[0])
-                prev_top_k = prev_top_k[1:]
+        prev_top_k = self._update_guaranteed_top_k([top[i] for i in new_guaranteed_indices])
+        self._ss_cache.clear()
+        self._resize_lru(self._maxlen - len(self._guaranteed_top_k), prev_top_k)
 
@@ -25,7 +25,7 @@ class KLruCache(Cache):
     stored in the cache.
     """
 
-    def __init__(self, maxlen, segments=2, cached_segments=1, **kwargs):
+    def __init__(self, maxlen, segments=2, cached_segments=1, linked_set='LINKED', **kwargs):
         """Constructor
 
         Parameters
@@ -36,6 +36,8 @@ class KLruCache(Cache):
             The number of segments
         cached_segments : int
             The number of segments which are actually cached
+        linked_set : str, optional
+            The implementation of the segments, either *LINKED* or *ARRAY*
         """
         if maxlen <= 0:
             raise ValueError('maxlen must be positive')
@@ -49,7 +51,8 @@ class KLruCache(Cache):
         if self._cached_segments > segments:
             raise ValueError('Number of cached segments can not be larger than total number of segments')
 
-        self._cache = SegmentedLruCache(maxlen=segments * self._segment_len, segments=segments)
+        self._cache = SegmentedLruCache(maxlen=segments * self._segment_len, segments=segments,
+                                        linked_set=linked_set)
 
     @inheritdoc(Cache)
     def __len__(self):
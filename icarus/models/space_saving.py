@@ -1,11 +1,16 @@
 __author__ = 'romanlutz'
 
+import bisect
+from collections.abc import Mapping
+from copy import deepcopy
+from itertools import islice
+
 from icarus.models import Cache
 from icarus.registry import register_cache_policy
 from icarus.util import inheritdoc
-from copy import deepcopy
 
 __all__ = ['SpaceSavingCache',
+           'SlidingWindowSpaceSavingCache',
            'WeightedStreamSummary']
 
 
@@ -48,7 +53,25 @@ class SpaceSavingCache(Cache):
 
     @inheritdoc(Cache)
     def dump(self):
-        return self._dump_all()[:self._maxlen]
+        return list(islice(self._cache.ids(), self._maxlen))
+
+    def top(self, n):
+        """Return the n most frequent monitored elements.
+
+        The Stream-Summary data structure keeps its elements sorted, so this
+        only walks the first n elements instead of dumping all of them.
+
+        Parameters
+        ----------
+        n : int
+            The number of elements
+
+        Returns
+        -------
+        top : list
+            The elements, from the most to the least frequent one
+        """
+        return list(islice(self._cache.ids(), n))
 
     def _dump_all(self):
         """
@@ -56,23 +79,12 @@ class SpaceSavingCache(Cache):
 
         :return: list of all monitored elements at their respective position
         """
-        # since the position function needs the list to be sorted from head to tail, the buckets need to be reversed
-        dumped_list = []
-        buckets = list(self._cache.bucket_map.keys())
-        buckets.sort(reverse=True)
-        for key in buckets:
-            bucket_list = deepcopy(self._cache.bucket_map[key])
-            bucket_list.reverse()
-            dumped_list.extend([node.id for node in bucket_list])
-        return dumped_list
+        return list(self._cache.ids())
 
     def print_buckets(self):
-        buckets = list(self._cache.bucket_map.keys())
-        buckets.sort(reverse=True)
-        for key in buckets:
-            list = deepcopy(self._cache.bucket_map[key])
-            list.reverse()
-            print(("%d: %s" %(key, str([(node.id, node.max_error) for node in list]))))
+        bucket_map = self._cache.bucket_map
+        for key in sorted(bucket_map, reverse=True):
+            print(("%d: %s" %(key, str([(node.id, node.max_error) for node in reversed(bucket_map[key])]))))
 
     def position(self, k):
         """Return the current overall position of an item in the cache. Position *0*
@@ -94,11 +106,11 @@ class SpaceSavingCache(Cache):
         """
         if not self.has(k):
             raise ValueError('The item %s is not in the cache' % str(k))
-        return self._cache.index(k)
+        return self._dump_all().index(k)
 
     @inheritdoc(Cache)
     def has(self, k):
-        return k in self._cache.id_to_bucket_map
+        return k in self._cache
 
     @inheritdoc(Cache)
     def get(self, k, weight):
@@ -145,10 +157,124 @@ class SpaceSavingCache(Cache):
         """
         return self._cache.guaranteed_top_k(k, return_frequencies)
 
+    def frequency(self, k):
+        """Return the estimated number of occurrences of a monitored element
+
+        Parameters
+        ----------
+        k : any hashable type
+            The monitored element
+
+        Returns
+        -------
+        frequency : int
+            The estimated number of occurrences
+        """
+        return self._cache.id_to_bucket_map[k]
+
     def get_stream_summary(self):
         return deepcopy(self._cache)
 
 
+class SlidingWindowSpaceSavingCache(SpaceSavingCache):
+    """Space Saving over a sliding window made of a fixed number of subwindows.
+
+    The occurrences of the monitored elements are counted in a single Stream-Summary data structure covering the
+    whole window. In addition, each monitored element has a ring buffer with the occurrences it gained in each
+    subwindow, including the maximum error it inherited when it started being monitored, and each subwindow keeps
+    the set of elements whose occurrences changed in it. When a subwindow expires, only these elements are updated,
+    by subtracting their occurrences in the expired subwindow. Elements left without occurrences stop being
+    monitored and the maximum error of an element expires with the subwindow it was inherited in, since all
+    occurrences it accounts for are older.
+
+    Expiring a subwindow therefore costs time proportional to the number of elements that occurred in it rather
+    than to the number of monitored elements or of subwindows.
+    """
+
+    @inheritdoc(SpaceSavingCache)
+    def __init__(self, maxlen, monitored=2.0, subwindows=2, **kwargs):
+        super(SlidingWindowSpaceSavingCache, self).__init__(maxlen, monitored)
+        self._subwindows = int(subwindows)
+        if self._subwindows <= 0:
+            raise ValueError('subwindows must be positive')
+        self._subwindow = 0             # slot of the current subwindow in the ring buffers
+        self._occurrences = {}          # element -> ring buffer of its occurrences in each subwindow
+        self._error_subwindows = {}     # element -> slot of the subwindow its max error was inherited in
+        self._changed = [set() for _ in range(self._subwindows)]
+
+    @property
+    def subwindows(self):
+        return self._subwindows
+
+    @inheritdoc(SpaceSavingCache)
+    def get(self, k, weight):
+        if not self.has(k):
+            return False
+        self.put(k, weight)
+        return True
+
+    @inheritdoc(SpaceSavingCache)
+    def put(self, k, weight):
+        occurrences = self._occurrences.get(k)
+        evicted = self._cache.add_occurrence(k, weight)
+        subwindow = self._subwindow
+        if occurrences is None:
+            occurrences = self._occurrences[k] = [0] * self._subwindows
+            added = self._cache.id_to_bucket_map[k]
+            if added > weight:
+                self._error_subwindows[k] = subwindow
+        else:
+            added = weight
+        occurrences[subwindow] += added
+        self._changed[subwindow].add(k)
+        if evicted is not None:
+            del self._occurrences[evicted]
+            self._error_subwindows.pop(evicted, None)
+        return evicted
+
+    @inheritdoc(SpaceSavingCache)
+    def remove(self, k):
+        if not super(SlidingWindowSpaceSavingCache, self).remove(k):
+            return False
+        del self._occurrences[k]
+        self._error_subwindows.pop(k, None)
+        return True
+
+    def slide(self):
+        """End the current subwindow and start a new one.
+
+        The occurrences of the oldest subwindow leave the window if the window is full, i.e. after *subwindows*
+        subwindows.
+        """
+        subwindow = (self._subwindow + 1) % self._subwindows
+        self._subwindow = subwindow
+        changed = self._changed[subwindow]
+        for k in changed:
+            occurrences = self._occurrences.get(k)
+            # the element may have been evicted, and possibly monitored again, since it occurred
+            if occurrences is None or occurrences[subwindow] == 0:
+                continue
+            expired = occurrences[subwindow]
+            occurrences[subwindow] = 0
+            max_error = None
+            if self._error_subwindows.get(k) == subwindow:
+                del self._error_subwindows[k]
+                max_error = 0
+            if self._cache.subtract_occurrences(k, expired, max_error) == 0:
+                del self._occurrences[k]
+                self._error_subwindows.pop(k, None)
+        changed.clear()
+
+    @inheritdoc(SpaceSavingCache)
+    def clear(self):
+        super(SlidingWindowSpaceSavingCache, self).clear()
+        self._subwindow = 0
+        self._occurrences.clear()
+        self._error_subwindows.clear()
+        for changed in self._changed:
+            changed.clear()
+
+
 class WeightedStreamSummary:
     """The StreamSummary data structure was proposed in
 
@@ -164,6 +290,13 @@ class WeightedStreamSummary:
     StreamSummary data structure.
 
     WeightedStreamSummary extends this by allowing items to be weighted, that is their occurrences can count more than once.
+
+    As in the original paper, buckets are kept in a doubly linked list sorted by estimated number of occurrences and all
+    nodes are kept in a doubly linked list sorted from the next node to be evicted to the most frequent node. Within a
+    bucket, nodes are sorted by decreasing maximum error and nodes with the same maximum error by insertion order. Each
+    bucket keeps track of the last node of each maximum error, so that a node is inserted at the right position without
+    scanning the bucket. Incrementing the occurrences of a node and evicting a node are O(1) operations, while weighted
+    increments only need to walk the buckets skipped by the increment.
     """
 
     class Node:
@@ -173,81 +306,138 @@ class WeightedStreamSummary:
         occurrence counter and the ID representing the cached content itself.
         """
 
+        __slots__ = ('id', 'max_error', 'weight', 'count', 'seq', 'prev', 'next', 'bucket')
+
         def __init__(self, id, max_error, weight):
             self.id = id
             self.max_error = max_error
             self.weight = weight
+            self.count = None   # estimated number of occurrences, set on insertion
+            self.seq = 0        # insertion sequence number, orders nodes with equal count and max error
+            self.prev = None    # next node towards the least frequent node
+            self.next = None    # next node towards the most frequent node
+            self.bucket = None
+
+    class Bucket:
+        """Buckets group all nodes with the same estimated number of occurrences. The nodes of a bucket are a
+        contiguous section of the list of all nodes, from *head* to *tail*.
+        """
+
+        __slots__ = ('count', 'head', 'tail', 'prev', 'next', 'run_tails', 'errors')
+
+        def __init__(self, count):
+            self.count = count
+            self.head = None
+            self.tail = None
+            self.prev = None        # bucket with the next lower count
+            self.next = None        # bucket with the next higher count
+            self.run_tails = {}     # max error -> last node of the bucket with that max error
+            self.errors = []        # distinct max errors of the nodes in the bucket, sorted
 
     def __init__(self, size, monitored_items):
-        self.id_to_bucket_map = {}
-        self.bucket_map = {}
+        self._nodes = {}
+        self._buckets = {}
+        self._head = None  # next node to be evicted
+        self._tail = None  # most frequent node
+        self._seq = 0
+        self._last_cached = None
+        self.id_to_bucket_map = _BucketView(self._nodes)
         self.max_size = size  # max cache size
         self.size = 0  # number of currently monitored items
         if monitored_items <= 0:
             raise ValueError('monitored items needs to be a positive number.')
         self.monitored_items = monitored_items
-        self.last_cached_bucket = 1  # bucket of last cached item
-        self.last_cached_index = 0  # index of last cached item in bucket's list
 
-    def add_occurrence(self, id, weight):
-        # node already exists
-        if id in self.id_to_bucket_map:
-            old_bucket = self.id_to_bucket_map[id]
-            node, index = self.index(bucket=old_bucket, id=id)
-            del self.bucket_map[old_bucket][index]
-            if len(self.bucket_map[old_bucket]) == 0:
-                del self.bucket_map[old_bucket]
+    def __contains__(self, id):
+        return id in self._nodes
+
+    def __deepcopy__(self, memo):
+        # Copying node by node avoids recursing through the linked lists
+        stream_summary = WeightedStreamSummary(self.max_size, self.monitored_items)
+        stream_summary.size = self.size
+        stream_summary._seq = self._seq
+        node = self._head
+        while node is not None:
+            node_copy = self.Node(node.id, node.max_error, node.weight)
+            node_copy.seq = node.seq
+            stream_summary._append_node(node_copy, node.count)
+            if node is self._last_cached:
+                stream_summary._last_cached = node_copy
+            node = node.next
+        # keep buckets in order of creation, which is the order used by convert_to_dictionary
+        stream_summary._buckets = {count: stream_summary._buckets[count] for count in self._buckets}
+        memo[id(self)] = stream_summary
+        return stream_summary
 
+    @property
+    def bucket_map(self):
+        """Dictionary mapping each estimated number of occurrences to the list of nodes with that number of
+        occurrences, sorted from the next node to be evicted."""
+        return {bucket.count: list(self._bucket_nodes(bucket)) for bucket in self._buckets.values()}
+
+    @staticmethod
+    def _bucket_nodes(bucket):
+        node = bucket.head
+        while True:
+            yield node
+            if node is bucket.tail:
+                return
+            node = node.next
+
+    @property
+    def last_cached_bucket(self):
+        """Bucket of the last cached item"""
+        last_cached = self._last_cached_node()
+        return last_cached.count if last_cached is not None else 1
+
+    @property
+    def last_cached_index(self):
+        """Index of the last cached item in its bucket's list"""
+        last_cached = self._last_cached_node()
+        if last_cached is None:
+            return 0
+        index = 0
+        node = last_cached.bucket.head
+        while node is not last_cached:
+            node = node.next
+            index += 1
+        return index
+
+    def _last_cached_node(self):
+        # As long as all monitored items can be cached, the last cached item is the next one to be evicted
+        if len(self._nodes) <= self.max_size:
+            return self._head
+        return self._last_cached
+
+    def ids(self):
+        """Return an iterator over the ids of all monitored items, from the most to the least frequent one"""
+        node = self._tail
+        while node is not None:
+            yield node.id
+            node = node.prev
+
+    def add_occurrence(self, id, weight=1):
+        node = self._nodes.get(id)
+        # node already exists
+        if node is not None:
             # one occurrence moves the element up by 'weight' buckets
-            new_bucket = old_bucket + weight
-            self._insert_node_into_bucket(node, new_bucket)
-
-            if self.size > self.max_size:
-                # potentially changes to last_cached pointers
-                if new_bucket == self.last_cached_bucket:
-                    # two cases:
-                    # 1. insertion before last cached item -> shift index by 1
-                    # 2. insertion after last cached item -> shift index by 1
-                    self.last_cached_index += 1
-                elif new_bucket > self.last_cached_bucket:
-                    if old_bucket == self.last_cached_bucket:
-                        # previously last element index is now beyond the end of the list (= length)
-                        if len(self.bucket_map[self.last_cached_bucket]) == self.last_cached_index:
-                            # move last_cached pointers to new_bucket
-                            self.last_cached_bucket = new_bucket
-                            self.last_cached_index = 0
-                        else:
-                            # there could elements after the former position which would mean we have to advance the
-                            # pointer by 1, but since the element itself was removed from the list, all elements after
-                            # it have a larger index automatically so nothing needs to be done!
-                            pass
-                    elif old_bucket < self.last_cached_bucket:
-                        # last cached bucket is in between old and new bucket
-                        if len(self.bucket_map[self.last_cached_bucket]) == self.last_cached_index + 1:
-                            # move last_cached pointers to new_bucket
-                            self.last_cached_bucket = new_bucket
-                            self.last_cached_index = 0
-                        else:
-                            # move the last cached index one further within the bucket
-                            self.last_cached_index += 1
+            new_bucket = node.count + weight
+            start = node.bucket.prev
+            self._remove_node(node)
+            self._insert_node(node, new_bucket, start)
             return None
 
         # new node has to be created for id
         else:
             # check if a node has to be dropped
             if self.size == self.max_size:
-                min_bucket = min(self.bucket_map.keys())
-                evicted_node = self.bucket_map[min_bucket][0]
-                evicted_occurrences = min_bucket / evicted_node.weight
-
-                del self.id_to_bucket_map[evicted_node.id]
-                del self.bucket_map[min_bucket][0]
-                if len(self.bucket_map[min_bucket]) == 0:
-                    del self.bucket_map[min_bucket]
+                evicted_node = self._head
+                evicted_occurrences = evicted_node.count / evicted_node.weight
+                self._remove_node(evicted_node)
 
                 # insert new node at min_bucket+weight with error of (min_bucket/old weight)*new weight
                 node = self.Node(id=id, max_error=evicted_occurrences*weight, weight=weight)
-                self._insert_node_into_bucket(node, (evicted_occurrences+1) * weight)
+                self._insert_node(node, (evicted_occurrences+1) * weight)
 
                 return evicted_node.id
 
@@ -255,22 +445,40 @@ class WeightedStreamSummary:
             else:
                 self.size += 1
                 node = self.Node(id=id, max_error=0, weight=weight)
-                self._insert_node_into_bucket(node=node, bucket=weight)
+                self._insert_node(node, weight)
                 return None
 
-    def _insert_node_into_bucket(self, node, bucket):
-        """ This method is not supposed to be used from outside SpaceSaving. Without appropriate additional calls this
-        will compromise the overall data structure!
-        insert_node_into_bucket simply inserts the node at the correct position within the bucket and updates the
-        bucket_map accordingly.
+    def subtract_occurrences(self, id, count, max_error=None):
+        """Remove occurrences of a monitored item, e.g. when they leave a sliding window. The item stops being
+        monitored if no occurrences are left. Only the buckets skipped by the decrement are walked.
+
+        Parameters
+        ----------
+        id : any hashable type
+            The monitored item
+        count : int
+            The estimated number of occurrences to remove
+        max_error : int, optional
+            The new maximum error of the item, unchanged by default
+
+        Returns
+        -------
+        count : int
+            The remaining estimated number of occurrences of the item
         """
-        self.id_to_bucket_map[node.id] = bucket
-        # if bucket exists, insert node at corresponding index
-        if bucket in self.bucket_map:
-            self._insert_at_correct_index(bucket, node)
-        # if bucket doesn't exist, create bucket
-        else:
-            self.bucket_map[bucket] = [node]
+        node = self._nodes[id]
+        new_count = node.count - count
+        if new_count <= 0:
+            self.remove(id)
+            return 0
+        start = node.bucket.prev
+        while start is not None and start.count >= new_count:
+            start = start.prev
+        self._remove_node(node)
+        if max_error is not None:
+            node.max_error = max_error
+        self._insert_node(node, new_count, start)
+        return new_count
 
     def safe_insert_node(self, node, bucket):
         """ This method is used to fill a new StreamSummary data structure with existing Node objects. It is necessary
@@ -283,96 +491,172 @@ class WeightedStreamSummary:
             return False
 
         self.size += 1
-
-        self._insert_node_into_bucket(node, bucket)
-        # id_to_bucket_map and bucket_map are already up-to-date
-
-        # last_cached_bucket and last_cached_index has to be updated
-        if self.size == 1:
-            # insertion was first one
-            self.last_cached_bucket = bucket
-            self.last_cached_index = 0
-        elif self.size <= self.max_size:
-            # keep bucket pointer at lowest bucket
-            if bucket < self.last_cached_bucket:
-                self.last_cached_bucket = bucket
-        else:
-            # we have more elements than we can cache, so the pointers might need to be moved
-            if self.last_cached_bucket < bucket:
-                # potentially changes to last_cached pointers
-                if len(self.bucket_map[self.last_cached_bucket]) == self.last_cached_index + 1:
-                    # move last_cached pointers to next bucket
-                    self.last_cached_bucket += 1
-                    while self.last_cached_bucket not in list(self.bucket_map.keys()):
-                        self.last_cached_bucket += 1
-                    self.last_cached_index = 0
-                else:
-                    self.last_cached_index += 1
-            elif self.last_cached_bucket == bucket:
-                self.last_cached_index += 1
-
+        self._insert_node(node, bucket)
         return True
 
-    def _insert_at_correct_index(self, bucket, node):
-        index = -1
-        list = self.bucket_map[bucket]
-        for i in range(len(list)):
-            if node.max_error > list[i].max_error:
-                index = i
-                break
-        if index == -1:
-            self.bucket_map[bucket].append(node)
+    def _insert_node(self, node, count, start=None):
+        """ This method is not supposed to be used from outside SpaceSaving. Without appropriate additional calls this
+        will compromise the overall data structure!
+        _insert_node links the node at the correct position within the bucket of the given count, creating the bucket
+        if needed, and moves the last cached pointer. The bucket is searched starting from the bucket *start*, which
+        must have a lower count, or from the lowest bucket.
+        """
+        n_nodes = len(self._nodes)
+        if n_nodes == self.max_size:
+            self._last_cached = self._head
+        bucket = self._buckets.get(count)
+        if bucket is None:
+            # find the buckets between which the new bucket has to be linked
+            if start is not None and start.count >= count:
+                start = None
+            prev_bucket = start
+            next_bucket = start.next if start is not None else \
+                          (self._head.bucket if self._head is not None else None)
+            while next_bucket is not None and next_bucket.count < count:
+                prev_bucket = next_bucket
+                next_bucket = next_bucket.next
+            bucket = self.Bucket(count)
+            bucket.prev = prev_bucket
+            bucket.next = next_bucket
+            if prev_bucket is not None:
+                prev_bucket.next = bucket
+            if next_bucket is not None:
+                next_bucket.prev = bucket
+            self._buckets[count] = bucket
+            prev_node = prev_bucket.tail if prev_bucket is not None else None
+            bucket.head = bucket.tail = node
+            bucket.errors.append(node.max_error)
+        else:
+            # nodes are sorted by decreasing max error and inserted after all nodes with the same max error
+            max_error = node.max_error
+            run_tails = bucket.run_tails
+            if max_error in run_tails:
+                prev_node = run_tails[max_error]
+            else:
+                errors = bucket.errors
+                i = bisect.bisect_right(errors, max_error)
+                prev_node = run_tails[errors[i]] if i < len(errors) else bucket.head.prev
+                errors.insert(i, max_error)
+            if prev_node is bucket.tail:
+                bucket.tail = node
+            elif prev_node is bucket.head.prev:
+                bucket.head = node
+        bucket.run_tails[node.max_error] = node
+        node.bucket = bucket
+        node.count = count
+        self._seq += 1
+        node.seq = self._seq
+        # link node into the list of all nodes
+        node.prev = prev_node
+        if prev_node is None:
+            node.next = self._head
+            self._head = node
+        else:
+            node.next = prev_node.next
+            prev_node.next = node
+        if node.next is None:
+            self._tail = node
         else:
-            self.bucket_map[bucket].insert(index, node)
+            node.next.prev = node
+        self._nodes[node.id] = node
+        if n_nodes >= self.max_size and self._last_cached is not None and \
+                self._is_after(node, self._last_cached):
+            # the node is cached, so the previously last cached node is not anymore
+            self._last_cached = self._last_cached.next
+
+    def _remove_node(self, node):
+        """ This method is not supposed to be used from outside SpaceSaving. It unlinks the node from its bucket and
+        from the list of all nodes, deleting the bucket if it becomes empty, and moves the last cached pointer.
+        """
+        if len(self._nodes) > self.max_size and \
+                (node is self._last_cached or self._is_after(node, self._last_cached)):
+            # the node is cached, so the next node is now cached too
+            self._last_cached = self._last_cached.prev
+        del self._nodes[node.id]
+        bucket = node.bucket
+        run_tails = bucket.run_tails
+        if run_tails[node.max_error] is node:
+            if node is not bucket.head and node.prev.max_error == node.max_error:
+                run_tails[node.max_error] = node.prev
+            else:
+                del run_tails[node.max_error]
+                errors = bucket.errors
+                del errors[bisect.bisect_left(errors, node.max_error)]
+        if bucket.head is node:
+            if bucket.tail is node:
+                # the bucket is empty now
+                del self._buckets[bucket.count]
+                if bucket.prev is not None:
+                    bucket.prev.next = bucket.next
+                if bucket.next is not None:
+                    bucket.next.prev = bucket.prev
+            else:
+                bucket.head = node.next
+        elif bucket.tail is node:
+            bucket.tail = node.prev
+        if node.prev is None:
+            self._head = node.next
+        else:
+            node.prev.next = node.next
+        if node.next is None:
+            self._tail = node.prev
+        else:
+            node.next.prev = node.prev
+        node.prev = node.next = node.bucket = None
+
+    def _append_node(self, node, count):
+        """Link a node after the most frequent node, which requires count to be at least as high as its count and the
+        max error to be at most as high as its max error if the count is the same."""
+        bucket = self._tail.bucket if self._tail is not None else None
+        if bucket is None or bucket.count != count:
+            new_bucket = self.Bucket(count)
+            new_bucket.prev = bucket
+            if bucket is not None:
+                bucket.next = new_bucket
+            bucket = new_bucket
+            bucket.head = node
+            self._buckets[count] = bucket
+        if node.max_error not in bucket.run_tails:
+            bisect.insort(bucket.errors, node.max_error)
+        bucket.run_tails[node.max_error] = node
+        bucket.tail = node
+        node.bucket = bucket
+        node.count = count
+        node.prev = self._tail
+        if self._tail is None:
+            self._head = node
+        else:
+            self._tail.next = node
+        self._tail = node
+        self._nodes[node.id] = node
+
+    @staticmethod
+    def _is_after(node, other):
+        """Return True if node is closer to the most frequent node than other"""
+        if node.count != other.count:
+            return node.count > other.count
+        if node.max_error != other.max_error:
+            return node.max_error < other.max_error
+        return node.seq > other.seq
 
     def index(self, bucket, id):
-        for index in range(len(self.bucket_map[bucket])):
-            if self.bucket_map[bucket][index].id == id:
-                return self.bucket_map[bucket][index], index
-        return None, None
+        node = self._nodes.get(id)
+        if node is None or node.count != bucket:
+            return None, None
+        index = 0
+        curr = node.bucket.head
+        while curr is not node:
+            curr = curr.next
+            index += 1
+        return node, index
 
     def remove(self, id):
-        if not (id in self.id_to_bucket_map):
-            return False
-        bucket = self.id_to_bucket_map[id]
-        del self.id_to_bucket_map[id]
-        node, index = self.index(bucket, id)
-        if index == None:
+        node = self._nodes.get(id)
+        if node is None:
             return False
-        else:
-            del self.bucket_map[bucket][index]
-
-            # the last_cached pointers need to be adjusted
-            if self.last_cached_bucket < bucket:
-                # one more element can be cached
-                if self.last_cached_index > 0:
-                    self.last_cached_index -= 1
-                else:
-                    buckets = list(self.bucket_map.keys())
-                    buckets.sort()
-                    bucket_index = buckets.index(bucket)
-                    if bucket_index > 0:
-                        self.last_cached_bucket = buckets[bucket_index - 1]
-                        self.last_cached_index = len(self.bucket_map[self.last_cached_bucket]) - 1
-                    else:
-                        # there is no bucket below, all objects are removed
-                        self.last_cached_bucket = 1
-
-            elif self.last_cached_bucket == bucket:
-                if self.last_cached_index == 0:
-                    buckets = list(self.bucket_map.keys())
-                    buckets.sort()
-                    bucket_index = buckets.index(bucket)
-                    if bucket_index > 0:
-                        self.last_cached_bucket = buckets[bucket_index - 1]
-                        self.last_cached_index = len(self.bucket_map[self.last_cached_bucket]) - 1
-                    else:
-                        # there is no bucket below, all objects are removed
-                        self.last_cached_bucket = 1
-                else:
-                    self.last_cached_index -= 1
-
-            return node
+        self._remove_node(node)
+        self.size -= 1
+        return node
 
     def guaranteed_top_k(self, k, return_frequencies=False):
         """
@@ -393,40 +677,30 @@ class WeightedStreamSummary:
           be returned as well
 
         """
-        buckets = list(self.bucket_map.keys())
-        buckets.sort()
-        # set indices to top element
-        curr_bucket_index = len(buckets) - 1
-        top_bucket_length = len(self.bucket_map[buckets[curr_bucket_index]])
-        next_bucket_index = curr_bucket_index if top_bucket_length > 1 else curr_bucket_index - 1
-        curr_list_index = top_bucket_length - 1
-        next_list_index = curr_list_index - 1 if top_bucket_length > 1 \
-                                              else len(self.bucket_map[buckets[next_bucket_index]]) - 1
-
         min_guaranteed_frequency = []
         top_k_frequencies = []
 
+        node = self._tail
         for i in range(k):
-            freq, _, guaranteed_occurrences = self.__guaranteed_occurrences(buckets, curr_bucket_index, curr_list_index)
-            min_guaranteed_frequency.append(guaranteed_occurrences)
-            top_k_frequencies.append(freq)
-
-            curr_bucket_index = next_bucket_index
-            curr_list_index = next_list_index
-            if curr_list_index == 0:
-                # switch to next bucket
-                next_bucket_index = curr_bucket_index - 1
-                next_list_index = len(self.bucket_map[buckets[next_bucket_index]]) - 1
-            else:
-                # move to next element within same bucket
-                next_list_index = curr_list_index - 1
-
-        max_frequency = buckets[next_bucket_index] if next_bucket_index >= 0 else buckets[0]
+            if node is None:
+                break
+            min_guaranteed_frequency.append(node.bucket.count - node.max_error)
+            top_k_frequencies.append(node.bucket.count)
+            node = node.prev
+
+        # the element following the k+1th one, or the least frequent one if there is none
+        next_node = node.prev if node is not None else None
+        if next_node is not None:
+            max_frequency = next_node.bucket.count
+        elif self._head is not None:
+            max_frequency = self._head.bucket.count
+        else:
+            max_frequency = 0
         guaranteed_indices = []
         total_top_k_frequency = 0
         total_top_k_occurrences = 0
 
-        for i in range(k):
+        for i in range(len(min_guaranteed_frequency)):
             if min_guaranteed_frequency[i] >= max_frequency:
                 guaranteed_indices.append(i)
                 total_top_k_frequency += top_k_frequencies[i]
@@ -437,16 +711,34 @@ class WeightedStreamSummary:
         else:
             return guaranteed_indices
 
-    def __guaranteed_occurrences(self, buckets, bucket_index, list_index):
-        return buckets[bucket_index], self.bucket_map[buckets[bucket_index]][list_index].max_error, \
-               buckets[bucket_index] - self.bucket_map[buckets[bucket_index]][list_index].max_error
-
     def convert_to_dictionary(self):
-        # since the position function needs the list to be sorted from head to tail, the buckets need to be reversed
         dict = {}
-        buckets = list(self.bucket_map.keys())
-        for key in buckets:
-            bucket_list = deepcopy(self.bucket_map[key])
-            for node in bucket_list:
-                dict[node.id] = {'max_error': node.max_error, 'frequency': key, 'weight': node.weight}
+        for bucket in self._buckets.values():
+            for node in self._bucket_nodes(bucket):
+                dict[node.id] = {'max_error': node.max_error, 'frequency': bucket.count, 'weight': node.weight}
         return dict
+
+
+class _BucketView(Mapping):
+    """Read-only mapping of the ids of the monitored items to their estimated number of occurrences, i.e. the bucket
+    they are in."""
+
+    __slots__ = ('_nodes',)
+
+    def __init__(self, nodes):
+        self._nodes = nodes
+
+    def __getitem__(self, id):
+        return self._nodes[id].count
+
+    def __contains__(self, id):
+        return id in self._nodes
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __repr__(self):
+        return repr(dict(self))
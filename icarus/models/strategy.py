@@ -75,6 +75,24 @@ class Strategy(object, metaclass=abc.ABCMeta):
         raise NotImplementedError('The selected strategy must implement '
                                   'a process_event method')
 
+    def process_events(self, batch):
+        """Process a batch of consecutive events received from the simulation
+        engine.
+        
+        By default, events are processed one at a time by *process_event*.
+        Strategies can override this method to process a whole batch more
+        efficiently, as long as the outcome is the same.
+        
+        Parameters
+        ----------
+        batch : EventBatch
+            The events, whose attributes are NumPy arrays of times,
+            receivers, contents, log flags and weights
+        """
+        process_event = self.process_event
+        for time, receiver, content, log, weight in batch.requests():
+            process_event(time, receiver, content, log, weight)
+
 
 
 class Hashrouting(Strategy):
@@ -496,12 +514,14 @@ class LeaveCopyEverywhere(Strategy):
     def process_event(self, time, receiver, content, log, weight):
         # get all required data
         source = self.view.content_source(content)
-        path = self.view.shortest_path(receiver, source)
+        path = self.view.compiled_path(receiver, source)
+        nodes, caching = path.nodes, path.caching
         # Route requests to original source and queries caches on the path
         self.controller.start_session(time, receiver, content, log, weight)
-        for u, v in path_links(path):
-            self.controller.forward_request_hop(u, v)
-            if self.view.has_cache(v):
+        for i in range(1, len(nodes)):
+            v = nodes[i]
+            self.controller.forward_request_hop(nodes[i - 1], v)
+            if caching[i]:
                 if self.controller.get_content(v):
                     serving_node = v
                     break
@@ -510,12 +530,13 @@ class LeaveCopyEverywhere(Strategy):
             self.controller.get_content(v)
             serving_node = v
         # Return content
-        path = list(reversed(self.view.shortest_path(receiver, serving_node)))
-        for u, v in path_links(path):
-            self.controller.forward_content_hop(u, v)
-            if self.view.has_cache(v):
+        path = self.view.compiled_path(receiver, serving_node).reverse
+        nodes, caching = path.nodes, path.caching
+        for i in range(1, len(nodes)):
+            self.controller.forward_content_hop(nodes[i - 1], nodes[i])
+            if caching[i]:
                 # insert content
-                self.controller.put_content(v)
+                self.controller.put_content(nodes[i])
         self.controller.end_session()
 
 
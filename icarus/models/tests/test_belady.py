@@ -0,0 +1,92 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import gc
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import icarus
+from icarus.execution import exec_experiment
+from icarus.models import BeladyCache
+from icarus.models import belady
+from icarus.registry import TOPOLOGY_FACTORY, CACHE_PLACEMENT, CONTENT_PLACEMENT
+from icarus.tools import belady_cache_hit_ratio
+from icarus.util import Tree
+
+
+class TestBeladyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.reqs_file = os.path.join(self.tmp_dir, 'trace.csv')
+        self.contents = (np.random.RandomState(0).zipf(1.2, 3000) % 100 + 1).tolist()
+        with open(self.reqs_file, 'w') as f:
+            for i, content in enumerate(self.contents):
+                f.write('%d,0,%d\n' % (i, content))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_opt(self):
+        with open(self.reqs_file, 'w') as f:
+            for i, content in enumerate([1, 2, 3, 1, 2, 4, 1, 2, 3, 4]):
+                f.write('%d,0,%d\n' % (i, content))
+        c = BeladyCache(2, reqs_file=self.reqs_file, binary_trace=False)
+        self.assertFalse(c.get(1, 1))
+        self.assertIsNone(c.put(1, 1))
+        self.assertFalse(c.get(2, 1))
+        self.assertIsNone(c.put(2, 1))
+        self.assertEqual([1, 2], c.dump())
+        self.assertFalse(c.get(3, 1))
+        self.assertIsNone(c.put(3, 1))
+        self.assertFalse(c.has(3))
+        self.assertTrue(c.get(1, 1))
+        self.assertEqual([2, 1], c.dump())
+        self.assertEqual(1, c.position(1))
+        self.assertRaises(ValueError, c.get, 1, 1)
+
+    def test_hit_ratio(self):
+        hits = 0
+        c = BeladyCache(10, reqs_file=self.reqs_file)
+        for content in self.contents:
+            if c.get(content, 1):
+                hits += 1
+            else:
+                c.put(content, 1)
+            self.assertLessEqual(len(c), 10)
+        self.assertAlmostEqual(belady_cache_hit_ratio(self.contents, 10), hits / len(self.contents))
+
+    def test_shared_trace(self):
+        gc.collect()
+        c = BeladyCache(10, reqs_file=self.reqs_file)
+        other = BeladyCache(20, reqs_file=self.reqs_file)
+        self.assertIs(c._trace, other._trace)
+        self.assertIsInstance(c._trace.contents, np.ndarray)
+        self.assertEqual(1, len(belady._traces))
+        # The trace is released with the last cache using it
+        del c
+        self.assertEqual(1, len(belady._traces))
+        del other
+        gc.collect()
+        self.assertEqual(0, len(belady._traces))
+
+    def test_experiment(self):
+        topology = TOPOLOGY_FACTORY['PATH'](n=3)
+        CACHE_PLACEMENT['UNIFORM'](topology, cache_budget=10)
+        CONTENT_PLACEMENT['UNIFORM'](topology, range(1, 101), seed=0)
+        workload = [(i, {'receiver': 0, 'content': content, 'log': i >= 500, 'weight': 1})
+                    for i, content in enumerate(self.contents)]
+        cache_policy = Tree(name='OPT', reqs_file=self.reqs_file)
+        results = exec_experiment(topology, workload, Tree(), Tree(name='LCE'), cache_policy,
+                                  {'CACHE_HIT_RATIO': {}}, 'test')
+        self.assertAlmostEqual(belady_cache_hit_ratio(self.contents, 10, n_warmup=500),
+                               results['CACHE_HIT_RATIO']['MEAN'])
@@ -15,6 +15,8 @@ import numpy as np
 import icarus.models as cache
 
 class TestLinkedSet(unittest.TestCase):
+
+    linked_set_class = cache.LinkedSet
     
     def link_consistency(self, linked_set):
         """Checks that links of a linked set are consistent iterating from top
@@ -39,7 +41,7 @@ class TestLinkedSet(unittest.TestCase):
         return list(reversed(list(linked_set))) == list(reversed(linked_set))
         
     def test_append_top(self):
-        c = cache.LinkedSet()
+        c = self.linked_set_class()
         c.append_top(1)
         self.assertEqual(len(c), 1)
         self.assertEqual(list(c), [1])
@@ -53,7 +55,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertRaises(KeyError, c.append_top, 2)
 
     def test_append_bottom(self):
-        c = cache.LinkedSet()
+        c = self.linked_set_class()
         c.append_bottom(1)
         self.assertEqual(len(c), 1)
         self.assertEqual(list(c), [1])
@@ -67,7 +69,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertRaises(KeyError, c.append_top, 2)
 
     def test_move_to_top(self):
-        c = cache.LinkedSet()
+        c = self.linked_set_class()
         c.append_top(1)
         c.move_to_top(1)
         self.assertEqual(list(c), [1])
@@ -82,7 +84,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertTrue(self.link_consistency(c))
         
     def test_move_to_bottom(self):
-        c = cache.LinkedSet()
+        c = self.linked_set_class()
         c.append_top(1)
         c.move_to_bottom(1)
         self.assertEqual(list(c), [1])
@@ -97,7 +99,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertTrue(self.link_consistency(c))
     
     def test_move_up(self):
-        c = cache.LinkedSet()
+        c = self.linked_set_class()
         c.append_bottom(1)
         c.move_up(1)
         self.assertEqual(list(c), [1])
@@ -115,7 +117,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertRaises(KeyError, c.move_up, 4)
         
     def test_move_down(self):
-        c = cache.LinkedSet()
+        c = self.linked_set_class()
         c.append_top(1)
         c.move_down(1)
         self.assertEqual(list(c), [1])
@@ -136,7 +138,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertRaises(KeyError, c.move_down, 4)
         
     def test_pop_top(self):
-        c = cache.LinkedSet([1, 2, 3])
+        c = self.linked_set_class([1, 2, 3])
         evicted = c.pop_top()
         self.assertEqual(evicted, 1)
         self.assertEqual(list(c), [2, 3])
@@ -153,7 +155,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertEqual(list(c), [])
 
     def test_pop_bottom(self):
-        c = cache.LinkedSet([1, 2, 3])
+        c = self.linked_set_class([1, 2, 3])
         evicted = c.pop_bottom()
         self.assertEqual(evicted, 3)
         self.assertEqual(list(c), [1, 2])
@@ -170,7 +172,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertEqual(list(c), [])
 
     def test_insert_above(self):
-        c = cache.LinkedSet([3])
+        c = self.linked_set_class([3])
         c.insert_above(3, 2)
         self.assertEqual(list(c), [2, 3])
         self.assertTrue(self.link_consistency(c))
@@ -188,7 +190,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertTrue(self.link_consistency(c))
 
     def test_insert_below(self):
-        c = cache.LinkedSet([1])
+        c = self.linked_set_class([1])
         c.insert_below(1, 2)
         self.assertEqual(list(c), [1, 2])
         self.assertTrue(self.link_consistency(c))
@@ -206,7 +208,7 @@ class TestLinkedSet(unittest.TestCase):
         self.assertTrue(self.link_consistency(c))
         
     def test_clear(self):
-        c = cache.LinkedSet()
+        c = self.linked_set_class()
         c.append_top(1)
         c.append_top(2)
         self.assertEqual(len(c), 2)
@@ -216,9 +218,57 @@ class TestLinkedSet(unittest.TestCase):
         c.clear()
 
     def test_duplicated_elements(self):
-        self.assertRaises(ValueError, cache.LinkedSet, iterable=[1, 1, 2])
-        self.assertRaises(ValueError, cache.LinkedSet, iterable=[1, None, None])
-        self.assertIsNotNone(cache.LinkedSet(iterable=[1, 0, None]))
+        self.assertRaises(ValueError, self.linked_set_class, iterable=[1, 1, 2])
+        self.assertRaises(ValueError, self.linked_set_class, iterable=[1, None, None])
+        self.assertIsNotNone(self.linked_set_class(iterable=[1, 0, None]))
+
+
+class TestArrayLinkedSet(TestLinkedSet):
+
+    linked_set_class = cache.ArrayLinkedSet
+
+    def link_consistency(self, linked_set):
+        """Checks that links of an array-backed linked set are consistent
+        iterating from top or from bottom.
+        
+        This method depends on the internal implementation of the
+        ArrayLinkedSet class
+        """
+        topdown = collections.deque()
+        bottomup = collections.deque()
+        cur = linked_set._top
+        while cur != linked_set._NIL:
+            topdown.append(linked_set._val[cur])
+            cur = linked_set._down[cur]
+        cur = linked_set._bottom
+        while cur != linked_set._NIL:
+            bottomup.append(linked_set._val[cur])
+            cur = linked_set._up[cur]
+        bottomup.reverse()
+        if topdown != bottomup:
+            return False
+        return list(reversed(list(linked_set))) == list(reversed(linked_set))
+
+    def test_slot_reuse(self):
+        c = cache.ArrayLinkedSet(capacity=2)
+        c.append_top(1)
+        c.append_top(2)
+        self.assertEqual(len(c._val), 2)
+        c.pop_bottom()
+        c.append_top(3)
+        self.assertEqual(len(c._val), 2)
+        c.append_bottom(4)
+        self.assertEqual(list(c), [3, 2, 4])
+        self.assertGreater(len(c._val), 2)
+        self.assertTrue(self.link_consistency(c))
+
+    def test_remove_while_iterating(self):
+        c = cache.ArrayLinkedSet([1, 2, 3])
+        d = cache.LinkedSet()
+        for _ in c:
+            d.append_bottom(c.pop_top())
+        self.assertEqual(len(c), 0)
+        self.assertEqual(list(d), [1, 2, 3])
 
 
 class TestCache(unittest.TestCase):
@@ -251,6 +301,15 @@ class TestCache(unittest.TestCase):
 
 class TestLruCache(unittest.TestCase):
 
+    def test_array_linked_set(self):
+        c = cache.LruCache(4, linked_set='ARRAY')
+        d = cache.LruCache(4)
+        for k in [1, 2, 3, 1, 4, 5, 2, 6, 1, 1, 7]:
+            self.assertEqual(d.get(k, 1), c.get(k, 1))
+            self.assertEqual(d.put(k, 1), c.put(k, 1))
+            self.assertEqual(d.dump(), c.dump())
+        self.assertRaises(ValueError, cache.LruCache, 4, linked_set='DEQUE')
+
     def test_lru(self):
         c = cache.LruCache(4)
         c.put(0)
@@ -274,6 +333,19 @@ class TestLruCache(unittest.TestCase):
         self.assertEqual(len(c), 0)
         self.assertEqual(c.dump(), [])
         
+    def test_resize(self):
+        c = cache.LruCache(4)
+        for k in [1, 2, 3, 4]:
+            c.put(k, 1)
+        self.assertEqual(c.resize(2), [2, 1])
+        self.assertEqual(c.maxlen, 2)
+        self.assertEqual(c.dump(), [4, 3])
+        self.assertEqual(c.put(5, 1), 3)
+        self.assertEqual(c.resize(3), [])
+        self.assertEqual(c.put(6, 1), None)
+        self.assertEqual(c.dump(), [6, 5, 4])
+        self.assertRaises(ValueError, c.resize, 0)
+
     def test_remove(self):
         c = cache.LruCache(4)
         c.put(1)
@@ -604,6 +676,30 @@ class TestInCacheLfuCache(unittest.TestCase):
         self.assertEqual(c.dump(), [])
 
 
+    def test_tie_breaking(self):
+        c = cache.InCacheLfuCache(3)
+        for k in (1, 2, 3):
+            c.put(k, 1)
+        c.get(2, 1)
+        c.get(3, 1)
+        c.get(1, 1)
+        # All items have the same frequency, the oldest one is evicted
+        self.assertEqual(c.put(4, 1), 4)
+        self.assertEqual(c.dump(), [3, 2, 1])
+        c.get(1, 1)
+        c.get(3, 1)
+        self.assertEqual(c.put(5, 1), 5)
+        c.get(2, 1)
+        c.get(2, 1)
+        self.assertEqual(c.put(6, 1), 6)
+        self.assertEqual(c.dump(), [2, 3, 1])
+        self.assertTrue(c.remove(3))
+        self.assertFalse(c.remove(3))
+        self.assertIsNone(c.put(6, 1))
+        self.assertEqual(c.put(7, 1), 6)
+        self.assertEqual(c.dump(), [2, 1, 7])
+
+
 class TestWeightedLruCache(unittest.TestCase):
 
     def test_wlru(self):
@@ -691,6 +787,19 @@ class TestPerfectLfuCache(unittest.TestCase):
         self.assertEqual(c.dump(), [])
         
 
+    def test_remove(self):
+        c = cache.PerfectLfuCache(2)
+        for k in (1, 1, 2):
+            c.get(k, 1)
+            c.put(k, 1)
+        self.assertTrue(c.remove(1))
+        self.assertFalse(c.has(1))
+        self.assertFalse(c.remove(1))
+        c.get(3, 1)
+        self.assertIsNone(c.put(3, 1))
+        self.assertEqual(c.dump(), [3, 2])
+
+
 class TestInsertAfterKHits(unittest.TestCase):
     
     def test_put_get_no_memory(self):
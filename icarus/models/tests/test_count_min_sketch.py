@@ -0,0 +1,136 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import collections
+import random
+
+from icarus.models.count_min_sketch import CountMinSketch, CountMinSketchTopK
+from icarus.models.data_stream_caching_algorithm import DataStreamCachingAlgorithmCache, \
+    DataStreamCachingAlgorithmWithSlidingWindowCache, make_frequency_estimator
+from icarus.registry import CACHE_POLICY
+
+
+def zipf_stream(n, n_items=200, seed=0):
+    rand = random.Random(seed)
+    return [int(rand.paretovariate(0.8)) % n_items for _ in range(n)]
+
+
+class TestCountMinSketch(unittest.TestCase):
+
+    def test_upper_bound(self):
+        sketch = CountMinSketch(20, 3)
+        stream = zipf_stream(2000)
+        for k in stream:
+            sketch.add(k)
+        for k, count in collections.Counter(stream).items():
+            self.assertGreaterEqual(sketch.estimate(k), count)
+
+    def test_exact_without_collisions(self):
+        sketch = CountMinSketch(10000, 4)
+        self.assertEqual(3, sketch.add(1, 3))
+        self.assertEqual(5, sketch.add(1, 2))
+        self.assertEqual(1, sketch.add(2))
+        self.assertEqual(5, sketch.estimate(1))
+        self.assertEqual(0, sketch.estimate(3))
+        sketch.clear()
+        self.assertEqual(0, sketch.estimate(1))
+        self.assertEqual(4 * 10000 * 8, sketch.nbytes)
+
+    def test_conservative_update(self):
+        # A single counter per row: all items collide
+        sketch = CountMinSketch(1, 2)
+        sketch.add(1, 5)
+        self.assertEqual(6, sketch.add(2))
+        self.assertEqual(6, sketch.estimate(1))
+
+
+class TestCountMinSketchTopK(unittest.TestCase):
+
+    def test_top_k(self):
+        estimator = CountMinSketchTopK(10, 50)
+        stream = zipf_stream(5000)
+        for k in stream:
+            estimator.put(k, 1)
+        self.assertEqual(10, len(estimator))
+        counts = collections.Counter(stream)
+        dump = estimator.dump()
+        guaranteed, _, occurrences = estimator.guaranteed_top_k(9, return_frequencies=True)
+        self.assertGreater(len(guaranteed), 0)
+        self.assertEqual(list(range(len(guaranteed))), guaranteed)
+        self.assertLessEqual(occurrences, sum(counts[dump[i]] for i in guaranteed))
+        # Guaranteed items are among the most frequent ones
+        threshold = sorted(counts.values(), reverse=True)[len(guaranteed) - 1]
+        for i in guaranteed:
+            self.assertGreaterEqual(counts[dump[i]], threshold)
+        for k in dump:
+            self.assertTrue(estimator.has(k))
+            self.assertGreaterEqual(estimator.frequency(k), counts[k])
+
+    def test_eviction(self):
+        estimator = CountMinSketchTopK(2, 1000)
+        for k in [1, 1, 2, 2, 2]:
+            self.assertIsNone(estimator.put(k, 1))
+        self.assertIsNone(estimator.put(3, 1))
+        self.assertEqual([2, 1], estimator.dump())
+        self.assertEqual(1, estimator.put(3, 2))
+        self.assertEqual([2, 3], estimator.dump())
+        # Item 3 may have occurred three times, as many as item 2
+        self.assertEqual([0], estimator.guaranteed_top_k(1))
+        # Untracked items occurred at most twice
+        self.assertEqual([0, 1], estimator.guaranteed_top_k(2))
+        estimator.clear()
+        self.assertEqual([], estimator.dump())
+        self.assertFalse(estimator.has(1))
+
+    def test_stale_entries(self):
+        estimator = CountMinSketchTopK(3, 1000)
+        for _ in range(100):
+            for k in range(3):
+                estimator.put(k, 1)
+        self.assertLessEqual(len(estimator._heap), 2 * 3 + 16)
+        self.assertEqual(100, estimator.frequency(0))
+
+
+class TestFrequencyEstimator(unittest.TestCase):
+
+    def test_make(self):
+        estimator = make_frequency_estimator('CMS', 10, 20, sketch_width=2.0, sketch_depth=3)
+        self.assertEqual(11, estimator.capacity)
+        self.assertEqual(40 * 3 * 8, estimator._sketch.nbytes)
+        self.assertRaises(ValueError, make_frequency_estimator, 'LFU', 10, 20)
+        self.assertRaises(ValueError, DataStreamCachingAlgorithmWithSlidingWindowCache, 10,
+                          frequency_estimator='CMS')
+
+    def test_policies(self):
+        stream = zipf_stream(3000, n_items=60)
+        for policy in ('DSCA', '2DSCA', 'DSCAFS', 'ADSCASTK', 'ADSCAATK', 'DSCAAWS', 'DSCAFT'):
+            cache = CACHE_POLICY[policy](10, window_size=2, frequency_estimator='CMS', sketch_width=0.5)
+            hits = 0
+            for k in stream:
+                if cache.get(k, 1):
+                    hits += 1
+                else:
+                    cache.put(k, 1)
+                dump = cache.dump()
+                self.assertLessEqual(len(dump), 10)
+                self.assertEqual(len(dump), len(cache))
+            self.assertGreater(hits, 0)
+
+    def test_top_k_cached(self):
+        cache = DataStreamCachingAlgorithmCache(10, window_size=2, frequency_estimator='CMS')
+        for k in zipf_stream(3000, n_items=60):
+            if not cache.get(k, 1):
+                cache.put(k, 1)
+        self.assertGreater(len(cache._guaranteed_top_k), 0)
+        for k in cache._guaranteed_top_k:
+            self.assertTrue(cache.has(k))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,7 +15,8 @@ else:
 
 from icarus.models.data_stream_caching_algorithm import DataStreamCachingAlgorithmCache, \
     DataStreamCachingAlgorithmWithSlidingWindowCache, AdaptiveDataStreamCachingAlgorithmWithStaticTopKCache, \
-    DataStreamCachingAlgorithmWithFrequencyThresholdCache
+    DataStreamCachingAlgorithmWithFrequencyThresholdCache, DataStreamCachingAlgorithmWithFixedSplitsCache
+from icarus.registry import CACHE_POLICY
 import pprint
 
 import os
@@ -334,6 +335,61 @@ class TestDSCA(unittest.TestCase):
 
         self.assertListEqual([contents, cache_hits], [258673, 36039])
 
+    def test_has_position(self):
+        caches = [DataStreamCachingAlgorithmCache(10, window_size=2),
+                  DataStreamCachingAlgorithmWithSlidingWindowCache(10, subwindow_size=1.0, subwindows=3),
+                  DataStreamCachingAlgorithmWithFrequencyThresholdCache(10, window_size=2, threshold=0.01),
+                  DataStreamCachingAlgorithmWithFixedSplitsCache(10, window_size=2)]
+        rand = random.Random(0)
+        for c in caches:
+            for _ in range(2000):
+                k = int(rand.paretovariate(1.0)) % 50
+                if not c.get(k, 1):
+                    c.put(k, 1)
+                if rand.random() < 0.01:
+                    c.remove(rand.randint(0, 50))
+                dump = c.dump()
+                self.assertEqual(len(dump), len(c))
+                for k in range(50):
+                    self.assertEqual(k in dump, c.has(k))
+                    if k in dump:
+                        self.assertEqual(dump.index(k), c.position(k))
+                    else:
+                        self.assertRaises(ValueError, c.position, k)
+
+    def test_window_end_resizes_lru(self):
+        c = CACHE_POLICY['DSCA'](4, monitored=1.0, window_size=2.0)
+        for k in [1, 2, 1, 3, 1, 4, 2, 1]:
+            if not c.get(k, 1):
+                c.put(k, 1)
+        # no items were evicted from the Space Saving table, hence all counts are exact
+        self.assertEqual([1, 2, 4], c._guaranteed_top_k)
+        lru_cache = c._lru_cache
+        self.assertEqual(1, lru_cache.maxlen)
+        self.assertEqual([1, 2, 4, 3], c.dump())
+        for k in [5, 5, 5, 5, 6, 6, 7, 7]:
+            if not c.get(k, 1):
+                c.put(k, 1)
+        self.assertEqual([5, 7], c._guaranteed_top_k)
+        # the LRU cache is resized, not replaced, and filled with former top-k items
+        self.assertIs(lru_cache, c._lru_cache)
+        self.assertEqual(2, lru_cache.maxlen)
+        self.assertEqual([5, 7, 1, 2], c.dump())
+
+    def test_sliding_window_expiry(self):
+        c = DataStreamCachingAlgorithmWithSlidingWindowCache(2, monitored=2.0, subwindow_size=1.0, subwindows=2)
+        expected_top_k = [[1], [3, 1], [5, 3]]
+        for subwindow, top_k in zip([[1, 1, 1, 2], [3, 3, 3, 4], [5, 5, 5, 6]], expected_top_k):
+            for k in subwindow:
+                if not c.get(k, 1):
+                    c.put(k, 1)
+            self.assertEqual(top_k, c._guaranteed_top_k)
+        self.assertEqual(c.dump(), [5, 3])
+        # the top-k elements are taken before the oldest subwindow expires
+        self.assertFalse(c._ss_cache.has(1))
+        self.assertFalse(c._ss_cache.has(3))
+        self.assertEqual(c._ss_cache.frequency(5), 3)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -12,36 +12,36 @@ else:
     except ImportError:
         raise ImportError("The unittest2 package is needed to run the tests.")
 del sys
+import collections
+import random
+from copy import deepcopy
 
-from icarus.models.space_saving import SpaceSavingCache, StreamSummary
+from icarus.models.space_saving import SpaceSavingCache, SlidingWindowSpaceSavingCache, \
+    WeightedStreamSummary
 
+test_ss_youtube = False
 
-class TestStreamSummary(unittest.TestCase):
+
+class TestWeightedStreamSummary(unittest.TestCase):
 
     def test_init(self):
-        ss = StreamSummary(5, 5)
+        ss = WeightedStreamSummary(5, 5)
         self.assertEqual(ss.id_to_bucket_map, {})
         self.assertEqual(ss.bucket_map, {})
         self.assertEqual(ss.max_size, 5)
         self.assertEqual(ss.size, 0)
+        self.assertEqual(list(ss.ids()), [])
 
     def test_add_a_few(self):
-        ss = StreamSummary(5, 5)
+        ss = WeightedStreamSummary(5, 5)
         self.assertEqual(ss.size, 0)
-        ss.add_occurrence(1)
-        self.assertEqual(ss.size, 1)
-        ss.add_occurrence(17)
-        self.assertEqual(ss.size, 2)
-        ss.add_occurrence(23)
-        self.assertEqual(ss.size, 3)
-        ss.add_occurrence(2)
-        self.assertEqual(ss.size, 4)
-        ss.add_occurrence(7)
-        self.assertEqual(ss.size, 5)
+        for i, k in enumerate([1, 17, 23, 2, 7]):
+            self.assertIsNone(ss.add_occurrence(k))
+            self.assertEqual(ss.size, i + 1)
         self.assertSetEqual(set(ss.id_to_bucket_map.keys()), set([1, 17, 23, 2, 7]))
         self.assertSetEqual(set(ss.bucket_map), set([1]))
         self.assertEqual([node.id for node in ss.bucket_map[1]], [1, 17, 23, 2, 7])
-        ss.add_occurrence(10)
+        self.assertEqual(ss.add_occurrence(10), 1)
         self.assertEqual(ss.size, 5)
         self.assertEqual([node.id for node in ss.bucket_map[1]], [17, 23, 2, 7])
         self.assertSetEqual(set(ss.id_to_bucket_map.keys()), set([17, 23, 2, 7, 10]))
@@ -50,23 +50,20 @@ class TestStreamSummary(unittest.TestCase):
         self.assertSetEqual(set(ss.bucket_map), set([1, 2]))
         self.assertEqual(ss.id_to_bucket_map[10], 2)
         self.assertEqual(ss.bucket_map[2][0].max_error, 1)
-        ss.add_occurrence(10)
-        ss.add_occurrence(10)
-        ss.add_occurrence(10)
-        ss.add_occurrence(10)
-        ss.add_occurrence(10)
-        ss.add_occurrence(10)
+        for _ in range(6):
+            self.assertIsNone(ss.add_occurrence(10))
         self.assertSetEqual(set(ss.bucket_map), set([1, 8]))
         self.assertEqual(ss.bucket_map[8][0].max_error, 1)
-        ss.add_occurrence(1) # 2nd occ (but previously evicted)
+        self.assertEqual(ss.add_occurrence(1), 17) # 2nd occ (but previously evicted)
         self.assertEqual([node.id for node in ss.bucket_map[2]], [1])
-        ss.add_occurrence(2) # 2nd occ
+        self.assertIsNone(ss.add_occurrence(2)) # 2nd occ
+        # nodes with a higher max error are evicted first
         self.assertEqual([node.id for node in ss.bucket_map[2]], [1, 2])
-        ss.add_occurrence(3)
+        self.assertEqual(ss.add_occurrence(3), 23)
         self.assertEqual([node.id for node in ss.bucket_map[2]], [1, 3, 2])
-        ss.add_occurrence(4)
+        self.assertEqual(ss.add_occurrence(4), 7)
         self.assertEqual([node.id for node in ss.bucket_map[2]], [1, 3, 4, 2])
-        ss.add_occurrence(5)
+        self.assertEqual(ss.add_occurrence(5), 1)
         self.assertEqual([node.id for node in ss.bucket_map[2]], [3, 4, 2])
         ss.add_occurrence(10) # 9th occ
 
@@ -79,40 +76,182 @@ class TestStreamSummary(unittest.TestCase):
         self.assertSetEqual(set(ss.bucket_map), set([2, 3, 9]))
         self.assertEqual(ss.bucket_map[3][0].max_error, 2)
         self.assertEqual([node.max_error for node in ss.bucket_map[2]], [1, 1, 0])
+        self.assertEqual(list(ss.ids()), [10, 5, 2, 4, 3])
 
         top_k = ss.guaranteed_top_k(5)
-        self.assertEqual(top_k, [0]) # only 10 is guaranteed
+        self.assertEqual(top_k, [0, 2]) # 10 and 2 are guaranteed
+        self.assertEqual(ss.guaranteed_top_k(2, return_frequencies=True), ([0], 9, 8))
 
         ss.add_occurrence(5)
         ss.add_occurrence(5)
         self.assertEqual(ss.id_to_bucket_map[5], 5)
         top_k = ss.guaranteed_top_k(5)
-        self.assertEqual(top_k, [0]) # 10, 5 and 2 are guaranteed
+        self.assertEqual(top_k, [0, 1, 2]) # 10, 5 and 2 are guaranteed
+
+    def test_add_weighted(self):
+        ss = WeightedStreamSummary(3, 3)
+        ss.add_occurrence(1, 3)
+        ss.add_occurrence(2, 1)
+        ss.add_occurrence(3, 2)
+        self.assertEqual(list(ss.ids()), [1, 3, 2])
+        # one occurrence moves an item up by its weight
+        ss.add_occurrence(2, 1)
+        ss.add_occurrence(3, 2)
+        self.assertEqual(ss.id_to_bucket_map[2], 2)
+        self.assertEqual(ss.id_to_bucket_map[3], 4)
+        # the new item inherits the occurrences of the evicted one, scaled to its weight
+        self.assertEqual(ss.add_occurrence(4, 2), 2)
+        self.assertEqual(ss.id_to_bucket_map[4], 6)
+        self.assertEqual(ss.bucket_map[6][0].max_error, 4)
+        self.assertEqual(ss.convert_to_dictionary()[4],
+                         {'max_error': 4, 'frequency': 6, 'weight': 2})
+        self.assertEqual(list(ss.ids()), [4, 3, 1])
+
+
+    def test_max_error_order(self):
+        ss = WeightedStreamSummary(10, 10)
+        ss.safe_insert_node(WeightedStreamSummary.Node(1, 0, 1), 4)
+        ss.safe_insert_node(WeightedStreamSummary.Node(2, 2, 1), 4)
+        ss.safe_insert_node(WeightedStreamSummary.Node(3, 1, 1), 4)
+        ss.safe_insert_node(WeightedStreamSummary.Node(4, 2, 1), 4)
+        ss.safe_insert_node(WeightedStreamSummary.Node(5, 0, 1), 4)
+        self.assertEqual([node.id for node in ss.bucket_map[4]], [2, 4, 3, 1, 5])
+        self.assertEqual(list(ss.ids()), [5, 1, 3, 4, 2])
+        ss.add_occurrence(4, 2)
+        ss.add_occurrence(3)
+        self.assertEqual([node.id for node in ss.bucket_map[4]], [2, 1, 5])
+        self.assertEqual([node.id for node in ss.bucket_map[5]], [3])
+        self.assertEqual([node.id for node in ss.bucket_map[6]], [4])
+        self.assertEqual(list(ss.ids()), [4, 3, 5, 1, 2])
+
+    def test_weighted_eviction(self):
+        ss = WeightedStreamSummary(2, 2)
+        ss.add_occurrence(1, 2)
+        ss.add_occurrence(2, 3)
+        self.assertEqual(ss.add_occurrence(3, 1), 1)
+        self.assertEqual(ss.id_to_bucket_map[3], 2)
+        self.assertEqual(ss.bucket_map[2][0].max_error, 1)
+        self.assertNotIn(1, ss)
+
+    def test_last_cached(self):
+        ss = WeightedStreamSummary(3, 6)
+        self.assertEqual((ss.last_cached_bucket, ss.last_cached_index), (1, 0))
+        for i, bucket in enumerate([5, 3, 7, 3, 9, 5]):
+            ss.safe_insert_node(WeightedStreamSummary.Node(i, 0, 1), bucket)
+        # dump order: 4, 2, 5, 0, 3, 1
+        self.assertEqual(list(ss.ids()), [4, 2, 5, 0, 3, 1])
+        self.assertEqual((ss.last_cached_bucket, ss.last_cached_index), (5, 1))
+        ss.add_occurrence(3, 3)
+        # dump order: 4, 2, 3, 5, 0, 1
+        self.assertEqual((ss.last_cached_bucket, ss.last_cached_index), (6, 0))
+        ss.remove(4)
+        # dump order: 2, 3, 5, 0, 1
+        self.assertEqual((ss.last_cached_bucket, ss.last_cached_index), (5, 1))
+        self.assertEqual(ss.size, 5)
+
+    def test_deepcopy(self):
+        ss = WeightedStreamSummary(5, 5)
+        for k in [1, 2, 3, 1, 4, 5, 6, 1, 2]:
+            ss.add_occurrence(k)
+        ss_copy = deepcopy(ss)
+        self.assertEqual(ss.convert_to_dictionary(), ss_copy.convert_to_dictionary())
+        self.assertEqual(list(ss.convert_to_dictionary()), list(ss_copy.convert_to_dictionary()))
+        self.assertEqual(list(ss.ids()), list(ss_copy.ids()))
+        ss_copy.add_occurrence(7)
+        self.assertNotIn(7, ss)
+
+    def test_subtract_occurrences(self):
+        ss = WeightedStreamSummary(5, 5)
+        for k in [1, 1, 1, 1, 2, 2, 3]:
+            ss.add_occurrence(k)
+        self.assertEqual(ss.subtract_occurrences(1, 3), 1)
+        self.assertEqual(list(ss.ids()), [2, 1, 3])
+        self.assertEqual(ss.subtract_occurrences(2, 2), 0)
+        self.assertNotIn(2, ss)
+        self.assertEqual(ss.size, 2)
+        self.assertEqual(ss.id_to_bucket_map, {1: 1, 3: 1})
+
+
+class TestSpaceSavingCache(unittest.TestCase):
 
+    @unittest.skipUnless(test_ss_youtube, 'Test SS on YouTube trace')
     def test_youtube(self):
         import csv
         c = SpaceSavingCache(1000, monitored=2000)
         cache_hits = 0
         contents = 0
 
-        print('starting YouTube test')
         with open('../../../resources/UMass_YouTube_traces/YouTube_Trace_7days_reformatted.trace', 'r') as csv_file:
             csv_reader = csv.reader(csv_file)
             for row in csv_reader:
                 contents += 1
                 content = int(row[2])
 
-                if c.get(content):
+                if c.get(content, 1):
                     cache_hits += 1
                 else:
-                    c.put(content)
-
-                if contents % 10000 == 0:
-                    print(contents, 258673, float(contents) / float(258673))
+                    c.put(content, 1)
 
         self.assertListEqual([contents, cache_hits], [258673, 36816])
 
 
+class TestSlidingWindowSpaceSaving(unittest.TestCase):
+
+    def test_exact_window(self):
+        # all elements are monitored, hence counts are exact
+        c = SlidingWindowSpaceSavingCache(100, monitored=1.0, subwindows=3)
+        rand = random.Random(0)
+        subwindows = []
+        for _ in range(10):
+            subwindow = [rand.randint(0, 30) for _ in range(40)]
+            for k in subwindow:
+                c.put(k, 1)
+            subwindows.append(subwindow)
+            counts = collections.Counter(k for subwindow in subwindows[-3:] for k in subwindow)
+            self.assertEqual(dict(c._cache.id_to_bucket_map), dict(counts))
+            c.slide()
+        self.assertEqual(dict(c._cache.id_to_bucket_map),
+                         dict(collections.Counter(k for subwindow in subwindows[-2:] for k in subwindow)))
+
+    def test_bounds(self):
+        c = SlidingWindowSpaceSavingCache(10, monitored=1.0, subwindows=4)
+        rand = random.Random(0)
+        subwindows = []
+        for _ in range(20):
+            subwindow = [int(rand.paretovariate(1.0)) % 50 for _ in range(30)]
+            for k in subwindow:
+                c.put(k, 1)
+            subwindows.append(subwindow)
+            counts = collections.Counter(k for subwindow in subwindows[-4:] for k in subwindow)
+            for k, node in c._cache._nodes.items():
+                self.assertLessEqual(node.count - node.max_error, counts[k])
+                self.assertGreaterEqual(node.max_error, 0)
+            self.assertEqual(set(c._occurrences), set(c._cache._nodes))
+            c.slide()
+
+    def test_expiry(self):
+        c = SlidingWindowSpaceSavingCache(2, monitored=1.0, subwindows=2)
+        c.put(1, 1)
+        c.put(2, 1)
+        c.slide()
+        self.assertEqual(1, c.put(3, 1))
+        c.put(2, 1)
+        self.assertEqual(c._cache.bucket_map[2][0].max_error, 1)
+        c.slide()
+        # the first occurrence of 2 expired with the first subwindow
+        self.assertEqual(c.frequency(2), 1)
+        self.assertEqual(c.frequency(3), 2)
+        self.assertTrue(c.get(3, 1))
+        c.slide()
+        # the max error of 3 expired with the subwindow it was inherited in
+        self.assertEqual(c.dump(), [3])
+        self.assertEqual(c.frequency(3), 1)
+        self.assertEqual(c._cache.bucket_map[1][0].max_error, 0)
+        c.slide()
+        self.assertEqual(c.dump(), [])
+        self.assertEqual(len(c), 0)
+
+
 if __name__ == "__main__":
     unittest.main()
 
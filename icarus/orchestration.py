@@ -12,20 +12,147 @@ import copy
 import sys
 import signal
 import traceback
+import hashlib
+import pickle
+import math
+import os
+import cProfile
 
-from icarus.execution import exec_experiment
+import networkx as nx
+
+from icarus.execution import exec_experiment, exec_multi_policy_experiment
+from icarus.execution.network import symmetrify_paths
 from icarus.registry import TOPOLOGY_FACTORY, CACHE_PLACEMENT, CONTENT_PLACEMENT, \
                             CACHE_POLICY, WORKLOAD, DATA_COLLECTOR, STRATEGY
 from icarus.io import ResultSet
-from icarus.util import SequenceNumber, timestr
+from icarus.util import SequenceNumber, Tree, timestr
 
 
-__all__ = ['Orchestrator', 'run_scenario']
+__all__ = ['Orchestrator', 'ExperimentCostModel', 'run_scenario',
+           'run_multi_policy_scenario']
 
 
 logger = logging.getLogger('orchestration')
 
 
+# Prebuilt topologies, keyed by the hash of their spec, shared by all
+# experiments. Each value is a (pickled topology, shortest paths) tuple.
+# Worker processes inherit them when they are forked
+_TOPOLOGY_ARTEFACTS = {}
+
+
+class ExperimentCostModel(object):
+    """Model of the duration of experiments.
+
+    The cost of an experiment is estimated as its number of requests, i.e.
+    warmup plus measured requests, times a relative per-request cost of its
+    cache policy, which grows slowly with the cache size. The ratio between
+    actual durations and estimated costs is then learned from completed
+    experiments, separately for each cache policy, so that durations of the
+    remaining experiments can be predicted.
+    """
+
+    # Relative per-request cost of cache policies, LRU being the reference
+    POLICY_COST = {'LRU': 1, 'FIFO': 1, 'RAND': 1, 'CLIMB': 1, 'SLRU': 1,
+                   'OPT': 1, 'IN_CACHE_LFU': 2, 'PERFECT_LFU': 2, 'ARC': 2.5,
+                   'SS': 2.5, 'DSCA': 4, '2DSCA': 4, 'DSCAFS': 4, 'DSCAFT': 5,
+                   'ADSCAATK': 6, 'DSCASW': 10, 'DSCAAWS': 10, '2DSCAAWS': 10,
+                   'ADSCASTK': 15, 'KLRU': 20}
+
+    # Relative per-request cost of cache policies not listed above
+    DEFAULT_POLICY_COST = 3
+
+    def __init__(self):
+        # Sums of durations and of estimated costs of completed experiments,
+        # keyed by cache policy
+        self._durations = collections.defaultdict(float)
+        self._costs = collections.defaultdict(float)
+
+    def cost(self, params):
+        """Return the estimated cost of an experiment, in arbitrary units.
+
+        Parameters
+        ----------
+        params : Tree or list of Tree
+            The experiment parameters or a group of experiments differing only
+            by cache policy, whose cost is the sum of their costs
+
+        Returns
+        -------
+        cost : float
+            The estimated cost
+        """
+        if isinstance(params, list):
+            return sum(self.cost(p) for p in params)
+        policy = params['cache_policy']['name']
+        return self._requests(params) * self._cache_size_factor(params) * \
+               self.POLICY_COST.get(policy, self.DEFAULT_POLICY_COST)
+
+    def duration(self, params):
+        """Return the predicted duration of an experiment.
+
+        Parameters
+        ----------
+        params : Tree or list of Tree
+            The experiment parameters or a group of experiments differing only
+            by cache policy
+
+        Returns
+        -------
+        duration : float
+            The predicted duration in seconds or *None* if no experiment has
+            completed yet
+        """
+        if isinstance(params, list):
+            durations = [self.duration(p) for p in params]
+            return None if None in durations else sum(durations)
+        total_cost = sum(self._costs.values())
+        if total_cost == 0:
+            return None
+        policy = params['cache_policy']['name']
+        if self._costs[policy] > 0:
+            rate = self._durations[policy] / self._costs[policy]
+        else:
+            rate = sum(self._durations.values()) / total_cost
+        return rate * self.cost(params)
+
+    def update(self, params, duration):
+        """Learn from the duration of a completed experiment.
+
+        Parameters
+        ----------
+        params : Tree
+            The experiment parameters
+        duration : float
+            The duration of the experiment in seconds
+        """
+        policy = params['cache_policy']['name']
+        self._durations[policy] += duration
+        self._costs[policy] += self.cost(params)
+
+    @staticmethod
+    def _requests(params):
+        """Return the number of requests of an experiment"""
+        workload = params['workload']
+        n_requests = workload.get('n_warmup', 0) + workload.get('n_measured', 0)
+        return max(n_requests, 1)
+
+    @staticmethod
+    def _cache_size_factor(params):
+        """Return the factor by which the cost of each request grows with
+        the network cache size"""
+        cachepl = params.get('cache_placement', {})
+        cache_size = cachepl.get('network_cache_absolute', None)
+        if cache_size is None:
+            n_contents = params['workload'].get('n_contents', None)
+            fraction = cachepl.get('network_cache_all_nodes', None)
+            if n_contents is not None and fraction is not None:
+                cache_size = n_contents * fraction
+        if not cache_size or cache_size < 1:
+            return 1.0
+        return 1.0 + 0.1 * math.log10(cache_size)
+
+
 class Orchestrator(object):
     """Orchestrator.
     
@@ -33,7 +160,7 @@ class Orchestrator(object):
     aggregate results.
     """
 
-    def __init__(self, settings, summary_freq=4):
+    def __init__(self, settings, summary_freq=4, journal=None, results=None):
         """Constructor
         
         Parameters
@@ -43,24 +170,41 @@ class Orchestrator(object):
         summary_freq : int
             Frequency (in number of experiment) at which summary messages
             are displayed
+        journal : ResultsJournal, optional
+            Journal to which the results of each experiment are appended as
+            soon as it completes. Experiments whose results are already in
+            the journal are not run again and their results are added to the
+            result set.
+        results : ResultSet, optional
+            The result set to which results are added, e.g. a
+            StreamedResultSet writing them to a file as they arrive. By
+            default, results are kept in memory. Without a journal,
+            experiments whose results are already in the result set, e.g.
+            in the file of a StreamedResultSet of a previous run, are not
+            run again
         """
         self.settings = settings
-        self.results = ResultSet()
+        self.results = results if results is not None else ResultSet()
+        self.journal = journal
         self.seq = SequenceNumber()
-        self.exp_durations = collections.deque(maxlen=30)
+        self.cost_model = ExperimentCostModel()
+        # Experiments not completed yet, used to compute the ETA. It maps
+        # the key of experiment parameters to a [params, count] list
+        self.pending = {}
         self.n_success = 0
         self.n_fail = 0
         self.summary_freq = summary_freq
         self._stop = False
-        if self.settings.PARALLEL_EXECUTION:
-            self.pool = mp.Pool(settings.N_PROCESSES)
+        # The pool is created only when running, after topologies are
+        # prebuilt, so that worker processes inherit them
+        self.pool = None
     
     def stop(self):
         """Stop the execution of the orchestrator
         """
         logger.info('Orchestrator is stopping')
         self._stop = True
-        if self.settings.PARALLEL_EXECUTION:
+        if self.pool is not None:
             self.pool.terminate()
             self.pool.join()
     
@@ -72,27 +216,73 @@ class Orchestrator(object):
         """
         # Create queue of experiment configurations
         queue = collections.deque(self.settings.EXPERIMENT_QUEUE)
-        # Calculate number of experiments and number of processes
-        self.n_exp = len(queue) * self.settings.N_REPLICATIONS 
+        # Replications of each experiment already completed in a previous run
+        completed = collections.Counter()
+        if self.journal is not None:
+            for params, results in self.journal:
+                completed[experiment_key(params)] += 1
+                self.results.add(params, results)
+        else:
+            for params, _ in self.results:
+                completed[experiment_key(params)] += 1
+        n_completed = sum(completed.values())
         self.n_proc = self.settings.N_PROCESSES \
                       if self.settings.PARALLEL_EXECUTION \
                       else 1
+        if self.settings.SHARE_TOPOLOGIES:
+            _TOPOLOGY_ARTEFACTS.update(build_topology_artefacts(queue))
+            logger.info('Prebuilt %d distinct topologies' % len(_TOPOLOGY_ARTEFACTS))
+        if self.settings.MULTI_POLICY_REPLAY:
+            # Experiments differing only by cache policy are replayed together
+            queue = collections.deque(group_by_cache_policy(queue))
+            run, callback = run_multi_policy_scenario, self.multi_policy_callback
+        else:
+            run, callback = run_scenario, self.experiment_callback
+        # Expand the queue into one job per replication, leaving out the
+        # replications already completed
+        jobs = collections.deque()
+        for experiment in queue:
+            if isinstance(experiment, list):
+                remaining = [self.settings.N_REPLICATIONS -
+                             self._consume(completed, params)
+                             for params in experiment]
+                for i in range(max(remaining)):
+                    jobs.append([params for params, n in zip(experiment, remaining)
+                                 if n > i])
+            else:
+                n = self.settings.N_REPLICATIONS - self._consume(completed, experiment)
+                jobs.extend([experiment] * n)
+        for job in jobs:
+            for params in (job if isinstance(job, list) else [job]):
+                entry = self.pending.setdefault(experiment_key(params), [params, 0])
+                entry[1] += 1
+        # Calculate number of experiments
+        self.n_exp = sum(len(job) if isinstance(job, list) else 1 for job in jobs)
+        if n_completed > 0:
+            logger.info('Resuming: %d experiments already completed' % n_completed)
         logger.info('Starting simulations: %d experiments, %d process(es)' 
                     % (self.n_exp, self.n_proc))
+        if self.settings.MULTI_POLICY_REPLAY:
+            logger.info('Replaying %d experiments in %d multi-policy runs'
+                        % (self.n_exp, len(jobs)))
         
         if self.settings.PARALLEL_EXECUTION:
+            # Longest experiments are run first so that no long experiment is
+            # left running alone at the end while other processes are idle
+            jobs = collections.deque(sorted(jobs, key=self.cost_model.cost,
+                                            reverse=True))
+            self.pool = mp.Pool(self.settings.N_PROCESSES)
             # This job queue is used only to keep track of which jobs have
             # finished and which are still running. Currently this information
             # is used only to handle keyboard interrupts correctly
             job_queue = collections.deque()
             # Schedule experiments from the queue
-            while queue:
-                experiment = queue.popleft()
-                for _ in range(self.settings.N_REPLICATIONS):
-                    job_queue.append(self.pool.apply_async(run_scenario,
-                            args=(self.settings, experiment,
-                                  self.seq.assign(), self.n_exp),
-                            callback=self.experiment_callback))
+            while jobs:
+                experiment = jobs.popleft()
+                job_queue.append(self.pool.apply_async(run,
+                        args=(self.settings, experiment,
+                              self.seq.assign(), self.n_exp),
+                        callback=callback))
             self.pool.close()
             # This solution is probably not optimal, but at least makes
             # KeyboardInterrupt work fine, which is crucial if launching the
@@ -111,17 +301,24 @@ class Orchestrator(object):
             self.pool.join()
         
         else: # Single-process execution
-            while queue:
-                experiment = queue.popleft()
-                for _ in range(self.settings.N_REPLICATIONS):
-                    self.experiment_callback(run_scenario(self.settings, 
-                                            experiment, self.seq.assign(),
-                                            self.n_exp))
-                    if self._stop:
-                        self.stop()
+            while jobs:
+                experiment = jobs.popleft()
+                callback(run(self.settings, experiment,
+                             self.seq.assign(), self.n_exp))
+                if self._stop:
+                    self.stop()
 
         logger.info('END | Planned: %d, Completed: %d, Succeeded: %d, Failed: %d', 
                     self.n_exp, self.n_fail + self.n_success, self.n_success, self.n_fail)
+
+    def _consume(self, completed, params):
+        """Return the number of replications of an experiment completed in a
+        previous run which were not accounted yet, up to the number of
+        replications to run"""
+        key = experiment_key(params)
+        n = min(completed[key], self.settings.N_REPLICATIONS)
+        completed[key] -= n
+        return n
         
 
     def experiment_callback(self, args):
@@ -132,28 +329,165 @@ class Orchestrator(object):
         args : tuple
             Tuple of arguments
         """
-        # If args is None, that means that an exception was raised during the
-        # execution of the experiment. In such case, ignore it
-        if not args:
-            self.n_fail += 1
-            return
         # Extract parameters
         params, results, duration = args
+        # The experiment is no longer pending, whether it succeeded or not
+        entry = self.pending.get(experiment_key(params))
+        if entry is not None and entry[1] > 0:
+            entry[1] -= 1
+        # If results is None, that means that an exception was raised during
+        # the execution of the experiment. In such case, ignore it
+        if results is None:
+            self.n_fail += 1
+            return
         self.n_success += 1
         # Store results
         self.results.add(params, results)
-        self.exp_durations.append(duration)
+        if self.journal is not None:
+            self.journal.append(params, results)
+        self.cost_model.update(params, duration)
         if self.n_success % self.summary_freq == 0:
             # Number of experiments scheduled to be executed
             n_scheduled = self.n_exp - (self.n_fail + self.n_success)
-            # Compute ETA
+            # Compute ETA from the predicted duration of each pending
+            # experiment
             n_cores = min(mp.cpu_count(), self.n_proc)
-            mean_duration = sum(self.exp_durations)/len(self.exp_durations)
-            eta = timestr(n_scheduled*mean_duration/n_cores, False)
+            remaining = sum(count * self.cost_model.duration(pending_params)
+                            for pending_params, count in self.pending.values())
+            eta = timestr(remaining/n_cores, False)
             # Print summary
             logger.info('SUMMARY | Completed: %d, Failed: %d, Scheduled: %d, ETA: %s', 
                         self.n_success, self.n_fail, n_scheduled, eta)
-        
+
+    def multi_policy_callback(self, args_list):
+        """Callback method called by run_multi_policy_scenario
+
+        Parameters
+        ----------
+        args_list : list
+            List of arguments, one per experiment, each of them as expected
+            by *experiment_callback*
+        """
+        for args in args_list:
+            self.experiment_callback(args)
+
+
+def experiment_key(params):
+    """Return a key identifying experiment parameters
+
+    Parameters
+    ----------
+    params : Tree
+        Experiment parameters tree
+
+    Returns
+    -------
+    key : str
+        The hexadecimal digest of all parameters paths and values
+    """
+    paths = repr(sorted(list(params.paths().items()), key=repr))
+    return hashlib.sha1(paths.encode('utf-8')).hexdigest()
+
+
+def group_by_cache_policy(experiments):
+    """Group experiments which differ only by cache policy (and description)
+
+    Parameters
+    ----------
+    experiments : iterable of Tree
+        Experiment parameters trees
+
+    Returns
+    -------
+    groups : list of lists of Tree
+        Groups of experiments, in order of first appearance of each group. The
+        order of experiments within a group is preserved.
+    """
+    groups = collections.OrderedDict()
+    for params in experiments:
+        scenario = {path: val for path, val in list(params.paths().items())
+                    if path[0] not in ('cache_policy', 'desc')}
+        key = repr(sorted(scenario.items(), key=repr))
+        groups.setdefault(key, []).append(params)
+    return list(groups.values())
+
+
+def topology_key(topology_spec):
+    """Return a hash identifying a topology spec
+
+    Parameters
+    ----------
+    topology_spec : Tree
+        The topology subtree of the experiment parameters, including the
+        topology name
+
+    Returns
+    -------
+    key : str
+        The hexadecimal digest of the spec
+    """
+    return experiment_key(Tree(topology_spec))
+
+
+def build_topology_artefacts(experiments):
+    """Build each distinct topology of a list of experiments once, along
+    with its all pairs shortest paths.
+
+    Shortest paths are not computed for topologies which are only used by
+    experiments computing shortest paths lazily. Topologies are stored
+    pickled, so that each experiment can unpickle its own copy to place
+    caches and contents on, while shortest paths are shared read-only.
+
+    Parameters
+    ----------
+    experiments : iterable of Tree or of lists of Tree
+        Experiment parameters trees, possibly grouped by cache policy
+
+    Returns
+    -------
+    artefacts : dict
+        Dictionary mapping the key of each topology spec, as returned by
+        *topology_key*, to a (pickled topology, shortest paths) tuple. The
+        shortest paths are *None* if they were not computed. Topologies
+        which cannot be built are skipped, so that only the experiments
+        using them fail when building them.
+    """
+    topologies = {}
+    shortest_paths = {}
+    failed = set()
+    for params in experiments:
+        if isinstance(params, list):
+            params = params[0]
+        topology_spec = copy.deepcopy(params['topology'])
+        key = topology_key(topology_spec)
+        if key in failed:
+            continue
+        try:
+            if key not in topologies:
+                topology_name = topology_spec.pop('name')
+                if topology_name not in TOPOLOGY_FACTORY:
+                    # The experiment will fail and report it
+                    failed.add(key)
+                    continue
+                topology = TOPOLOGY_FACTORY[topology_name](**topology_spec)
+                topologies[key] = topology
+                shortest_paths[key] = None
+            netconf = params.get('netconf', {})
+            if shortest_paths[key] is None and not netconf.get('lazy_shortest_paths', False):
+                shortest_paths[key] = symmetrify_paths(
+                        dict(nx.all_pairs_dijkstra_path(topologies[key])))
+        except Exception as e:
+            # Experiments using this topology build it themselves, so that
+            # only they fail and report the error
+            logger.warning('Could not prebuild topology %s: %s'
+                           % (str(params['topology']), str(e)))
+            failed.add(key)
+            topologies.pop(key, None)
+            shortest_paths.pop(key, None)
+    return {key: (pickle.dumps(topologies[key], pickle.HIGHEST_PROTOCOL),
+                  shortest_paths[key])
+            for key in topologies}
+
 
 def run_scenario(settings, params, curr_exp, n_exp):
     """Run a single scenario experiment
@@ -176,10 +510,62 @@ def run_scenario(settings, params, curr_exp, n_exp):
         which stores all the attributes of the experiment. The second element
         is a dictionary which stores the results. The third element is an
         integer expressing the wall-clock duration of the experiment (in
-        seconds) 
+        seconds). If the experiment failed, results and duration are *None*
+    """
+    return run_multi_policy_scenario(settings, [params], curr_exp, n_exp)[0]
+
+
+def run_multi_policy_scenario(settings, params_list, curr_exp, n_exp):
+    """Run experiments of a scenario differing only by cache policy.
+
+    Topology, workload and content placement are created only once and the
+    workload is replayed once, feeding all cache policies in lockstep.
+    
+    Parameters
+    ----------
+    settings : Settings
+        The simulator settings
+    params_list : list of Tree
+        experiment parameters trees, all equal except for cache policy and
+        description
+    curr_exp : int
+        sequence number of the experiment
+    n_exp : int
+        Number of scheduled experiments
+    
+    Returns
+    -------
+    results : list
+        A list with a (params, results, duration) 3-tuple for each experiment,
+        as returned by *run_scenario*, with *None* results and duration for
+        each experiment if the scenario failed. The duration of each
+        experiment is the time spent processing events with its cache policy
+        plus an equal share of the time spent on everything else, e.g.
+        building the scenario and generating the workload.
+
+    Notes
+    -----
+    If the PROFILE setting is enabled, the results of each experiment include
+    a TIMING subtree with the duration of each phase of the run, the number of
+    events and the events processed per second during the simulation. With
+    multiple cache policies, these refer to the whole run.
     """
+    failed = [(params, None, None) for params in params_list]
+    profile = settings.PROFILE if 'PROFILE' in settings else False
+    profiler = cProfile.Profile() if profile == 'CPROFILE' else None
     try:
         start_time = time.time()
+        if profiler is not None:
+            profiler.enable()
+        timing = Tree()
+        phase_start = [start_time]
+
+        def end_phase(phase):
+            """Record the duration of a phase of the experiment"""
+            now = time.time()
+            timing[phase] = now - phase_start[0]
+            phase_start[0] = now
+
         proc_name = mp.current_process().name
         logger = logging.getLogger('runner-%s' % proc_name)
     
@@ -187,21 +573,30 @@ def run_scenario(settings, params, curr_exp, n_exp):
         metrics = settings.DATA_COLLECTORS
         
         # Copy parameters so that they can be manipulated
-        tree = copy.deepcopy(params)
+        tree = copy.deepcopy(params_list[0])
 
         # Text description of the scenario run to print on screen
         scenario = tree['desc'] if 'desc' in tree else "Description N/A"
+        if len(params_list) > 1:
+            scenario = "%s (and %d more cache policies)" % (scenario, len(params_list) - 1)
 
         logger.info('Experiment %d/%d | Preparing scenario: %s', curr_exp, n_exp, scenario)
 
-        # Set topology
+        # Set topology, using the prebuilt one if available
         topology_spec = tree['topology']
+        artefact = _TOPOLOGY_ARTEFACTS.get(topology_key(topology_spec))
         topology_name = topology_spec.pop('name')
         if topology_name not in TOPOLOGY_FACTORY:
             logger.error('No topology factory implementation for %s was found.'
                          % topology_name)
-            return None
-        topology = TOPOLOGY_FACTORY[topology_name](**topology_spec)
+            return failed
+        if artefact is not None:
+            topology = pickle.loads(artefact[0])
+            shortest_path = artefact[1]
+        else:
+            topology = TOPOLOGY_FACTORY[topology_name](**topology_spec)
+            shortest_path = None
+        end_phase('TOPOLOGY')
         logger.info('Experiment %d/%d | Preparing scenario: topology created, %s', curr_exp, n_exp, scenario)
 
         workload_spec = tree['workload']
@@ -209,8 +604,11 @@ def run_scenario(settings, params, curr_exp, n_exp):
         if workload_name not in WORKLOAD:
             logger.error('No workload implementation named %s was found.'
                          % workload_name)
-            return None
+            return failed
         workload = WORKLOAD[workload_name](topology, **workload_spec)
+        if profile:
+            workload = EventCounter(workload)
+        end_phase('WORKLOAD')
         logger.info('Experiment %d/%d | Preparing scenario: workload created, %s', curr_exp, n_exp, scenario)
 
         
@@ -221,7 +619,7 @@ def run_scenario(settings, params, curr_exp, n_exp):
             if cachepl_name not in CACHE_PLACEMENT:
                 logger.error('No cache placement named %s was found.'
                              % cachepl_name)
-                return None
+                return failed
             # Cache budget is the cumulative number of cache entries across
             # the whole network
             network_cache_all_nodes = cachepl_spec.pop('network_cache_all_nodes')
@@ -238,8 +636,9 @@ def run_scenario(settings, params, curr_exp, n_exp):
                 cachepl_spec['cache_budget'] = network_cache
             else:
                 logger.error('Either network cache per node or for all nodes needs to be set.')
-                return None
+                return failed
             CACHE_PLACEMENT[cachepl_name](topology, **cachepl_spec)
+        end_phase('CACHE_PLACEMENT')
         logger.info('Experiment %d/%d | Preparing scenario: cache placement finished, %s', curr_exp, n_exp, scenario)
 
 
@@ -252,8 +651,9 @@ def run_scenario(settings, params, curr_exp, n_exp):
         if contpl_name not in CONTENT_PLACEMENT:
             logger.error('No content placement implementation named %s was found.'
                          % contpl_name)
-            return None
+            return failed
         CONTENT_PLACEMENT[contpl_name](topology, workload.contents, **contpl_spec)
+        end_phase('CONTENT_PLACEMENT')
         logger.info('Experiment %d/%d | Preparing scenario: content placement finished, %s', curr_exp, n_exp, scenario)
 
 
@@ -261,36 +661,130 @@ def run_scenario(settings, params, curr_exp, n_exp):
         strategy = tree['strategy']
         if strategy['name'] not in STRATEGY:
             logger.error('No implementation of strategy %s was found.' % strategy['name'])
-            return None
+            return failed
         
         # cache eviction policy definition
-        cache_policy = tree['cache_policy']
-        if cache_policy['name'] not in CACHE_POLICY:
-            logger.error('No implementation of cache policy %s was found.' % cache_policy['name'])
-            return None
+        cache_policies = [copy.deepcopy(params['cache_policy']) for params in params_list]
+        for cache_policy in cache_policies:
+            if cache_policy['name'] not in CACHE_POLICY:
+                logger.error('No implementation of cache policy %s was found.' % cache_policy['name'])
+                return failed
         
         # Configuration parameters of network model
-        netconf = tree['netconf']
+        netconf = dict(tree['netconf'])
+        if shortest_path is not None and 'shortest_path' not in netconf \
+                and not netconf.get('lazy_shortest_paths', False):
+            netconf['shortest_path'] = shortest_path
         
         if any(m not in DATA_COLLECTOR for m in metrics):
             logger.error('There are no implementations for at least one data collector specified')
-            return None
+            return failed
     
         collectors = metrics
 
         logger.info('Experiment %d/%d | Start simulation, %s', curr_exp, n_exp, scenario)
-        results = exec_experiment(topology, workload, netconf, strategy, cache_policy, collectors, scenario)
+        if len(cache_policies) == 1:
+            results = [exec_experiment(topology, workload, netconf, strategy, cache_policies[0], collectors, scenario)]
+            policy_durations = None
+        else:
+            results, policy_durations = exec_multi_policy_experiment(
+                    topology, workload, netconf, strategy, cache_policies,
+                    collectors, scenario, return_durations=True)
+        end_phase('SIMULATION')
 
         duration = time.time() - start_time
+        if profile:
+            timing['TOTAL'] = duration
+            timing['EVENTS'] = workload.n_events
+            timing['EVENTS_PER_SECOND'] = workload.n_events / timing['SIMULATION'] \
+                                          if timing['SIMULATION'] > 0 else None
+            if profiler is not None:
+                profiler.disable()
+                timing['PROFILE_FILE'] = dump_profile(profiler, settings.PROFILE_DIR,
+                                                      params_list[0], curr_exp)
+            for res in results:
+                res['TIMING'] = copy.deepcopy(timing)
         logger.info('Experiment %d/%d | End simulation %s | Duration %s.',
                     curr_exp, n_exp, scenario, timestr(duration, True))
-        return params, results, duration
+        if policy_durations is None:
+            durations = [duration]
+        else:
+            # Each experiment takes the processing time of its own cache policy
+            # and an equal share of the time spent on everything else
+            shared = (duration - sum(policy_durations)) / len(params_list)
+            durations = [shared + d for d in policy_durations]
+        return [(params, res, d) for params, res, d in zip(params_list, results, durations)]
     except KeyboardInterrupt:
         logger.error('Received keyboard interrupt. Terminating')
         sys.exit(-signal.SIGINT)
     except Exception as e:
-        err_type = str(type(e)).split("'")[1].split(".")[1]
-        err_message = e.message
+        err_type = type(e).__name__
+        err_message = str(e)
         logger.error('Experiment %d/%d | Failed | %s: %s\n%s',
                      curr_exp, n_exp, err_type, err_message,
                      traceback.format_exc())
+        return failed
+    finally:
+        if profiler is not None:
+            profiler.disable()
+
+
+class EventCounter(object):
+    """Wrapper of a workload counting the events it yields.
+
+    All attributes of the wrapped workload can be accessed through the
+    wrapper.
+    """
+
+    def __init__(self, workload):
+        """Constructor
+
+        Parameters
+        ----------
+        workload : iterable
+            The workload
+        """
+        self.workload = workload
+        self.n_events = 0
+        if hasattr(workload, 'batches'):
+            self.batches = self._batches
+
+    def __getattr__(self, name):
+        return getattr(self.workload, name)
+
+    def __iter__(self):
+        for event in self.workload:
+            self.n_events += 1
+            yield event
+
+    def _batches(self):
+        for batch in self.workload.batches():
+            self.n_events += len(batch)
+            yield batch
+
+
+def dump_profile(profiler, profile_dir, params, curr_exp):
+    """Dump the statistics of a profiled experiment to a file.
+
+    Parameters
+    ----------
+    profiler : cProfile.Profile
+        The profiler
+    profile_dir : str
+        The directory in which the file is created, if not existing already
+    params : Tree
+        The experiment parameters
+    curr_exp : int
+        The sequence number of the experiment
+
+    Returns
+    -------
+    path : str
+        The path of the file, named after the sequence number and the key of
+        the experiment. Statistics can be read with the pstats module
+    """
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, 'experiment-%d-%s.prof'
+                        % (curr_exp, experiment_key(params)[:10]))
+    profiler.dump_stats(path)
+    return path
@@ -27,6 +27,9 @@ RESULTS_READER = {}
 # Dictionary storying all results writer functions keyed by ID
 RESULTS_WRITER = {}
 
+# Dictionary storying all results appender functions keyed by ID
+RESULTS_APPENDER = {}
+
 def register_decorator(register):
     """Returns a decorator that register a class or function to a specified
     register
@@ -66,3 +69,4 @@ register_workload = register_decorator(WORKLOAD)
 register_data_collector = register_decorator(DATA_COLLECTOR)
 register_results_reader = register_decorator(RESULTS_READER)
 register_results_writer = register_decorator(RESULTS_WRITER)
+register_results_appender = register_decorator(RESULTS_APPENDER)
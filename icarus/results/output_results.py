@@ -1,7 +1,9 @@
 import csv
 import os
+import numpy as np
 from collections import defaultdict
 from icarus.io.readwrite import read_results
+from icarus.io.columnar import ColumnarResults
 from icarus.results.visualize import draw_cache_hit_ratios, create_result_evolution_plots
 
 def print_results_full(filename, format):
@@ -12,12 +14,43 @@ def print_results_full(filename, format):
             print(k)
         print('')
 
+# Columnar tables already loaded, keyed by path and modification time
+_columnar_results = {}
+
+
+def read_columnar_results(filename, format):
+    """Return the columnar table of the parameters and scalar results of a
+    results file.
+
+    The table is exported next to the results file, with an additional .npz
+    extension, the first time it is requested or if the results file changed
+    since. Later requests only load the table, without reading the results.
+    """
+    path = '%s%s' % (filename, format)
+    columnar_path = path + '.npz'
+    if not os.path.isfile(columnar_path) or \
+            os.path.getmtime(columnar_path) < os.path.getmtime(path):
+        ColumnarResults.from_results(read_results(path, format)).save(columnar_path)
+    key = (columnar_path, os.path.getmtime(columnar_path))
+    if key not in _columnar_results:
+        _columnar_results.clear()
+        _columnar_results[key] = ColumnarResults.load(columnar_path)
+    return _columnar_results[key]
+
+
 def provide_result_dictionary(filename, format, goal_tuple):
     f = lambda: defaultdict(f)
     rates = defaultdict(f)
     descriptions = []
 
-    for tree in read_results('%s%s' % (filename, format), format):
+    # Only the experiments with the requested result are read, along with
+    # that result
+    table = read_columnar_results(filename, format)
+    goal = table.metric(goal_tuple)
+    present = np.not_equal(goal, None) if goal.dtype == object else ~np.isnan(goal)
+    table = ColumnarResults(table.parameters, {goal_tuple: goal}).select(present)
+
+    for tree in table.items():
         topology_params, trace_params, synthetic_experiment_params, policy_params, strategy, cache_size = determine_parameters(
             tree)
 
@@ -309,7 +342,7 @@ def generate_result_evolution_plots(trace_abbreviation, percentages, weights, ca
     for weighted_or_not in ['weighted', 'unweighted']:
         for cache_size in cache_sizes:
             file_name = 'results-%s-%s-c%d' % (weighted_or_not, trace_abbreviation, cache_size)
-            format = '.spickle'
+            format = '.records' if os.path.isfile(file_name + '.records') else '.spickle'
 
             try:
                 for metric_description in combinations:
@@ -0,0 +1,237 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import os
+import shutil
+import tempfile
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from icarus.io import ResultSet, StreamedResultSet, ResultsJournal
+from icarus.io.readwrite import read_results
+from icarus.io.records import RecordFile, write_records, append_records
+from icarus.io.columnar import ColumnarResults
+from icarus.registry import RESULTS_READER, RESULTS_WRITER
+from icarus.util import Tree
+
+
+class TestResultsJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'results.journal')
+        self.records = [(Tree({'alpha': i}), Tree({'m': {'MEAN': i / 10.0}}))
+                        for i in range(3)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, records, resume=False):
+        journal = ResultsJournal(self.path, resume)
+        for params, results in records:
+            journal.append(params, results)
+        journal.close()
+        return journal
+
+    def test_append(self):
+        journal = self.write(self.records)
+        self.assertEqual(self.records, list(journal))
+
+    def test_truncated_record(self):
+        self.write(self.records)
+        size = os.path.getsize(self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(size - 5)
+        self.assertEqual(self.records[:2], list(ResultsJournal(self.path, True)))
+        # The truncated record is dropped before appending new ones
+        journal = self.write(self.records[2:], resume=True)
+        self.assertEqual(self.records, list(journal))
+
+    def test_no_resume(self):
+        self.write(self.records)
+        journal = self.write(self.records[:1])
+        self.assertEqual(self.records[:1], list(journal))
+        # The previous journal is rotated, not truncated
+        self.assertEqual(self.records, list(ResultsJournal(self.path + '.1', True)))
+        self.write([])
+        self.assertFalse(os.path.exists(self.path + '.3'))
+        self.assertEqual(self.records[:1], list(ResultsJournal(self.path + '.2', True)))
+
+
+class TestStreamedResultSet(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'results.spickle')
+        self.rs = StreamedResultSet(self.path, 'SPICKLE', create=True)
+        self.rs.add({'alpha': 1, 'beta': 'x\n\ny'}, {'m': 1})
+        self.rs.add({'alpha': 2}, {'m': [1, 2]})
+        self.rs.add({'alpha': 1}, {'m': 3})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_read(self):
+        rs = StreamedResultSet(self.path, 'SPICKLE')
+        self.assertEqual(3, len(rs))
+        self.assertEqual(self.rs.dump(), rs.dump())
+        self.assertEqual(self.rs.dump(), list(RESULTS_READER['SPICKLE'](self.path)))
+        self.assertEqual('x\n\ny', rs[0][0]['beta'])
+        self.assertEqual({'m': 3}, rs[-1][1])
+        self.assertRaises(IndexError, lambda: rs[3])
+
+    def test_filter(self):
+        filtered = self.rs.filter({'alpha': 1})
+        self.assertIsInstance(filtered, ResultSet)
+        self.assertEqual([1, 3], [r['m'] for _, r in filtered])
+
+    def test_same_as_writer(self):
+        rs = ResultSet()
+        for params, results in self.rs:
+            rs.add(params, results)
+        path = os.path.join(self.tmpdir, 'written.spickle')
+        RESULTS_WRITER['SPICKLE'](rs, path)
+        with open(path, 'rb') as written, open(self.path, 'rb') as streamed:
+            self.assertEqual(written.read(), streamed.read())
+
+    def test_format(self):
+        self.assertRaises(ValueError, StreamedResultSet, self.path, 'PICKLE')
+
+
+class TestRecordFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'results.records')
+        self.records = [(Tree({'alpha': i}), Tree({'m': list(range(i))}))
+                        for i in range(10)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_write_read(self):
+        write_records(self.records, self.path)
+        records = RecordFile(self.path)
+        self.assertEqual(10, len(records))
+        self.assertEqual(self.records, list(records))
+        self.assertEqual(self.records[7], records[7])
+        self.assertEqual(self.records[-1], records[-1])
+        self.assertRaises(IndexError, lambda: records[10])
+
+    def test_gzip(self):
+        write_records(self.records, self.path, 'gzip')
+        self.assertEqual('gzip', RecordFile(self.path).compression)
+        self.assertEqual(self.records, list(RecordFile(self.path)))
+        self.assertRaises(ValueError, write_records, self.records, self.path, 'lzma')
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd(self):
+        write_records(self.records, self.path, 'zstd')
+        self.assertEqual(self.records, list(RecordFile(self.path)))
+
+    def test_append(self):
+        append_records(self.records[:4], self.path, 'gzip')
+        # Existing files keep their compression
+        append_records(self.records[4:], self.path)
+        records = RecordFile(self.path)
+        self.assertEqual('gzip', records.compression)
+        self.assertEqual(self.records, list(records))
+        self.assertEqual(self.records[5], records[5])
+
+    def test_rebuild_index(self):
+        write_records(self.records, self.path)
+        os.remove(self.path + '.idx')
+        self.assertEqual(self.records[3], RecordFile(self.path)[3])
+        self.assertTrue(os.path.exists(self.path + '.idx'))
+        # Index missing the last records
+        with open(self.path + '.idx', 'r+b') as f:
+            f.truncate(16)
+        self.assertEqual(10, len(RecordFile(self.path)))
+
+    def test_truncated_record(self):
+        write_records(self.records, self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+        self.assertEqual(self.records[:9], list(RecordFile(self.path)))
+        self.assertEqual(9, len(RecordFile(self.path)))
+        append_records(self.records[9:], self.path)
+        self.assertEqual(self.records, list(RecordFile(self.path)))
+
+    def test_read_results_by_header(self):
+        path = os.path.join(self.tmpdir, 'results.pickle')
+        write_records(self.records, path)
+        self.assertEqual(self.records, list(read_results(path, '.pickle')))
+
+    def test_streamed_result_set(self):
+        for fmt in ('RECORDS', 'RECORDS_GZIP'):
+            rs = StreamedResultSet(self.path, fmt, create=True)
+            self.assertEqual([], list(rs))
+            for params, results in self.records:
+                rs.add(params, results)
+            rs = StreamedResultSet(self.path, fmt)
+            self.assertEqual(10, len(rs))
+            self.assertEqual(self.records[2], rs[2])
+            self.assertEqual(self.records, list(RESULTS_READER[fmt](self.path)))
+
+
+class TestColumnarResults(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.rs = ResultSet()
+        for i, policy in enumerate(['LRU', 'DSCA', 'DSCA', 'SS']):
+            params = Tree({'cache_policy': {'name': policy},
+                           'workload': {'n_measured': 100 * i, 'alpha': 0.5 * i}})
+            if policy == 'DSCA':
+                params['cache_policy']['window_size'] = 10 * i
+            results = Tree({'CACHE_HIT_RATIO': {'MEAN': i / 10.0},
+                            'LATENCY': {'CDF': [1, 2, 3]}})
+            self.rs.add(params, results)
+        self.table = ColumnarResults.from_results(self.rs)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_columns(self):
+        self.assertEqual(4, len(self.table))
+        self.assertEqual(['LRU', 'DSCA', 'DSCA', 'SS'],
+                         self.table.parameter(('cache_policy', 'name')).tolist())
+        self.assertEqual('int64', str(self.table.parameter(('workload', 'n_measured')).dtype))
+        self.assertEqual([0, 0.1, 0.2, 0.3],
+                         self.table.metric(('CACHE_HIT_RATIO', 'MEAN')).tolist())
+        # Non-scalar results are not stored
+        self.assertNotIn(('LATENCY', 'CDF'), self.table.results)
+
+    def test_filter(self):
+        for condition in [{'cache_policy': {'name': 'DSCA'}},
+                          {'cache_policy': {'name': 'DSCA', 'window_size': 20}},
+                          {'cache_policy': {'window_size': None}},
+                          {'workload': {'alpha': 1.0}},
+                          {'workload': {'alpha': 'x'}},
+                          {'topology': {'name': 'PATH'}}]:
+            expected = [(p, Tree({'CACHE_HIT_RATIO': r['CACHE_HIT_RATIO']}))
+                        for p, r in self.rs.filter(condition)]
+            self.assertEqual(expected, list(self.table.filter(condition)))
+
+    def test_row(self):
+        params, results = self.table[1]
+        self.assertEqual(self.rs[1][0], params)
+        self.assertIsInstance(params['workload']['n_measured'], int)
+        self.assertEqual(0.1, results['CACHE_HIT_RATIO']['MEAN'])
+        self.assertRaises(IndexError, lambda: self.table[4])
+
+    def test_save_load(self):
+        path = os.path.join(self.tmpdir, 'results.npz')
+        RESULTS_WRITER['COLUMNAR'](self.rs, path)
+        table = RESULTS_READER['COLUMNAR'](path)
+        self.assertEqual(list(self.table), list(table))
+        self.assertEqual(list(self.table.items()), list(table.items()))
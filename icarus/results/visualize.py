@@ -18,7 +18,9 @@ __all__ = [
        'draw_stack_deployment',
        'draw_network_load',
        'draw_cache_level_proportions',
-       'draw_cache_hit_ratios'
+       'draw_cache_hit_ratios',
+       'draw_miss_ratio_curves',
+       'add_miss_ratio_curve'
           ]
 
 
@@ -224,6 +226,64 @@ def draw_cache_hit_ratios(results, data_desc):
     plt.close()
 
 
+def draw_miss_ratio_curves(curves, filename, plotdir, hit_ratio=False):
+    """Draw miss ratio curves, e.g. as computed by
+    *icarus.tools.miss_ratio_curve*
+
+    Parameters
+    ----------
+    curves : dict
+        Dictionary mapping the label of each curve to a (cache sizes, miss
+        ratios) tuple
+    filename : string
+        The name of the image file to save
+    plotdir : string
+        The directory onto which draw plots
+    hit_ratio : bool, optional
+        If *True*, plot the cache hit ratio instead of the miss ratio
+    """
+    if not os.path.isdir(plotdir):
+        os.makedirs(plotdir)
+    plt.figure()
+    for label in sorted(curves):
+        cache_sizes, miss_ratios = curves[label]
+        values = 1 - np.asarray(miss_ratios) if hit_ratio else miss_ratios
+        plt.plot(cache_sizes, values, '-', linewidth=2, label=label)
+    plt.xlabel('cache size')
+    plt.ylabel('cache hit ratio' if hit_ratio else 'miss ratio')
+    plt.ylim([0, 1])
+    plt.legend(loc='best')
+    plt.savefig(os.path.join(plotdir, filename), bbox_inches='tight')
+    plt.close()
+
+
+def add_miss_ratio_curve(plot_rates, cache_sizes, miss_ratios, policy='MRC'):
+    """Add the cache hit ratios of a miss ratio curve to every subplot of
+    the *plot_rates* passed to *create_result_evolution_plots* when the cache
+    size is the x-axis parameter.
+
+    The name of the curve must be in the *policy_order* passed to
+    *create_result_evolution_plots*.
+
+    Parameters
+    ----------
+    plot_rates : dict
+        Nested dictionary keyed by first parameter, second parameter, policy
+        and cache size
+    cache_sizes : array-like
+        The cache sizes of the miss ratio curve
+    miss_ratios : array-like
+        The miss ratio at each cache size
+    policy : str, optional
+        The name of the curve in the plots
+    """
+    for param1 in plot_rates:
+        for param2 in plot_rates[param1]:
+            plot_rates[param1][param2][policy] = {
+                int(size): 1.0 - float(miss_ratio)
+                for size, miss_ratio in zip(cache_sizes, miss_ratios)}
+
+
 def create_result_evolution_plots(plot_rates, data_desc, metric_name, param_names, policy_order):
     filename = '%s.png' % data_desc
     plotdir = 'plots/cache_hit_rate_evolution/'
@@ -243,9 +303,9 @@ def create_result_evolution_plots(plot_rates, data_desc, metric_name, param_name
     plots = []
     policy_names = []
 
-    policy_colors = {'ARC': 0, 'LRU': 1, 'KLRU': 1, 'DSCA': 2, '2DSCA': 3, 'DSCAAWS': 4, '2DSCAAWS': 5}
+    policy_colors = {'ARC': 0, 'LRU': 1, 'KLRU': 1, 'DSCA': 2, '2DSCA': 3, 'DSCAAWS': 4, '2DSCAAWS': 5, 'MRC': 6}
     policy_linestyles = {'1': 'solid', '4': 'dashed', '16': 'dashdot', '64': 'dotted', '(2,1)': 'dashed'}
-    policy_markers = {'ARC': '>', 'LRU': '<', 'KLRU': '^', 'DSCA': 'v', '2DSCA': 'o', 'DSCAAWS': '+', '2DSCAAWS': '8'}
+    policy_markers = {'ARC': '>', 'LRU': '<', 'KLRU': '^', 'DSCA': 'v', '2DSCA': 'o', 'DSCAAWS': '+', '2DSCAAWS': '8', 'MRC': ''}
 
     cmap = plt.get_cmap('nipy_spectral')
     norm = Normalize(0, len(policy_colors) - 1)
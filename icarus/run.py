@@ -9,8 +9,9 @@ import logging
 import multiprocessing as mp
 
 from icarus.util import Settings, config_logging
-from icarus.registry import RESULTS_WRITER
+from icarus.registry import RESULTS_WRITER, RESULTS_APPENDER
 from icarus.orchestration import Orchestrator
+from icarus.io import ResultsJournal, StreamedResultSet, rotate_file
 
 
 __all__ = ['run', 'handler']
@@ -18,6 +19,11 @@ __all__ = ['run', 'handler']
 
 logger = logging.getLogger('main')
 
+# Results formats whose files are flushed to disk as each result is appended
+# and whose readers drop a truncated last result, so that a streamed results
+# file can serve as the journal of the campaign
+JOURNALED_FORMATS = ('RECORDS', 'RECORDS_GZIP', 'RECORDS_ZSTD')
+
 
 def handler(settings, orch, output, signum=None, frame=None):
     """Signal handler
@@ -37,7 +43,9 @@ def handler(settings, orch, output, signum=None, frame=None):
         The output file
     """
     logger.error('Received signal %d. Terminating' % signum)
-    RESULTS_WRITER[settings.RESULTS_FORMAT](orch.results, output)
+    # Streamed results are already in the file
+    if not settings.STREAM_RESULTS:
+        RESULTS_WRITER[settings.RESULTS_FORMAT](orch.results, output)
     logger.info('Saved intermediate results to file %s' % os.path.abspath(output))
     orch.stop()
     sys.exit(-signum)
@@ -67,6 +75,23 @@ def _validate_settings(settings, freeze=True):
         settings.RESULTS_FORMAT = res_format
         logger.warning('RESULTS_FORMAT setting not specified. Set to %s'
                      % res_format)
+    if 'STREAM_RESULTS' not in settings:
+        settings.STREAM_RESULTS = False
+    elif settings.STREAM_RESULTS and settings.RESULTS_FORMAT not in RESULTS_APPENDER:
+        logger.error('Results format %s does not support streaming results. '
+                     'Exiting' % settings.RESULTS_FORMAT)
+        sys.exit(-1)
+    if 'MULTI_POLICY_REPLAY' not in settings:
+        settings.MULTI_POLICY_REPLAY = False
+    if 'SHARE_TOPOLOGIES' not in settings:
+        settings.SHARE_TOPOLOGIES = False
+    if 'PROFILE' not in settings:
+        settings.PROFILE = False
+    elif settings.PROFILE not in (False, True, 'CPROFILE'):
+        logger.error('PROFILE must be either False, True or CPROFILE. Exiting')
+        sys.exit(-1)
+    if 'PROFILE_DIR' not in settings:
+        settings.PROFILE_DIR = 'profiles'
     if 'LOG_LEVEL' not in settings:
         log_level = 'INFO'
         settings.LOG_LEVEL = log_level
@@ -76,11 +101,18 @@ def _validate_settings(settings, freeze=True):
         settings.freeze()
 
 
-def run(config_file, output, config_override):
+def run(config_file, output, config_override, resume=False):
     """ 
     Run function. It starts the simulator.
     experiments
     
+    The results of each experiment are also appended, as soon as it
+    completes, to a journal file named after the output file with a
+    *.journal* suffix, which is removed once all results are saved. If
+    results are streamed in a RECORDS format, the results file itself is the
+    journal. Unless resuming, the journal of a previous run is not
+    overwritten but rotated.
+    
     Parameters
     ----------
     config_file : str
@@ -89,6 +121,9 @@ def run(config_file, output, config_override):
         The file name where results will be saved
     config_override : dict, optional
         Configuration parameters overriding parameters in the file
+    resume : bool, optional
+        If *True*, experiments whose results are in the journal of a previous
+        run are not run again
     """
     # Read settings from file and save them in icarus.conf.settings
     settings = Settings()
@@ -105,12 +140,34 @@ def run(config_file, output, config_override):
     # Validate settings
     _validate_settings(settings, freeze=True)
     # set up orchestration
-    orch = Orchestrator(settings)
+    if settings.STREAM_RESULTS and settings.RESULTS_FORMAT in JOURNALED_FORMATS:
+        journal_path = output
+    else:
+        journal_path = output + '.journal'
+    if not resume:
+        rotated_path = rotate_file(journal_path)
+        if rotated_path is not None:
+            logger.warning('Moved results of a previous run from %s to %s. '
+                           'Run with --resume to resume it'
+                           % (journal_path, rotated_path))
+    if journal_path == output:
+        journal = None
+        results = StreamedResultSet(output, settings.RESULTS_FORMAT,
+                                    create=not os.path.exists(output))
+    else:
+        journal = ResultsJournal(journal_path, resume=resume)
+        results = StreamedResultSet(output, settings.RESULTS_FORMAT, create=True) \
+                  if settings.STREAM_RESULTS else None
+    orch = Orchestrator(settings, journal=journal, results=results)
     for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGQUIT, signal.SIGABRT):
         signal.signal(sig, functools.partial(handler, settings, orch, output))
     logger.info('Launching orchestrator')
     orch.run()
     logger.info('Orchestrator finished')
-    results = orch.results
-    RESULTS_WRITER[settings.RESULTS_FORMAT](results, output)
+    if not settings.STREAM_RESULTS:
+        RESULTS_WRITER[settings.RESULTS_FORMAT](orch.results, output)
+    if journal is not None:
+        # All results are saved, the journal is not needed anymore
+        journal.close()
+        os.remove(journal.path)
     logger.info('Saved results to file %s' % os.path.abspath(output))
@@ -7,8 +7,16 @@ else:
     except ImportError:
         raise ImportError("The unittest2 package is needed to run the tests.") 
 del sys
+import os
+import shutil
+import tempfile
 
 import icarus.scenarios as workload
+from icarus.registry import TOPOLOGY_FACTORY
+from icarus.scenarios.workload import read_trace, read_trace_blocks, \
+                                      assign_weights
+from icarus.tools import binary_trace_path, open_binary_trace, \
+                         trace_index_path, trace_content_index
 
 
 class TestYCBS(unittest.TestCase):
@@ -77,3 +85,174 @@ class TestYCBS(unittest.TestCase):
         self.assertTrue(ev_3['log'])
         self.assertIn(ev_3['item'], list(range(1, n_items+1)))
         self.assertEqual(ev_3['op'], "READ")
+
+    def test_blocks(self):
+        events = list(workload.YCSBWorkload("B", 100, 1000, 9000, seed=1, block_size=256))
+        self.assertEqual(10000, len(events))
+        self.assertEqual(events, list(workload.YCSBWorkload("B", 100, 1000, 9000, seed=1,
+                                                            block_size=256)))
+        self.assertEqual(1000, sum(not ev['log'] for ev in events))
+        reads = sum(ev['op'] == "READ" for ev in events) / float(len(events))
+        self.assertLess(abs(reads - 0.95), 0.01)
+        self.assertTrue(all(1 <= ev['item'] <= 100 for ev in events))
+
+
+class TestStationaryWorkload(unittest.TestCase):
+
+    def setUp(self):
+        self.topology = TOPOLOGY_FACTORY['TREE'](k=2, h=2)
+
+    def test_blocks(self):
+        n_contents = 20
+        w = workload.StationaryWorkload(self.topology, n_contents, 0.8,
+                                        n_warmup=50, n_measured=200, seed=1,
+                                        block_size=64)
+        events = list(w)
+        self.assertEqual(250, len(events))
+        self.assertEqual(events, list(w))
+        times = [t for t, _ in events]
+        self.assertEqual(sorted(times), times)
+        self.assertEqual(50, sum(not ev['log'] for _, ev in events))
+        self.assertFalse(events[49][1]['log'])
+        self.assertTrue(events[50][1]['log'])
+        for _, ev in events:
+            self.assertIn(ev['receiver'], w.receivers)
+            self.assertIn(ev['content'], w.contents)
+        self.assertEqual(set(w.receivers), set(ev['receiver'] for _, ev in events))
+
+    def test_batches(self):
+        for block_size in (64, None):
+            w = workload.StationaryWorkload(self.topology, 20, 0.8,
+                                            n_warmup=50, n_measured=200,
+                                            seed=1, block_size=block_size)
+            batches = list(w.batches())
+            self.assertEqual(250, sum(len(batch) for batch in batches))
+            events = [ev for batch in batches for ev in batch]
+            if block_size:
+                self.assertEqual(4, len(batches))
+                self.assertEqual(list(w), events)
+            self.assertEqual(50, sum(not ev['log'] for _, ev in events))
+            for _, ev in events:
+                self.assertIn(ev['receiver'], w.receivers)
+
+    def test_seed(self):
+        w = lambda seed, block_size: list(workload.StationaryWorkload(
+                    self.topology, 20, 0.8, n_warmup=10, n_measured=100,
+                    seed=seed, block_size=block_size))
+        self.assertEqual(w(1, 32), w(1, 32))
+        self.assertNotEqual(w(1, 32), w(2, 32))
+        self.assertEqual(110, len(w(1, None)))
+
+
+class TestReadTrace(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.reqs_file = os.path.join(self.tmp_dir, 'trace.csv')
+        self.requests = [(0.5, 1, 10), (1.0, 2, 20), (1.5, 1, 10),
+                         (2.25, 3, 2**40)]
+        with open(self.reqs_file, 'w') as f:
+            for t, receiver, content in self.requests:
+                f.write('%r,%d,%d\n' % (t, receiver, content))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_csv(self):
+        requests = [(t, int(r), c) for t, r, c in read_trace(self.reqs_file)]
+        self.assertEqual(self.requests, requests)
+        self.assertFalse(os.path.exists(binary_trace_path(self.reqs_file)))
+
+    def test_binary(self):
+        requests = list(read_trace(self.reqs_file, binary_trace=True))
+        self.assertEqual(self.requests, requests)
+        self.assertTrue(os.path.exists(binary_trace_path(self.reqs_file)))
+        self.assertEqual(len(self.requests), len(open_binary_trace(self.reqs_file)))
+
+    def test_binary_n_requests(self):
+        requests = list(read_trace(self.reqs_file, binary_trace=True, n_requests=2))
+        self.assertEqual(self.requests[:2], requests)
+
+    def test_binary_stale(self):
+        list(read_trace(self.reqs_file, binary_trace=True))
+        with open(self.reqs_file, 'a') as f:
+            f.write('3.0,2,30\n')
+        mtime = os.path.getmtime(binary_trace_path(self.reqs_file))
+        os.utime(self.reqs_file, (mtime + 1, mtime + 1))
+        self.assertIsNone(open_binary_trace(self.reqs_file))
+        requests = list(read_trace(self.reqs_file, binary_trace=True))
+        self.assertEqual(self.requests + [(3.0, 2, 30)], requests)
+
+    def test_blocks(self):
+        for binary_trace in (False, True):
+            blocks = list(read_trace_blocks(self.reqs_file, binary_trace,
+                                            n_requests=3, block_size=2))
+            self.assertEqual([2, 1], [len(times) for times, _, _ in blocks])
+            requests = [(t, int(r), c) for times, receivers, contents in blocks
+                        for t, r, c in zip(times.tolist(), receivers.tolist(),
+                                           contents.tolist())]
+            self.assertEqual(self.requests[:3], requests)
+
+    def test_deterministic_workload_batches(self):
+        topology = TOPOLOGY_FACTORY['PATH'](n=4)
+        for binary_trace in (False, True):
+            w = workload.DeterministicTraceDrivenWorkload(
+                        topology, self.reqs_file, n_warmup=1, n_measured=3,
+                        binary_trace=binary_trace)
+            events = [ev for batch in w.batches() for ev in batch]
+            self.assertEqual(list(w), events)
+            self.assertEqual(2**40, events[-1][1]['content'])
+            self.assertFalse(events[0][1]['log'])
+        w.n_measured = 4
+        self.assertRaises(ValueError, list, w.batches())
+
+    def test_binary_fallback(self):
+        with open(self.reqs_file, 'a') as f:
+            f.write('3.0,receiver,30\n')
+        requests = list(read_trace(self.reqs_file, binary_trace=True))
+        self.assertEqual(5, len(requests))
+        self.assertFalse(os.path.exists(binary_trace_path(self.reqs_file)))
+
+
+class TestAssignWeights(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.reqs_file = os.path.join(self.tmp_dir, 'trace.csv')
+        with open(self.reqs_file, 'w') as f:
+            f.write('0.5,1,30\n1.0,2,10\n1.5,1,30\n2.0,1,20\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_uniform(self):
+        n_contents, contents = assign_weights('UNIFORM', self.reqs_file)
+        self.assertEqual(3, n_contents)
+        self.assertEqual([30, 10, 20], list(contents))
+        self.assertEqual({30: 1, 10: 1, 20: 1}, contents)
+        self.assertTrue(os.path.exists(trace_index_path(self.reqs_file)))
+        self.assertEqual((n_contents, contents),
+                         assign_weights(None, self.reqs_file))
+
+    def test_index(self):
+        index = trace_content_index(self.reqs_file)
+        self.assertEqual(4, index['n_requests'])
+        self.assertEqual([30, 10, 20], index['contents'].tolist())
+        self.assertEqual([2, 1, 1], index['counts'].tolist())
+        self.assertEqual(index['checksum'],
+                         trace_content_index(self.reqs_file)['checksum'])
+
+    def test_index_invalidation(self):
+        checksum = trace_content_index(self.reqs_file)['checksum']
+        with open(self.reqs_file, 'a') as f:
+            f.write('2.5,2,40\n')
+        index = trace_content_index(self.reqs_file)
+        self.assertNotEqual(checksum, index['checksum'])
+        self.assertEqual(5, index['n_requests'])
+        self.assertEqual([30, 10, 20, 40], index['contents'].tolist())
+
+    def test_index_touched(self):
+        checksum = trace_content_index(self.reqs_file)['checksum']
+        stat = os.stat(self.reqs_file)
+        os.utime(self.reqs_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(checksum, trace_content_index(self.reqs_file)['checksum'])
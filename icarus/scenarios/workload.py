@@ -16,24 +16,145 @@ following attributes:
 
 Each workload must expose the `contents` attribute which is an iterable of
 all content identifiers. This is needed for content placement.
+
+Workloads of requests can also implement a `batches` method returning an
+iterator over `EventBatch` objects, each of them holding the attributes of a
+block of consecutive requests in NumPy arrays. The simulation engine then
+delivers whole batches to strategies instead of one event at a time, which
+saves the allocation of a dictionary per request. Iterating over the batches
+must yield the same requests as iterating over the workload.
 """
 import random
 import csv
+import logging
+import itertools
 
 import networkx as nx
+import numpy as np
 
-from icarus.tools import TruncatedMandelbrotZipfDist
+from icarus.tools import TruncatedMandelbrotZipfDist, open_binary_trace, \
+                         iter_binary_trace, trace_content_index
 from icarus.registry import register_workload
 
 __all__ = [
+        'EventBatch',
         'StationaryWorkload',
         'GlobetraffWorkload',
         'TraceDrivenWorkload',
         'YCSBWorkload',
-        'DeterministicTraceDriveWorkload'
+        'DeterministicTraceDrivenWorkload'
            ]
 
 
+logger = logging.getLogger('workload')
+
+
+# Number of requests of the batches of workloads which do not draw or read
+# their requests in blocks already
+BATCH_SIZE = 2**16
+
+
+class EventBatch(object):
+    """Block of consecutive requests of a workload.
+
+    Each attribute is a NumPy array with one element per request.
+
+    Attributes
+    ----------
+    times : numpy.ndarray
+        The timestamps of the requests
+    receivers : numpy.ndarray
+        The receivers issuing the requests, an object array unless receivers
+        are integers
+    contents : numpy.ndarray
+        The requested contents
+    log : numpy.ndarray
+        Boolean array indicating which requests are logged
+    weights : numpy.ndarray
+        The weights of the requested contents
+    """
+
+    def __init__(self, times, receivers, contents, log, weights):
+        """Constructor
+
+        Parameters
+        ----------
+        times, receivers, contents, log, weights : array-like
+            The attributes of the requests, all of the same length
+        """
+        self.times = np.asarray(times)
+        self.receivers = receivers if isinstance(receivers, np.ndarray) \
+                         else _object_array(receivers)
+        self.contents = np.asarray(contents)
+        self.log = np.asarray(log, dtype=bool)
+        self.weights = np.asarray(weights)
+        if not (len(self.times) == len(self.receivers) == len(self.contents)
+                == len(self.log) == len(self.weights)):
+            raise ValueError('All attributes must have the same length')
+
+    @classmethod
+    def from_events(cls, events):
+        """Build the batch of a sequence of (time, event) tuples
+
+        Parameters
+        ----------
+        events : list
+            The (time, event) tuples, where each event is a dictionary with
+            the *receiver*, *content*, *log* and *weight* keys
+
+        Returns
+        -------
+        batch : EventBatch
+            The batch
+        """
+        return cls([t for t, _ in events],
+                   _object_array([ev['receiver'] for _, ev in events]),
+                   [ev['content'] for _, ev in events],
+                   [ev['log'] for _, ev in events],
+                   [ev['weight'] for _, ev in events])
+
+    def __len__(self):
+        return len(self.times)
+
+    def requests(self):
+        """Return an iterator over the requests of the batch as (time,
+        receiver, content, log, weight) tuples of native Python types
+
+        Returns
+        -------
+        requests : iterator
+            Iterator over the requests
+        """
+        return zip(self.times.tolist(), self.receivers.tolist(),
+                   self.contents.tolist(), self.log.tolist(),
+                   self.weights.tolist())
+
+    def __iter__(self):
+        """Return an iterator over the requests of the batch as (time, event)
+        tuples, as yielded by workloads"""
+        for time, receiver, content, log, weight in self.requests():
+            yield (time, {'receiver': receiver, 'content': content,
+                          'log': log, 'weight': weight})
+
+
+def _object_array(values):
+    """Return an object array of values, which may be tuples"""
+    array = np.empty(len(values), dtype=object)
+    for i, val in enumerate(values):
+        array[i] = val
+    return array
+
+
+def _batches_of_events(events, size=BATCH_SIZE):
+    """Group the (time, event) tuples of a workload into batches"""
+    events = iter(events)
+    while True:
+        chunk = list(itertools.islice(events, size))
+        if not chunk:
+            return
+        yield EventBatch.from_events(chunk)
+
+
 @register_workload('STATIONARY')
 class StationaryWorkload(object):
     """This function generates events on the fly, i.e. instead of creating an 
@@ -75,6 +196,15 @@ class StationaryWorkload(object):
         not logged)
     n_measured : int, optional
         The number of logged requests after the warmup
+    seed : int, optional
+        The seed for the random generator
+    block_size : int, optional
+        The number of contents, inter-arrival times and receivers drawn at
+        once with a NumPy random generator seeded with *seed*, so that
+        iterating the workload always yields the same events. If 0 or *None*,
+        events are drawn one at a time with the *random* module instead.
+        Drawing in blocks is faster but yields a different sequence of events
+        for the same seed
     
     Returns
     -------
@@ -84,7 +214,8 @@ class StationaryWorkload(object):
         dictionary of event attributes.
     """
     def __init__(self, topology, n_contents, alpha, q=0, beta=0, rate=1.0,
-                    n_warmup=10**5, n_measured=4*10**5, seed=None, **kwargs):
+                    n_warmup=10**5, n_measured=4*10**5, seed=None,
+                    block_size=None, **kwargs):
         if alpha < 0:
             raise ValueError('alpha must be positive')
         if q < 0:
@@ -103,14 +234,62 @@ class StationaryWorkload(object):
         self.rate = rate
         self.n_warmup = n_warmup
         self.n_measured = n_measured
+        self.seed = seed
+        self.block_size = block_size
         random.seed(seed)
         self.beta = beta
         if beta != 0:
             degree = nx.degree(self.topology)
             self.receivers = sorted(self.receivers, key=lambda x: degree[next(iter(topology.edges[x]))], reverse=True)
-            self.receiver_dist = TruncatedMandelbrotZipfDist(beta, len(self.receivers))
+            self.receiver_dist = TruncatedMandelbrotZipfDist(beta, n=len(self.receivers))
         
     def __iter__(self):
+        if self.block_size:
+            return self._iter_blocks()
+        return self._iter_events()
+
+    def batches(self):
+        """Return an iterator over the requests of the workload grouped in
+        batches, one per block if drawn in blocks
+
+        Returns
+        -------
+        batches : iterator
+            Iterator over *EventBatch* objects
+        """
+        if self.block_size:
+            return self._draw_blocks()
+        return _batches_of_events(self._iter_events())
+
+    def _draw_blocks(self):
+        """Return an iterator over batches of events drawn in blocks"""
+        rng = np.random.default_rng(self.seed)
+        receivers = _object_array(self.receivers)
+        n_requests = self.n_warmup + self.n_measured
+        req_counter = 0
+        t_event = 0.0
+        while req_counter < n_requests:
+            size = min(self.block_size, n_requests - req_counter)
+            times = t_event + np.cumsum(rng.exponential(1.0/self.rate, size))
+            if self.beta == 0:
+                indices = rng.integers(len(self.receivers), size=size)
+            else:
+                indices = self.receiver_dist.rvs(size, rng) - 1
+            contents = self.dist.rvs(size, rng)
+            log = np.arange(req_counter, req_counter + size) >= self.n_warmup
+            yield EventBatch(times, receivers[indices], contents, log,
+                             np.ones(size, dtype=np.int64))
+            t_event = times[-1]
+            req_counter += size
+
+    def _iter_blocks(self):
+        """Return an iterator over events drawn in blocks"""
+        for batch in self._draw_blocks():
+            for event in batch:
+                yield event
+
+    def _iter_events(self):
+        """Return an iterator over events drawn one at a time"""
         req_counter = 0
         t_event = 0.0
         while req_counter < self.n_warmup + self.n_measured:
@@ -124,7 +303,6 @@ class StationaryWorkload(object):
             event = {'receiver': receiver, 'content': content, 'log': log, 'weight': 1}
             yield (t_event, event)
             req_counter += 1
-        raise StopIteration()
 
 
 @register_workload('GLOBETRAFF')
@@ -182,7 +360,7 @@ class GlobetraffWorkload(object):
             self.receivers = sorted(self.receivers, key=lambda x: 
                                     degree[next(iter(topology.edges[x]))], 
                                     reverse=True)
-            self.receiver_dist = TruncatedMandelbrotZipfDist(beta, len(self.receivers))
+            self.receiver_dist = TruncatedMandelbrotZipfDist(beta, n=len(self.receivers))
         
     def __iter__(self):
         with open(self.request_file, 'r') as f:
@@ -194,7 +372,6 @@ class GlobetraffWorkload(object):
                     receiver = self.receivers[self.receiver_dist.rv()-1]
                 event = {'receiver': receiver, 'content': content, 'size': size, 'weight': 1}
                 yield (timestamp, event)
-        raise StopIteration()
 
 
 @register_workload('TRACE_DRIVEN')
@@ -242,6 +419,11 @@ class TraceDrivenWorkload(object):
     weights : str
         The path to the weights file. If none is specified (either set weights to None or 'UNIFORM')
         all weights are set to 1.
+    binary_trace : bool, optional
+        If *True*, requests are read from a memory-mapped binary version of
+        the trace, which is created next to the requests file the first time
+        it is needed. If the conversion fails, requests are read from the CSV
+        requests file.
         
     Returns
     -------
@@ -252,7 +434,8 @@ class TraceDrivenWorkload(object):
     """
     
     def __init__(self, topology, reqs_file, weights,
-                 n_warmup, n_measured, rate=1.0, beta=0,  **kwargs):
+                 n_warmup, n_measured, rate=1.0, beta=0, binary_trace=False,
+                 **kwargs):
         """Constructor"""
         if beta < 0:
             raise ValueError('beta must be positive')
@@ -261,6 +444,7 @@ class TraceDrivenWorkload(object):
         self.n_warmup = n_warmup
         self.n_measured = n_measured
         self.reqs_file = reqs_file
+        self.binary_trace = binary_trace
         self.rate = rate
         self.receivers = [v for v in topology.nodes() 
                           if topology.node[v]['stack'][0] == 'receiver']
@@ -273,30 +457,52 @@ class TraceDrivenWorkload(object):
             self.receivers = sorted(self.receivers, key=lambda x:
                                     degree[next(iter(topology.edges[x]))],
                                     reverse=True)
-            self.receiver_dist = TruncatedMandelbrotZipfDist(beta, len(self.receivers))
+            self.receiver_dist = TruncatedMandelbrotZipfDist(beta, n=len(self.receivers))
         
     def __iter__(self):
         req_counter = 0
-        t_event = 0.0
-
-        with open(self.reqs_file, 'r') as csv_file:
-            csv_reader = csv.reader(csv_file)
-
-            for row in csv_reader:
-                t_event = float(row[0])
-                if self.beta == 0:
-                    receiver = random.choice(self.receivers)
-                else:
-                    receiver = self.receivers[self.receiver_dist.rv() - 1]
-                content = int(row[2])
-                weight = self.contents[content]
+        n_requests = self.n_warmup + self.n_measured
+        for t_event, _, content in read_trace(self.reqs_file, self.binary_trace,
+                                              n_requests):
+            if self.beta == 0:
+                receiver = random.choice(self.receivers)
+            else:
+                receiver = self.receivers[self.receiver_dist.rv() - 1]
+            weight = self.contents[content]
 
-                log = (req_counter >= self.n_warmup)
-                event = {'receiver': receiver, 'content': content, 'log': log, 'weight': weight}
-                yield (t_event, event)
-                req_counter += 1
-                if (req_counter >= self.n_warmup + self.n_measured):
-                    raise StopIteration()
+            log = (req_counter >= self.n_warmup)
+            event = {'receiver': receiver, 'content': content, 'log': log, 'weight': weight}
+            yield (t_event, event)
+            req_counter += 1
+            if (req_counter >= n_requests):
+                return
+        raise ValueError("Trace did not contain enough requests")
+
+    def batches(self):
+        """Return an iterator over the requests of the workload grouped in
+        batches
+
+        Returns
+        -------
+        batches : iterator
+            Iterator over *EventBatch* objects
+        """
+        req_counter = 0
+        n_requests = self.n_warmup + self.n_measured
+        for times, _, contents in read_trace_blocks(self.reqs_file,
+                                                    self.binary_trace,
+                                                    n_requests):
+            size = len(times)
+            if self.beta == 0:
+                receivers = [random.choice(self.receivers) for _ in range(size)]
+            else:
+                receivers = [self.receivers[self.receiver_dist.rv() - 1]
+                             for _ in range(size)]
+            weights = [self.contents[c] for c in contents.tolist()]
+            log = np.arange(req_counter, req_counter + size) >= self.n_warmup
+            yield EventBatch(times, receivers, contents, log, weights)
+            req_counter += size
+        if req_counter < n_requests:
             raise ValueError("Trace did not contain enough requests")
 
 
@@ -323,7 +529,8 @@ class YCSBWorkload(object):
     most relevant for caching systems.
     """
     
-    def __init__(self, workload, n_contents, n_warmup, n_measured, alpha=0.99, seed=None, **kwargs):
+    def __init__(self, workload, n_contents, n_warmup, n_measured, alpha=0.99, seed=None,
+                 block_size=None, **kwargs):
         """Constructor
         
         Parameters
@@ -341,6 +548,12 @@ class YCSBWorkload(object):
             Parameter of Zipf distribution
         seed : int, optional
             The seed for the random generator
+        block_size : int, optional
+            The number of operations and items drawn at once with a NumPy
+            random generator seeded with *seed*. If 0 or *None*, they are
+            drawn one at a time with the *random* module instead. Drawing in
+            blocks is faster but yields a different sequence of events for
+            the same seed
         """
         
         if workload not in ("A", "B", "C", "D", "E"):
@@ -350,12 +563,37 @@ class YCSBWorkload(object):
         self.workload = workload
         if seed is not None:
             random.seed(seed)
-        self.zipf = TruncatedMandelbrotZipfDist(alpha, n_contents)
+        self.zipf = TruncatedMandelbrotZipfDist(alpha, n=n_contents)
         self.n_warmup = n_warmup
         self.n_measured = n_measured
+        self.seed = seed
+        self.block_size = block_size
 
     def __iter__(self):
         """Return an iterator over the workload"""
+        if self.block_size:
+            return self._iter_blocks()
+        return self._iter_events()
+
+    def _iter_blocks(self):
+        """Return an iterator over events drawn in blocks"""
+        rng = np.random.default_rng(self.seed)
+        read_ratio = {"A": 0.5, "B": 0.95, "C": 1.0}[self.workload]
+        n_requests = self.n_warmup + self.n_measured
+        req_counter = 0
+        while req_counter < n_requests:
+            size = min(self.block_size, n_requests - req_counter)
+            reads = rng.random(size) < read_ratio
+            items = self.zipf.rvs(size, rng)
+            for read, item in zip(reads.tolist(), items.tolist()):
+                log = (req_counter >= self.n_warmup)
+                event = {'op': "READ" if read else "UPDATE", 'item': item,
+                         'log': log, 'weight': 1}
+                yield event
+                req_counter += 1
+
+    def _iter_events(self):
+        """Return an iterator over events drawn one at a time"""
         req_counter = 0
         while req_counter < self.n_warmup + self.n_measured:
             rand = random.random()
@@ -369,7 +607,6 @@ class YCSBWorkload(object):
             event = {'op': op, 'item': item, 'log': log, 'weight': 1}
             yield event
             req_counter += 1
-        raise StopIteration()
 
 @register_workload('DETERMINISTIC_TRACE_DRIVEN')
 class DeterministicTraceDrivenWorkload(object):
@@ -391,6 +628,11 @@ class DeterministicTraceDrivenWorkload(object):
     weights : str
         The path to the weights file. If none is specified (either set weights to None or 'UNIFORM')
         all weights are set to 1.
+    binary_trace : bool, optional
+        If *True*, requests are read from a memory-mapped binary version of
+        the trace, which is created next to the requests file the first time
+        it is needed. If the conversion fails, requests are read from the CSV
+        requests file.
 
     Returns
     -------
@@ -399,35 +641,140 @@ class DeterministicTraceDrivenWorkload(object):
         the timestamp at which the event occurs and the second element is a
         dictionary of event attributes.
     """
-    def __init__(self, topology, reqs_file, weights=None, n_warmup=10**5, n_measured=4*10**5, **kwargs):
+    def __init__(self, topology, reqs_file, weights=None, n_warmup=10**5, n_measured=4*10**5,
+                 binary_trace=False, **kwargs):
         self.receivers = [v for v in topology.nodes()
                      if topology.node[v]['stack'][0] == 'receiver']
         self.n_warmup = n_warmup
         self.n_measured = n_measured
         self.reqs_file = reqs_file
+        self.binary_trace = binary_trace
 
         self.n_contents, self.contents = assign_weights(weights, reqs_file)
 
     def __iter__(self):
         req_counter = 0
-        with open(self.reqs_file, 'r') as csv_file:
-            csv_reader = csv.reader(csv_file)
+        n_requests = self.n_warmup + self.n_measured
+        for t_event, receiver, content in read_trace(self.reqs_file, self.binary_trace,
+                                                     n_requests):
+            receiver = int(receiver)
+            weight = self.contents[content]
 
-            for row in csv_reader:
-                t_event = float(row[0])
-                receiver = int(row[1])
-                content = int(row[2])
-                weight = self.contents[content]
-
-                log = (req_counter >= self.n_warmup)
-                event = {'receiver': receiver, 'content': content, 'log': log, 'weight': weight}
-                yield (t_event, event)
-                req_counter += 1
-                if(req_counter >= self.n_warmup + self.n_measured):
-                    raise StopIteration()
+            log = (req_counter >= self.n_warmup)
+            event = {'receiver': receiver, 'content': content, 'log': log, 'weight': weight}
+            yield (t_event, event)
+            req_counter += 1
+            if(req_counter >= n_requests):
+                return
+        raise ValueError("Trace did not contain enough requests")
+
+    def batches(self):
+        """Return an iterator over the requests of the workload grouped in
+        batches
+
+        Returns
+        -------
+        batches : iterator
+            Iterator over *EventBatch* objects
+        """
+        req_counter = 0
+        n_requests = self.n_warmup + self.n_measured
+        for times, receivers, contents in read_trace_blocks(self.reqs_file,
+                                                            self.binary_trace,
+                                                            n_requests):
+            size = len(times)
+            weights = [self.contents[c] for c in contents.tolist()]
+            log = np.arange(req_counter, req_counter + size) >= self.n_warmup
+            yield EventBatch(times, receivers.astype(np.int64), contents, log,
+                             weights)
+            req_counter += size
+        if req_counter < n_requests:
             raise ValueError("Trace did not contain enough requests")
 
 
+def read_trace(reqs_file, binary_trace=False, n_requests=None):
+    """Return an iterator over the requests of a (time, receiver, content)
+    trace.
+
+    Parameters
+    ----------
+    reqs_file : str
+        The path to the CSV requests file
+    binary_trace : bool, optional
+        If *True*, read requests from the memory-mapped binary version of the
+        trace, creating it if needed. Requests are read from the CSV file if
+        the binary trace cannot be created.
+    n_requests : int, optional
+        The maximum number of requests to read
+
+    Returns
+    -------
+    requests : iterator of tuples
+        Iterator of (time, receiver, content) tuples. Time and content are
+        always numeric while receiver is a string if read from the CSV file.
+    """
+    if binary_trace:
+        try:
+            trace = open_binary_trace(reqs_file, create=True)
+        except (IOError, OSError, ValueError, IndexError) as e:
+            logger.warning('Cannot use binary trace for %s (%s), reading CSV '
+                           'trace instead', reqs_file, e)
+        else:
+            return iter_binary_trace(trace, stop=n_requests)
+    return _read_csv_trace(reqs_file)
+
+
+def read_trace_blocks(reqs_file, binary_trace=False, n_requests=None,
+                      block_size=BATCH_SIZE):
+    """Return an iterator over the requests of a (time, receiver, content)
+    trace in blocks of NumPy arrays.
+
+    Parameters
+    ----------
+    reqs_file : str
+        The path to the CSV requests file
+    binary_trace : bool, optional
+        If *True*, read requests from the memory-mapped binary version of the
+        trace, creating it if needed. Requests are read from the CSV file if
+        the binary trace cannot be created.
+    n_requests : int, optional
+        The maximum number of requests to read
+    block_size : int, optional
+        The maximum number of requests of a block
+
+    Returns
+    -------
+    blocks : iterator of tuples
+        Iterator of (times, receivers, contents) tuples of arrays. Receivers
+        are strings if read from the CSV file.
+    """
+    if binary_trace:
+        try:
+            trace = open_binary_trace(reqs_file, create=True)
+        except (IOError, OSError, ValueError, IndexError) as e:
+            logger.warning('Cannot use binary trace for %s (%s), reading CSV '
+                           'trace instead', reqs_file, e)
+        else:
+            stop = len(trace) if n_requests is None else min(n_requests, len(trace))
+            for i in range(0, stop, block_size):
+                block = np.array(trace[i:min(i + block_size, stop)])
+                yield block['time'], block['receiver'], block['content']
+            return
+    requests = itertools.islice(_read_csv_trace(reqs_file), n_requests)
+    while True:
+        block = list(itertools.islice(requests, block_size))
+        if not block:
+            return
+        times, receivers, contents = zip(*block)
+        yield np.array(times), np.array(receivers), np.array(contents)
+
+
+def _read_csv_trace(reqs_file):
+    with open(reqs_file, 'r') as csv_file:
+        for row in csv.reader(csv_file):
+            yield float(row[0]), row[1], int(row[2])
+
+
 def assign_weights(weights, reqs_file):
     uniform_weights = weights is None or weights == 'UNIFORM'
     n_contents = 0
@@ -443,13 +790,10 @@ def assign_weights(weights, reqs_file):
                 weight = int(row[1])
                 contents[content] = weight
     else:
-        # assign uniform weights
-        with open(reqs_file, 'r') as csv_file:
-            csv_reader = csv.reader(csv_file)
-            for row in csv_reader:
-                content = int(row[2])
-                if content not in contents:
-                    n_contents += 1
-                    contents[content] = 1
+        # assign uniform weights to all contents of the trace, which are
+        # looked up in the content index cached alongside the trace
+        index = trace_content_index(reqs_file)
+        n_contents = index['n_contents']
+        contents = dict.fromkeys(index['contents'].tolist(), 1)
 
     return n_contents, contents
\ No newline at end of file
@@ -0,0 +1,179 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import fnss
+import networkx as nx
+
+from icarus.execution import NetworkModel, NetworkView, NetworkController, \
+                             LazyShortestPaths, CollectorProxy, \
+                             CacheHitRatioCollector, LinkLoadCollector
+from icarus.execution.collectors import TestCollector as DebugCollector
+from icarus.execution.network import symmetrify_paths
+
+
+class TestCompiledPath(unittest.TestCase):
+
+    def setUp(self):
+        # 0 ---- 1 ---- 2 ---- 3 ---- 4
+        #               |
+        #               5
+        topology = fnss.line_topology(5)
+        topology.add_edge(2, 5)
+        fnss.set_delays_constant(topology, 2, 'ms')
+        topology.adj[3][4]['delay'] = 10
+        for u, v in topology.edges():
+            topology.adj[u][v]['type'] = 'internal'
+        topology.adj[3][4]['type'] = 'external'
+        fnss.add_stack(topology, 4, 'source', {'contents': [1, 2]})
+        for v in (1, 3):
+            fnss.add_stack(topology, v, 'router', {'cache_size': 1})
+        for v in (0, 5):
+            fnss.add_stack(topology, v, 'receiver', {})
+        fnss.add_stack(topology, 2, 'router', {})
+        self.model = NetworkModel(topology, cache_policy={'name': 'LRU'})
+        self.view = NetworkView(self.model)
+
+    def test_compiled_path(self):
+        path = self.view.compiled_path(5, 4)
+        self.assertEqual((5, 2, 3, 4), path.nodes)
+        self.assertEqual(tuple(self.model.node_index[v] for v in path.nodes),
+                         path.hops)
+        self.assertEqual((False, False, True, False), path.caching)
+        self.assertEqual((2,), path.caches)
+        self.assertEqual((2, 2, 10), path.delays)
+        self.assertEqual(('internal', 'internal', 'external'), path.types)
+        self.assertIs(path, self.view.compiled_path(5, 4))
+
+    def test_reverse(self):
+        path = self.view.compiled_path(0, 4).reverse
+        self.assertEqual((4, 3, 2, 1, 0), path.nodes)
+        self.assertEqual((False, True, False, True, False), path.caching)
+        self.assertEqual((1, 3), path.caches)
+        self.assertEqual((10, 2, 2, 2), path.delays)
+        self.assertEqual('external', path.types[0])
+        self.assertIsNone(path.reverse)
+
+    def test_node_index(self):
+        self.assertEqual(list(range(6)), sorted(self.model.node_index.values()))
+
+
+class TestLazyShortestPaths(unittest.TestCase):
+
+    def setUp(self):
+        # Grid with many equal cost paths
+        self.topology = fnss.Topology(nx.grid_2d_graph(4, 5))
+
+    def test_same_as_eager(self):
+        eager = symmetrify_paths(dict(nx.all_pairs_dijkstra_path(self.topology)))
+        lazy = LazyShortestPaths(self.topology, maxlen=3)
+        for s in self.topology.nodes():
+            for t in self.topology.nodes():
+                self.assertEqual(eager[s][t], lazy[s][t])
+                self.assertEqual(list(reversed(lazy[t][s])), lazy[s][t])
+
+    def test_maxlen(self):
+        lazy = LazyShortestPaths(self.topology, maxlen=2)
+        nodes = list(self.topology.nodes())
+        for v in nodes[:5]:
+            lazy[v][nodes[0]]
+        self.assertEqual(2, len(lazy._trees))
+        self.assertRaises(KeyError, lambda: lazy['x'])
+        self.assertRaises(ValueError, LazyShortestPaths, self.topology, 0)
+
+    def test_network_model(self):
+        for v in self.topology.nodes():
+            fnss.add_stack(self.topology, v, 'router', {})
+        model = NetworkModel(self.topology, cache_policy={'name': 'LRU'},
+                             lazy_shortest_paths=True)
+        self.assertIsInstance(model.shortest_path, LazyShortestPaths)
+        view = NetworkView(model)
+        self.assertEqual(((0, 0), (0, 1)), view.compiled_path((0, 0), (0, 1)).nodes)
+
+
+class TestCollectorDispatch(unittest.TestCase):
+
+    def setUp(self):
+        topology = fnss.line_topology(3)
+        fnss.add_stack(topology, 0, 'receiver', {})
+        fnss.add_stack(topology, 1, 'router', {'cache_size': 1})
+        fnss.add_stack(topology, 2, 'source', {'contents': [1, 2]})
+        self.model = NetworkModel(topology, cache_policy={'name': 'LRU'})
+        self.view = NetworkView(self.model)
+        self.controller = NetworkController(self.model)
+
+    def retrieve(self, content, log=True):
+        controller = self.controller
+        controller.start_session(0, 0, content, log, 1)
+        controller.forward_request_path(0, 1)
+        if not controller.get_content(1):
+            controller.forward_request_path(1, 2)
+            controller.get_content(2)
+            controller.forward_content_path(2, 1)
+            controller.put_content(1)
+        controller.forward_content_path(1, 0)
+        controller.end_session()
+
+    def test_subscribed_events(self):
+        proxy = CollectorProxy(self.view, [CacheHitRatioCollector(self.view)])
+        self.assertEqual(set(['start_session', 'cache_hit', 'server_hit']),
+                         proxy.events)
+        self.controller.attach_collector(proxy)
+        # Hops are not notified at all
+        self.assertNotIn('request_hop', self.controller.events)
+        for content in [1, 1, 2, 2, 1]:
+            self.retrieve(content)
+        self.assertEqual(0.4, proxy.results()['CACHE_HIT_RATIO']['MEAN'])
+
+    def test_hops(self):
+        collector = LinkLoadCollector(self.view)
+        self.controller.attach_collector(CollectorProxy(self.view, [collector]))
+        self.retrieve(1)
+        self.retrieve(1)
+        self.retrieve(2, log=False)
+        self.assertEqual(2, collector.req_count[(0, 1)])
+        self.assertEqual(1, collector.req_count[(1, 2)])
+        self.assertEqual(1, collector.cont_count[(2, 1)])
+
+    def test_path_hops_on_main_path(self):
+        hops = []
+
+        class HopCollector(DebugCollector):
+            def request_hop(self, u, v, main_path=True):
+                hops.append((u, v, main_path))
+
+            def content_hop(self, u, v, main_path=True):
+                hops.append((u, v, main_path))
+
+        self.controller.attach_collector(HopCollector(self.view))
+        self.controller.start_session(0, 0, 1, True, 1)
+        # Hops of a whole path are reported as on the main path, as
+        # collectors always received them
+        self.controller.forward_request_path(0, 2, main_path=False)
+        self.controller.forward_content_path(2, 0, main_path=False)
+        self.controller.forward_request_hop(0, 1, main_path=False)
+        self.assertEqual([(0, 1, True), (1, 2, True), (2, 1, True),
+                          (1, 0, True), (0, 1, False)], hops)
+
+    def test_session(self):
+        collector = DebugCollector(self.view)
+        # Collectors not listing their events subscribe to all of them
+        self.controller.attach_collector(collector)
+        self.controller.start_session(3, 0, 2, True, 1)
+        self.assertEqual(2, self.controller.content)
+        self.assertEqual(dict(timestamp=3, receiver=0, content=2, log=True,
+                              weight=1), self.controller.session)
+        self.controller.end_session()
+        self.assertIsNone(self.controller.session)
+        self.retrieve(2)
+        summary = collector.session_summary()
+        self.assertEqual(2, summary['serving_node'])
+        self.assertEqual([(0, 1), (1, 2)], summary['request_hops'])
+        self.controller.detach_collector()
+        self.retrieve(1)
+        self.assertEqual(summary, collector.session_summary())
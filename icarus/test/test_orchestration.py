@@ -0,0 +1,335 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import random
+import os
+import shutil
+import tempfile
+
+import icarus
+from icarus.registry import TOPOLOGY_FACTORY, CACHE_PLACEMENT, CONTENT_PLACEMENT
+from icarus.execution import exec_experiment, exec_multi_policy_experiment
+import icarus.orchestration as orchestration
+from icarus.orchestration import group_by_cache_policy, build_topology_artefacts, \
+                                 topology_key, run_scenario, ExperimentCostModel, \
+                                 Orchestrator, run_multi_policy_scenario
+from icarus.io import ResultsJournal, StreamedResultSet
+from icarus.io.records import write_records
+from icarus.scenarios import EventBatch
+from icarus.util import Tree, Settings
+
+
+class TestGroupByCachePolicy(unittest.TestCase):
+
+    def experiment(self, topology, cache_policy):
+        experiment = Tree()
+        experiment['topology']['name'] = topology
+        experiment['strategy']['name'] = 'LCE'
+        experiment['cache_policy']['name'] = cache_policy
+        experiment['desc'] = '%s %s' % (topology, cache_policy)
+        return experiment
+
+    def test_group(self):
+        experiments = [self.experiment('PATH', 'LRU'),
+                       self.experiment('TREE', 'LRU'),
+                       self.experiment('PATH', 'FIFO'),
+                       self.experiment('TREE', 'SS')]
+        groups = group_by_cache_policy(experiments)
+        self.assertEqual(2, len(groups))
+        self.assertEqual([experiments[0], experiments[2]], groups[0])
+        self.assertEqual([experiments[1], experiments[3]], groups[1])
+
+    def test_group_policy_params(self):
+        experiments = [self.experiment('PATH', 'DSCA'),
+                       self.experiment('PATH', 'DSCA')]
+        experiments[1]['cache_policy']['window_size'] = 100
+        self.assertEqual([experiments], group_by_cache_policy(experiments))
+
+
+class TestMultiPolicyExperiment(unittest.TestCase):
+
+    def scenario(self):
+        topology = TOPOLOGY_FACTORY['PATH'](n=3)
+        CACHE_PLACEMENT['UNIFORM'](topology, cache_budget=20)
+        rand = random.Random(1)
+        workload = [(i, {'receiver': 0, 'content': rand.randint(1, 100),
+                         'log': i >= 100, 'weight': 1})
+                    for i in range(2000)]
+        CONTENT_PLACEMENT['UNIFORM'](topology, range(1, 101), seed=0)
+        return topology, workload
+
+    def test_same_results(self):
+        cache_policies = [Tree(name='LRU'), Tree(name='FIFO'), Tree(name='SS'),
+                          Tree(name='DSCA', window_size=100)]
+        collectors = {'CACHE_HIT_RATIO': {}}
+        strategy = Tree(name='LCE')
+        topology, workload = self.scenario()
+        results = exec_multi_policy_experiment(topology, workload, Tree(), strategy,
+                                               cache_policies, collectors, 'test')
+        self.assertEqual(len(cache_policies), len(results))
+        for cache_policy, res in zip(cache_policies, results):
+            topology, workload = self.scenario()
+            expected = exec_experiment(topology, workload, Tree(), strategy,
+                                       cache_policy, collectors, 'test')
+            self.assertEqual(expected['CACHE_HIT_RATIO']['MEAN'],
+                             res['CACHE_HIT_RATIO']['MEAN'])
+
+
+    def test_durations(self):
+        cache_policies = [Tree(name='LRU'), Tree(name='DSCASW', window_size=100)]
+        topology, workload = self.scenario()
+        results, durations = exec_multi_policy_experiment(
+                topology, workload, Tree(), Tree(name='LCE'), cache_policies,
+                {'CACHE_HIT_RATIO': {}}, 'test', return_durations=True)
+        self.assertEqual(len(cache_policies), len(results))
+        self.assertEqual(len(cache_policies), len(durations))
+        for duration in durations:
+            self.assertGreater(duration, 0)
+        # Each experiment of a multi-policy run takes its own processing time
+        settings = Settings()
+        settings.DATA_COLLECTORS = {'CACHE_HIT_RATIO': {}}
+        settings.PROFILE = True
+        results = run_multi_policy_scenario(settings, [experiment(3), experiment(3, 'FIFO')],
+                                            1, 1)
+        total = results[0][1]['TIMING']['TOTAL']
+        self.assertAlmostEqual(total, sum(duration for _, _, duration in results))
+        self.assertNotEqual(results[0][2], results[1][2])
+
+
+def experiment(n, cache_policy='LRU', lazy=False):
+    experiment = Tree()
+    experiment['topology']['name'] = 'PATH'
+    experiment['topology']['n'] = n
+    experiment['workload'] = {'name': 'STATIONARY', 'n_contents': 50,
+                              'alpha': 0.8, 'n_warmup': 100,
+                              'n_measured': 500, 'seed': 0}
+    experiment['cache_placement'] = {'name': 'UNIFORM',
+                                     'network_cache_all_nodes': None,
+                                     'network_cache_per_node': None,
+                                     'network_cache_absolute': 10}
+    experiment['content_placement'] = {'name': 'UNIFORM', 'seed': 0}
+    experiment['strategy']['name'] = 'LCE'
+    experiment['cache_policy']['name'] = cache_policy
+    if lazy:
+        experiment['netconf']['lazy_shortest_paths'] = True
+    experiment['desc'] = 'PATH %d %s' % (n, cache_policy)
+    return experiment
+
+
+class BatchedWorkload(object):
+
+    def __init__(self, events, size):
+        self.events = events
+        self.size = size
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def batches(self):
+        for i in range(0, len(self.events), self.size):
+            yield EventBatch.from_events(self.events[i:i + self.size])
+
+
+class TestBatches(unittest.TestCase):
+
+    def test_same_results(self):
+        cache_policies = [Tree(name='LRU'), Tree(name='DSCA', window_size=100)]
+        collectors = {'CACHE_HIT_RATIO': {}, 'LATENCY': {}}
+        strategy = Tree(name='LCE')
+        topology, workload = TestMultiPolicyExperiment().scenario()
+        expected = [exec_experiment(topology, workload, Tree(), strategy,
+                                    cache_policy, collectors, 'test')
+                    for cache_policy in cache_policies]
+        batched = BatchedWorkload(workload, 300)
+        self.assertEqual(expected[0], exec_experiment(topology, batched, Tree(),
+                                                      strategy, cache_policies[0],
+                                                      collectors, 'test'))
+        self.assertEqual(expected, exec_multi_policy_experiment(
+                                topology, batched, Tree(), strategy,
+                                cache_policies, collectors, 'test'))
+
+
+class TestTopologyArtefacts(unittest.TestCase):
+
+    def tearDown(self):
+        orchestration._TOPOLOGY_ARTEFACTS.clear()
+
+    def test_dedup(self):
+        experiments = [experiment(3), experiment(3, 'FIFO'),
+                       experiment(4, lazy=True)]
+        artefacts = build_topology_artefacts(experiments)
+        self.assertEqual(2, len(artefacts))
+        self.assertEqual(topology_key(experiments[0]['topology']),
+                         topology_key(experiments[1]['topology']))
+        self.assertIsNotNone(artefacts[topology_key(experiments[0]['topology'])][1])
+        self.assertIsNone(artefacts[topology_key(experiments[2]['topology'])][1])
+
+    def test_failing_topology(self):
+        broken = experiment(4)
+        broken['topology']['n'] = None
+        experiments = [broken, experiment(3)]
+        artefacts = build_topology_artefacts(experiments)
+        # Only the experiments using the broken topology fail, when they run
+        self.assertEqual([topology_key(experiments[1]['topology'])], list(artefacts))
+
+    def test_same_results(self):
+        settings = Settings()
+        settings.DATA_COLLECTORS = {'CACHE_HIT_RATIO': {}, 'LATENCY': {}}
+        experiments = [experiment(3), experiment(4, lazy=True)]
+        expected = [run_scenario(settings, exp, 1, 1)[1] for exp in experiments]
+        orchestration._TOPOLOGY_ARTEFACTS.update(build_topology_artefacts(experiments))
+        for exp, res in zip(experiments, expected):
+            self.assertEqual(res, run_scenario(settings, exp, 1, 1)[1])
+
+
+class TestExperimentCostModel(unittest.TestCase):
+
+    def experiment(self, cache_policy, n_requests, cache_size=100):
+        experiment = Tree()
+        experiment['workload'] = {'name': 'TRACE_DRIVEN', 'n_warmup': 0,
+                                  'n_measured': n_requests}
+        experiment['cache_placement']['network_cache_absolute'] = cache_size
+        experiment['cache_policy']['name'] = cache_policy
+        return experiment
+
+    def test_cost(self):
+        model = ExperimentCostModel()
+        lru = self.experiment('LRU', 1000)
+        self.assertLess(model.cost(lru), model.cost(self.experiment('LRU', 2000)))
+        self.assertLess(model.cost(lru), model.cost(self.experiment('DSCASW', 1000)))
+        self.assertLess(model.cost(lru), model.cost(self.experiment('LRU', 1000, 10**6)))
+        group = [lru, self.experiment('ARC', 1000)]
+        self.assertEqual(model.cost(group), sum(model.cost(e) for e in group))
+
+    def test_duration(self):
+        model = ExperimentCostModel()
+        lru = self.experiment('LRU', 1000)
+        arc = self.experiment('ARC', 1000)
+        self.assertIsNone(model.duration(lru))
+        model.update(lru, 10)
+        self.assertAlmostEqual(20, model.duration(self.experiment('LRU', 2000)))
+        # Policies never run are predicted from the overall rate
+        self.assertAlmostEqual(10 * model.cost(arc) / model.cost(lru),
+                               model.duration(arc))
+        model.update(arc, 5)
+        self.assertAlmostEqual(5, model.duration(arc))
+        self.assertAlmostEqual(15, model.duration([lru, arc]))
+
+
+class TestOrchestrator(unittest.TestCase):
+
+    def test_failed_not_pending(self):
+        settings = Settings()
+        settings.DATA_COLLECTORS = {'CACHE_HIT_RATIO': {}}
+        settings.EXPERIMENT_QUEUE = [experiment(3), experiment(3, 'NONEXISTENT'),
+                                     experiment(4, 'NONEXISTENT')]
+        settings.N_REPLICATIONS = 1
+        settings.PARALLEL_EXECUTION = False
+        settings.SHARE_TOPOLOGIES = False
+        for multi_policy in (False, True):
+            settings.MULTI_POLICY_REPLAY = multi_policy
+            orch = Orchestrator(settings)
+            orch.run()
+            self.assertEqual((1, 2) if not multi_policy else (0, 3),
+                             (orch.n_success, orch.n_fail))
+            self.assertEqual([0, 0, 0], [count for _, count in orch.pending.values()])
+
+
+class TestResume(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'results.journal')
+        self.settings = Settings()
+        self.settings.DATA_COLLECTORS = {'CACHE_HIT_RATIO': {}}
+        self.settings.EXPERIMENT_QUEUE = [experiment(3), experiment(3, 'FIFO'),
+                                          experiment(4)]
+        self.settings.N_REPLICATIONS = 2
+        self.settings.PARALLEL_EXECUTION = False
+        self.settings.SHARE_TOPOLOGIES = False
+        self.settings.MULTI_POLICY_REPLAY = False
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def run_orchestrator(self, resume):
+        journal = ResultsJournal(self.path, resume)
+        orch = Orchestrator(self.settings, journal=journal)
+        orch.run()
+        journal.close()
+        return orch
+
+    def test_resume(self):
+        orch = self.run_orchestrator(False)
+        self.assertEqual(6, orch.n_success)
+        # Drop the last two experiments from the journal
+        records = list(ResultsJournal(self.path, True))
+        journal = ResultsJournal(self.path)
+        for params, results in records[:4]:
+            journal.append(params, results)
+        journal.close()
+        for multi_policy in (False, True):
+            self.settings.MULTI_POLICY_REPLAY = multi_policy
+            resumed = self.run_orchestrator(True)
+            self.assertEqual(6, len(resumed.results))
+            self.assertEqual(2 if not multi_policy else 0, resumed.n_success)
+            self.assertEqual(sorted(orch.results.dump(), key=repr),
+                             sorted(resumed.results.dump(), key=repr))
+
+    def test_resume_streamed(self):
+        # The streamed results file is the journal
+        path = os.path.join(self.tmpdir, 'results.records')
+        orch = Orchestrator(self.settings,
+                            results=StreamedResultSet(path, 'RECORDS', create=True))
+        orch.run()
+        self.assertEqual(6, orch.n_success)
+        records = list(orch.results)
+        write_records(records[:4], path)
+        resumed = Orchestrator(self.settings,
+                               results=StreamedResultSet(path, 'RECORDS'))
+        resumed.run()
+        self.assertEqual(2, resumed.n_success)
+        self.assertEqual(6, len(resumed.results))
+        self.assertEqual(sorted(records, key=repr),
+                         sorted(resumed.results.dump(), key=repr))
+
+
+class TestProfile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings = Settings()
+        self.settings.DATA_COLLECTORS = {'CACHE_HIT_RATIO': {}}
+        self.settings.PROFILE_DIR = self.tmpdir
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_no_profile(self):
+        self.assertNotIn('TIMING', run_scenario(self.settings, experiment(3), 1, 1)[1])
+
+    def test_timing(self):
+        self.settings.PROFILE = True
+        params, results, _ = run_scenario(self.settings, experiment(3), 1, 1)
+        timing = results['TIMING']
+        for phase in ('TOPOLOGY', 'WORKLOAD', 'CACHE_PLACEMENT',
+                      'CONTENT_PLACEMENT', 'SIMULATION'):
+            self.assertGreaterEqual(timing[phase], 0)
+        self.assertEqual(600, timing['EVENTS'])
+        self.assertGreater(timing['EVENTS_PER_SECOND'], 0)
+        self.assertNotIn('PROFILE_FILE', timing)
+
+    def test_cprofile(self):
+        self.settings.PROFILE = 'CPROFILE'
+        results = run_multi_policy_scenario(self.settings,
+                                            [experiment(3), experiment(3, 'FIFO')],
+                                            1, 1)
+        path = results[0][1]['TIMING']['PROFILE_FILE']
+        self.assertEqual(path, results[1][1]['TIMING']['PROFILE_FILE'])
+        self.assertTrue(os.path.isfile(path))
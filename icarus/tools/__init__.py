@@ -7,3 +7,5 @@ behavior of caches and statistical utilities.
 from .stats import *
 from .cacheperf import *
 from .traces import *
+from .mrc import *
+from .sharding import *
@@ -3,6 +3,7 @@ replacement policies.
 """
 
 import math
+import heapq
 
 import numpy as np
 from scipy.optimize import fsolve
@@ -24,7 +25,9 @@ __all__ = [
        'numeric_per_content_cache_hit_ratio',
        'numeric_cache_hit_ratio',
        'numeric_cache_hit_ratio_2_layers',
-       'trace_driven_cache_hit_ratio'
+       'trace_driven_cache_hit_ratio',
+       'next_occurrences',
+       'belady_cache_hit_ratio'
           ]
 
 
@@ -602,4 +605,111 @@ def trace_driven_cache_hit_ratio(workload, cache, warmup_ratio=0.25):
         else:
             cache.put(content)
         n_req += 1
-    return cache_hits/(n - n_warmup)
\ No newline at end of file
+    return cache_hits/(n - n_warmup)
+
+
+def next_occurrences(workload):
+    """Return, for each request of a workload, the index of the next request
+    for the same content.
+
+    The indices are computed without any Python-level loop by stably sorting
+    the requests by content, so that consecutive requests for the same
+    content become adjacent.
+
+    Parameters
+    ----------
+    workload : array-like
+        Sequence of content identifiers
+
+    Returns
+    -------
+    next_occurrences : numpy.ndarray
+        Array of the same length of the workload. Element *i* is the index of
+        the next request for the content requested at *i* or the length of
+        the workload if that content is never requested again
+    """
+    workload = np.asarray(workload)
+    n = len(workload)
+    nxt = np.full(n, n, dtype=np.int64)
+    if n > 1:
+        order = np.argsort(workload, kind='stable')
+        same = workload[order[1:]] == workload[order[:-1]]
+        nxt[order[:-1][same]] = order[1:][same]
+    return nxt
+
+
+def belady_cache_hit_ratio(workload, cache_size, n_warmup=0):
+    """Compute the cache hit ratio of Belady's optimal offline replacement
+    policy (OPT, also known as MIN) under an arbitrary trace-driven workload.
+
+    Upon a miss, OPT evicts the content requested the furthest in the future
+    or does not insert the requested content at all if it is requested
+    further in the future than any cached one. Contents never requested
+    again are not inserted.
+
+    Multiple cache sizes are evaluated in a single pass over the workload.
+
+    Parameters
+    ----------
+    workload : array-like
+        Sequence of content identifiers
+    cache_size : int or list of int
+        The size of the cache or a list of sizes to evaluate
+    n_warmup : int or list of int, optional
+        The number of initial requests whose cache hits are not counted,
+        either common to all cache sizes or one per cache size
+
+    Returns
+    -------
+    cache_hit_ratio : float or list of float
+        The cache hit ratio or a list of cache hit ratios, one per cache size
+    """
+    single = np.isscalar(cache_size)
+    cache_sizes = [int(cache_size)] if single else [int(s) for s in cache_size]
+    if any(s <= 0 for s in cache_sizes):
+        raise ValueError('cache sizes must be positive')
+    n_warmups = ([int(n_warmup)] * len(cache_sizes) if np.isscalar(n_warmup)
+                 else [int(w) for w in n_warmup])
+    if len(n_warmups) != len(cache_sizes):
+        raise ValueError('n_warmup must be an integer or have one value '
+                         'per cache size')
+    n = len(workload)
+    if any(w < 0 or w >= n for w in n_warmups):
+        raise ValueError('n_warmup must be comprised between 0 and the '
+                         'number of requests')
+    nxt = next_occurrences(workload).tolist()
+    # Per cache size state: map content -> index of next request and a
+    # max-heap of (-next request, content) entries invalidated lazily
+    caches = [{} for _ in cache_sizes]
+    heaps = [[] for _ in cache_sizes]
+    hits = [0] * len(cache_sizes)
+    for i, content in enumerate(np.asarray(workload).tolist()):
+        next_req = nxt[i]
+        for j, size in enumerate(cache_sizes):
+            cache = caches[j]
+            heap = heaps[j]
+            if content in cache:
+                if i >= n_warmups[j]:
+                    hits[j] += 1
+                if next_req == n:
+                    del cache[content]
+                else:
+                    cache[content] = next_req
+                    heapq.heappush(heap, (-next_req, content))
+                continue
+            if next_req == n:
+                continue
+            if len(cache) >= size:
+                # Discard entries of evicted contents or of outdated requests
+                while cache.get(heap[0][1]) != -heap[0][0]:
+                    heapq.heappop(heap)
+                if -heap[0][0] < next_req:
+                    continue
+                del cache[heapq.heappop(heap)[1]]
+            cache[content] = next_req
+            heapq.heappush(heap, (-next_req, content))
+            if len(heap) > 2 * len(cache) + 64:
+                heap[:] = [(-r, c) for c, r in cache.items()]
+                heapq.heapify(heap)
+    ratios = [hits[j] / (n - n_warmups[j]) for j in range(len(cache_sizes))]
+    return ratios[0] if single else ratios
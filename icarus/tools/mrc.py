@@ -0,0 +1,236 @@
+"""Functions for computing miss ratio curves (MRC) of LRU caches.
+
+The LRU stack distance of a request is the number of distinct contents
+requested since the previous request for the same content, including that
+content. A request is a hit in an LRU cache of size *C* if and only if its
+stack distance is not greater than *C*, hence the distribution of stack
+distances of a trace yields the miss ratio of LRU at every cache size at
+once.
+
+Stack distances are computed with Mattson's algorithm using a Fenwick tree,
+which takes *O(log n)* time per request. For very large traces, the SHARDS
+spatial sampling technique of Waldspurger et al. (FAST'15) computes an
+approximate MRC from the requests of a pseudo-random subset of contents.
+Since a few popular contents can make up a large share of the requests, the
+number of sampled requests is adjusted to its expected value as in
+SHARDS_adj.
+"""
+from array import array
+
+import numpy as np
+
+from icarus.tools.traces import open_binary_trace, trace_contents
+
+
+__all__ = [
+       'stack_distances',
+       'shards_sample',
+       'miss_ratio_curve',
+       'trace_miss_ratio_curve'
+          ]
+
+
+# Modulus of the hash used by SHARDS to select contents
+SHARDS_MODULUS = 2**24
+
+
+def stack_distances(workload):
+    """Return the LRU stack distance of each request of a workload.
+
+    Parameters
+    ----------
+    workload : array-like
+        Sequence of content identifiers
+
+    Returns
+    -------
+    distances : numpy.ndarray
+        The stack distance of each request, starting from 1. Requests for
+        contents never requested before have a stack distance of 0, meaning
+        infinity.
+    """
+    workload = np.asarray(workload).tolist()
+    n = len(workload)
+    # Fenwick tree over request indices, marking the last request of each
+    # content seen so far
+    tree = array('q', bytes(8 * (n + 1)))
+    last = {}
+    distances = array('q', bytes(8 * n))
+    for i, content in enumerate(workload):
+        p = last.get(content)
+        if p is not None:
+            # Number of marks up to p, included
+            j = p + 1
+            before = 0
+            while j > 0:
+                before += tree[j]
+                j -= j & -j
+            distances[i] = len(last) - before + 1
+            j = p + 1
+            while j <= n:
+                tree[j] -= 1
+                j += j & -j
+        last[content] = i
+        j = i + 1
+        while j <= n:
+            tree[j] += 1
+            j += j & -j
+    return np.frombuffer(distances, dtype=np.int64).copy()
+
+
+def shards_sample(workload, sampling_rate, seed=0):
+    """Select the requests of a pseudo-random subset of contents, as done by
+    SHARDS.
+
+    A content is selected if the hash of its identifier modulo
+    *SHARDS_MODULUS* is lower than *sampling_rate* times the modulus, so that
+    all requests for a selected content are kept.
+
+    Parameters
+    ----------
+    workload : array-like
+        Sequence of integer content identifiers
+    sampling_rate : float
+        The expected fraction of contents selected, between 0 and 1
+    seed : int, optional
+        The seed of the hash function
+
+    Returns
+    -------
+    indices : numpy.ndarray
+        The indices of the selected requests in the workload
+    """
+    if sampling_rate <= 0 or sampling_rate > 1:
+        raise ValueError('sampling_rate must be comprised between 0 and 1')
+    contents = np.asarray(workload, dtype=np.int64).view(np.uint64)
+    # Multiplicative hashing (64-bit golden ratio constant) of the seeded
+    # identifiers, keeping the most significant bits
+    with np.errstate(over='ignore'):
+        h = (contents ^ np.uint64(seed)) * np.uint64(0x9E3779B97F4A7C15)
+    h >>= np.uint64(64 - 24)
+    return np.flatnonzero(h < np.uint64(int(sampling_rate * SHARDS_MODULUS)))
+
+
+def miss_ratio_curve(workload, cache_sizes=None, n_warmup=0,
+                     sampling_rate=None, seed=0):
+    """Compute the miss ratio curve of an LRU cache under a trace-driven
+    workload.
+
+    Parameters
+    ----------
+    workload : array-like
+        Sequence of content identifiers. They must be integers if
+        *sampling_rate* is specified
+    cache_sizes : array-like, optional
+        The cache sizes at which the miss ratio is evaluated. If not
+        specified, all sizes from 1 to the number of distinct contents are
+        evaluated
+    n_warmup : int, optional
+        The number of initial requests whose hits and misses are not counted.
+        These requests still populate the cache
+    sampling_rate : float, optional
+        If specified, the MRC is approximated using SHARDS with this sampling
+        rate, e.g. 0.01 for traces of around 10^8 requests. Stack distances
+        of the sampled requests are scaled by the inverse of the rate
+    seed : int, optional
+        The seed of the SHARDS hash function
+
+    Returns
+    -------
+    cache_sizes : numpy.ndarray
+        The cache sizes
+    miss_ratios : numpy.ndarray
+        The miss ratio at each cache size
+    """
+    workload = np.asarray(workload)
+    n = len(workload)
+    if n_warmup < 0 or n_warmup >= n:
+        raise ValueError('n_warmup must be comprised between 0 and the '
+                         'number of requests')
+    if sampling_rate is None:
+        distances = stack_distances(workload)[n_warmup:]
+        return _distances_to_mrc(distances, n - n_warmup, 1.0, cache_sizes)
+    indices = shards_sample(workload, sampling_rate, seed)
+    distances = stack_distances(workload[indices])[indices >= n_warmup]
+    return _distances_to_mrc(distances, n - n_warmup, sampling_rate,
+                             cache_sizes)
+
+
+def trace_miss_ratio_curve(reqs_file, cache_sizes=None, n_warmup=0,
+                           n_requests=None, sampling_rate=None, seed=0,
+                           binary_trace=True, chunk_size=2**22):
+    """Compute the miss ratio curve of an LRU cache under a (time, receiver,
+    content) request trace, as read by the deterministic trace-driven
+    workload.
+
+    By default, the trace is read from its memory-mapped binary version, which
+    is created if needed. With sampling, the trace is then filtered one chunk
+    at a time, so that only the sampled requests are held in memory.
+
+    Parameters
+    ----------
+    reqs_file : str
+        The path to the CSV requests file
+    cache_sizes : array-like, optional
+        The cache sizes at which the miss ratio is evaluated
+    n_warmup : int, optional
+        The number of initial requests whose hits and misses are not counted
+    n_requests : int, optional
+        The number of requests of the trace to consider. All requests by
+        default
+    sampling_rate : float, optional
+        If specified, the MRC is approximated using SHARDS with this sampling
+        rate
+    seed : int, optional
+        The seed of the SHARDS hash function
+    binary_trace : bool, optional
+        If *True*, read the trace from its memory-mapped binary version,
+        otherwise parse the whole CSV trace
+    chunk_size : int, optional
+        The number of requests filtered at a time when sampling
+
+    Returns
+    -------
+    cache_sizes : numpy.ndarray
+        The cache sizes
+    miss_ratios : numpy.ndarray
+        The miss ratio at each cache size
+    """
+    if not binary_trace:
+        contents = trace_contents(reqs_file, binary_trace=False)[:n_requests]
+        return miss_ratio_curve(contents, cache_sizes, n_warmup,
+                                sampling_rate, seed)
+    trace = open_binary_trace(reqs_file, create=True)
+    n = len(trace) if n_requests is None else min(n_requests, len(trace))
+    if sampling_rate is None:
+        return miss_ratio_curve(trace['content'][:n], cache_sizes, n_warmup)
+    if n_warmup < 0 or n_warmup >= n:
+        raise ValueError('n_warmup must be comprised between 0 and the '
+                         'number of requests')
+    contents = []
+    measured = []
+    for start in range(0, n, chunk_size):
+        chunk = np.asarray(trace['content'][start:min(start + chunk_size, n)])
+        indices = shards_sample(chunk, sampling_rate, seed)
+        contents.append(chunk[indices])
+        measured.append(indices + start >= n_warmup)
+    distances = stack_distances(np.concatenate(contents))
+    distances = distances[np.concatenate(measured)]
+    return _distances_to_mrc(distances, n - n_warmup, sampling_rate,
+                             cache_sizes)
+
+
+def _distances_to_mrc(distances, n_measured, sampling_rate, cache_sizes):
+    """Return the miss ratio curve given the stack distances of the measured
+    requests sampled at a given rate out of *n_measured* requests"""
+    finite = distances[distances > 0] / sampling_rate
+    if cache_sizes is None:
+        max_size = int(np.ceil(finite.max())) if len(finite) > 0 else 1
+        cache_sizes = np.arange(1, max_size + 1)
+    cache_sizes = np.asarray(cache_sizes)
+    expected = n_measured * sampling_rate
+    # The difference between the expected and the actual number of sampled
+    # requests is accounted as hits at the smallest distance (SHARDS_adj)
+    hits = np.searchsorted(np.sort(finite), cache_sizes, side='right') \
+        + (expected - len(distances))
+    return cache_sizes, np.clip(1.0 - hits / expected, 0.0, 1.0)
@@ -0,0 +1,209 @@
+"""Functions for replaying a request trace through a single cache in parallel,
+by splitting it into shards.
+
+The measured requests of the trace are split into contiguous shards, each of
+them replayed by a different process through its own cache. Since each cache
+starts empty, each shard is preceded by a number of overlap requests which
+are replayed to warm up the cache but not measured. The first shard is
+preceded by all the warmup requests of the trace, hence its results are
+exact.
+
+The cache state at the start of a shard only approximates the state of a
+cache having served all previous requests, so the resulting hit ratio is
+slightly biased, the more so the shorter the overlap with respect to the
+time the cache takes to converge. This bias can be measured by replaying the
+trace once more without sharding, in parallel with the shards.
+"""
+import time
+import multiprocessing as mp
+
+import numpy as np
+
+from icarus.registry import CACHE_POLICY
+from icarus.util import Tree
+
+
+__all__ = [
+       'shard_bounds',
+       'sharded_cache_hit_ratio'
+          ]
+
+
+# Contents and weights of the requests of the trace being replayed, set
+# before creating the pool so that worker processes inherit them when they
+# are forked
+_shard_trace = (None, None)
+
+
+def shard_bounds(n_warmup, n_measured, n_shards, overlap):
+    """Return the requests replayed and measured by each shard.
+
+    Parameters
+    ----------
+    n_warmup : int
+        The number of warmup requests of the trace
+    n_measured : int
+        The number of measured requests of the trace, following the warmup
+        requests
+    n_shards : int
+        The number of shards
+    overlap : int
+        The number of requests replayed before the measured requests of each
+        shard other than the first one
+
+    Returns
+    -------
+    bounds : list of tuples
+        For each shard, a (replay_start, start, stop) tuple: requests from
+        *replay_start* to *stop* excluded are replayed and requests from
+        *start* to *stop* excluded are measured
+    """
+    if n_shards <= 0:
+        raise ValueError('n_shards must be positive')
+    if overlap < 0:
+        raise ValueError('overlap must not be negative')
+    if n_measured < n_shards:
+        raise ValueError('There must be at least one measured request per shard')
+    edges = n_warmup + np.linspace(0, n_measured, n_shards + 1).astype(int)
+    bounds = []
+    for i in range(n_shards):
+        start, stop = int(edges[i]), int(edges[i + 1])
+        replay_start = 0 if i == 0 else max(0, start - overlap)
+        bounds.append((replay_start, start, stop))
+    return bounds
+
+
+def _replay(cache_policy, cache_size, replay_start, start, stop):
+    """Replay requests of the shared trace through a new cache.
+
+    Returns
+    -------
+    counts : tuple
+        A (hits, requests, weighted hits, weighted requests, duration) tuple
+        of the measured requests
+    """
+    start_time = time.time()
+    contents, weights = _shard_trace
+    policy_args = {k: v for k, v in cache_policy.items() if k != 'name'}
+    cache = CACHE_POLICY[cache_policy['name']](cache_size, **policy_args)
+    get, put = cache.get, cache.put
+    contents = contents[replay_start:stop].tolist()
+    weights = [1] * len(contents) if weights is None \
+              else weights[replay_start:stop].tolist()
+    n_unmeasured = start - replay_start
+    hits = weighted_hits = 0
+    for i, (content, weight) in enumerate(zip(contents, weights)):
+        if get(content, weight):
+            if i >= n_unmeasured:
+                hits += 1
+                weighted_hits += weight
+        else:
+            put(content, weight)
+    weighted_requests = sum(weights[n_unmeasured:])
+    return hits, stop - start, weighted_hits, weighted_requests, \
+           time.time() - start_time
+
+
+def _replay_args(args):
+    """Unpack the arguments of a replay run by a pool"""
+    return _replay(*args)
+
+
+def sharded_cache_hit_ratio(contents, cache_policy, cache_size, n_shards,
+                            overlap, n_warmup=0, n_measured=None, weights=None,
+                            exact=False, n_processes=None):
+    """Compute the cache hit ratio of a single cache under a trace-driven
+    workload by replaying shards of the trace in parallel.
+
+    This is equivalent, up to the bias due to sharding, to a deterministic
+    trace-driven experiment on a topology where all requests are served by a
+    single cache, e.g. a PATH topology with 3 nodes and the LCE strategy.
+
+    Parameters
+    ----------
+    contents : array-like
+        Sequence of content identifiers, e.g. as returned by
+        *trace_contents*
+    cache_policy : dict
+        The cache policy, with its name under the *name* key and its other
+        parameters under the other keys
+    cache_size : int
+        The size of the cache
+    n_shards : int
+        The number of shards
+    overlap : int
+        The number of requests replayed before the measured requests of each
+        shard, to warm up its cache
+    n_warmup : int, optional
+        The number of warmup requests of the trace
+    n_measured : int, optional
+        The number of measured requests of the trace. All requests following
+        the warmup ones by default
+    weights : dict, optional
+        Dictionary mapping each content to its weight. All weights are 1 by
+        default
+    exact : bool, optional
+        If *True*, the trace is also replayed without sharding to measure the
+        error of the sharded hit ratio
+    n_processes : int, optional
+        The number of worker processes. One per shard by default. Shards are
+        replayed sequentially in this process if 1
+
+    Returns
+    -------
+    results : Tree
+        The hit ratio under *MEAN*, the weighted hit ratio under
+        *WEIGHTED_CACHE_HIT_RATIO* and the hit ratio of each shard under
+        *SHARDS*. If *exact* is *True*, the exact hit ratios are under
+        *EXACT*, the errors of the sharded ones under *ERROR* and the ratio
+        between the duration of the exact replay and the duration of the
+        longest shard under *SPEEDUP*
+    """
+    global _shard_trace
+    if cache_policy['name'] == 'OPT':
+        raise ValueError('OPT cannot replay a shard of the trace')
+    contents = np.asarray(contents)
+    if n_measured is None:
+        n_measured = len(contents) - n_warmup
+    if n_warmup < 0 or n_warmup + n_measured > len(contents):
+        raise ValueError('The trace does not contain enough requests')
+    contents = contents[:n_warmup + n_measured]
+    if weights is not None:
+        weights = np.array([weights[c] for c in contents.tolist()])
+    tasks = [(cache_policy, cache_size) + bounds
+             for bounds in shard_bounds(n_warmup, n_measured, n_shards, overlap)]
+    if exact:
+        # Replayed first as it is the longest task
+        tasks.insert(0, (cache_policy, cache_size, 0, n_warmup,
+                         n_warmup + n_measured))
+    if n_processes is None:
+        n_processes = len(tasks)
+    _shard_trace = (contents, weights)
+    try:
+        if n_processes == 1:
+            counts = [_replay(*task) for task in tasks]
+        else:
+            pool = mp.Pool(min(n_processes, len(tasks)))
+            try:
+                counts = pool.map(_replay_args, tasks, chunksize=1)
+            finally:
+                pool.terminate()
+                pool.join()
+    finally:
+        _shard_trace = (None, None)
+
+    def hit_ratios(counts):
+        hits, requests, weighted_hits, weighted_requests = \
+            np.sum([c[:4] for c in counts], axis=0)
+        return Tree(MEAN=hits / float(requests),
+                    WEIGHTED_CACHE_HIT_RATIO=weighted_hits / float(weighted_requests))
+
+    exact_counts = counts.pop(0) if exact else None
+    results = hit_ratios(counts)
+    results['SHARDS'] = [c[0] / float(c[1]) for c in counts]
+    if exact:
+        results['EXACT'] = hit_ratios([exact_counts])
+        for metric in ('MEAN', 'WEIGHTED_CACHE_HIT_RATIO'):
+            results['ERROR'][metric] = results[metric] - results['EXACT'][metric]
+        results['SPEEDUP'] = exact_counts[4] / max(c[4] for c in counts)
+    return results
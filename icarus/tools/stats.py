@@ -89,6 +89,27 @@ class DiscreteDist(object):
         # random value. Worst case time complexity is O(log2(n))
         return int(np.searchsorted(self._cdf, rv) + 1)
 
+    def rvs(self, size, rng):
+        """Get a block of random values from the distribution
+
+        This is considerably faster than repeated calls to *rv* as the
+        random numbers are drawn and looked up in the CDF in a single
+        vectorised operation.
+
+        Parameters
+        ----------
+        size : int
+            The number of random values
+        rng : numpy.random.Generator
+            The random number generator
+
+        Returns
+        -------
+        rvs : numpy.ndarray
+            Array of random values
+        """
+        return np.searchsorted(self._cdf, rng.random(size)) + 1
+
 
 class TruncatedMandelbrotZipfDist(DiscreteDist):
     """Implements a truncated Mandelbrot-Zipf distribution, i.e. a Mandelbrot-Zipf distribution with
@@ -122,4 +122,27 @@ class TestOptimalCacheHitRatio(unittest.TestCase):
     
     def test_unsorted_pdf(self):
         h = cacheperf.optimal_cache_hit_ratio([0.1, 0.5, 0.4], 2)
-        self.assertAlmostEqual(0.9, h)
\ No newline at end of file
+        self.assertAlmostEqual(0.9, h)
+
+class TestBeladyCacheHitRatio(unittest.TestCase):
+
+    def test_next_occurrences(self):
+        nxt = cacheperf.next_occurrences([3, 1, 3, 2, 1, 3])
+        self.assertEqual([2, 4, 5, 6, 6, 6], nxt.tolist())
+        self.assertEqual([], cacheperf.next_occurrences([]).tolist())
+
+    def test_belady(self):
+        # 3 and 4 are never inserted, as they are requested further in the
+        # future than both 1 and 2
+        workload = [1, 2, 3, 1, 2, 4, 1, 2, 3, 4]
+        h = cacheperf.belady_cache_hit_ratio(workload, 2)
+        self.assertAlmostEqual(0.4, h)
+        self.assertAlmostEqual(0.5, cacheperf.belady_cache_hit_ratio(workload, 2, n_warmup=2))
+
+    def test_multiple_cache_sizes(self):
+        workload = np.random.RandomState(0).zipf(1.2, 5000) % 200
+        sizes = [1, 10, 50]
+        h = cacheperf.belady_cache_hit_ratio(workload, sizes, n_warmup=[10, 100, 500])
+        for size, warmup, ratio in zip(sizes, [10, 100, 500], h):
+            self.assertEqual(ratio, cacheperf.belady_cache_hit_ratio(workload, size, warmup))
+        self.assertEqual(sorted(h), h)
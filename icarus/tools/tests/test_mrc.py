@@ -0,0 +1,93 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import icarus.tools.mrc as mrc
+import icarus.models as cache
+
+
+class TestMissRatioCurve(unittest.TestCase):
+
+    def lru_miss_ratio(self, workload, cache_size, n_warmup=0):
+        c = cache.LruCache(cache_size)
+        misses = 0
+        for i, content in enumerate(workload):
+            if not c.get(content, 1):
+                c.put(content, 1)
+                if i >= n_warmup:
+                    misses += 1
+        return misses / float(len(workload) - n_warmup)
+
+    def test_stack_distances(self):
+        d = mrc.stack_distances([1, 2, 1, 3, 3, 2, 1])
+        self.assertEqual([0, 0, 2, 0, 1, 3, 3], d.tolist())
+
+    def test_lru(self):
+        workload = (np.random.RandomState(0).zipf(1.2, 5000) % 300).tolist()
+        sizes, miss_ratios = mrc.miss_ratio_curve(workload, n_warmup=500)
+        self.assertEqual(1, sizes[0])
+        self.assertEqual(sorted(miss_ratios, reverse=True), miss_ratios.tolist())
+        for size in [1, 5, 20, 100]:
+            self.assertAlmostEqual(self.lru_miss_ratio(workload, size, 500),
+                                   miss_ratios[size - 1])
+
+    def test_cache_sizes(self):
+        workload = [1, 2, 3, 1, 2, 3]
+        sizes, miss_ratios = mrc.miss_ratio_curve(workload, [1, 2, 3, 10])
+        self.assertEqual([1, 2, 3, 10], sizes.tolist())
+        self.assertEqual([1, 1, 0.5, 0.5], miss_ratios.tolist())
+
+    def test_sampled(self):
+        rand = np.random.RandomState(0)
+        workload = rand.permutation(20000)[rand.zipf(1.1, 100000) % 20000]
+        sizes = [500, 2000, 5000]
+        _, exact = mrc.miss_ratio_curve(workload, sizes)
+        _, sampled = mrc.miss_ratio_curve(workload, sizes, sampling_rate=0.1)
+        for e, s in zip(exact, sampled):
+            self.assertLess(abs(e - s), 0.05)
+        _, full = mrc.miss_ratio_curve(workload, sizes, sampling_rate=1)
+        self.assertEqual(exact.tolist(), full.tolist())
+
+    def test_shards_sample(self):
+        workload = np.arange(10000).repeat(2)
+        indices = mrc.shards_sample(workload, 0.2)
+        self.assertLess(abs(len(indices) / float(len(workload)) - 0.2), 0.02)
+        # All requests of a selected content are selected
+        self.assertEqual(0, len(indices) % 2)
+        self.assertTrue(np.all(workload[indices[::2]] == workload[indices[1::2]]))
+        self.assertRaises(ValueError, mrc.shards_sample, workload, 0)
+
+    def test_trace(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            reqs_file = os.path.join(tmpdir, 'trace.csv')
+            workload = (np.random.RandomState(1).zipf(1.2, 3000) % 100).tolist()
+            with open(reqs_file, 'w') as f:
+                for i, content in enumerate(workload):
+                    f.write('%d,0,%d\n' % (i, content))
+            expected = mrc.miss_ratio_curve(workload, [1, 10, 50], 100)[1]
+            actual = mrc.trace_miss_ratio_curve(reqs_file, [1, 10, 50], 100)[1]
+            self.assertEqual(expected.tolist(), actual.tolist())
+            expected = mrc.miss_ratio_curve(workload, [10, 50], 100,
+                                            sampling_rate=0.5)[1]
+            actual = mrc.trace_miss_ratio_curve(reqs_file, [10, 50], 100,
+                                                sampling_rate=0.5,
+                                                chunk_size=128)[1]
+            self.assertEqual(expected.tolist(), actual.tolist())
+            actual = mrc.trace_miss_ratio_curve(reqs_file, [10, 50], 100,
+                                                sampling_rate=0.5,
+                                                binary_trace=False)[1]
+            self.assertEqual(expected.tolist(), actual.tolist())
+        finally:
+            shutil.rmtree(tmpdir)
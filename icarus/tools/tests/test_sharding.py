@@ -0,0 +1,56 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+
+import numpy as np
+
+import icarus
+from icarus.tools import shard_bounds, sharded_cache_hit_ratio
+
+
+class TestShardedCacheHitRatio(unittest.TestCase):
+
+    def setUp(self):
+        rand = np.random.RandomState(0)
+        self.contents = rand.permutation(2000)[rand.zipf(1.1, 20000) % 2000]
+        self.weights = {c: 1 + c % 3 for c in self.contents.tolist()}
+
+    def test_shard_bounds(self):
+        self.assertEqual([(0, 10, 40), (30, 40, 70), (60, 70, 100)],
+                         shard_bounds(10, 90, 3, 10))
+        self.assertEqual([(0, 0, 5), (0, 5, 10)], shard_bounds(0, 10, 2, 100))
+        self.assertRaises(ValueError, shard_bounds, 0, 2, 3, 0)
+
+    def test_single_shard(self):
+        results = sharded_cache_hit_ratio(self.contents, {'name': 'LRU'}, 100, 1,
+                                          0, n_warmup=1000, weights=self.weights,
+                                          exact=True, n_processes=1)
+        self.assertEqual(results['EXACT']['MEAN'], results['MEAN'])
+        self.assertEqual(0, results['ERROR']['MEAN'])
+        self.assertEqual(0, results['ERROR']['WEIGHTED_CACHE_HIT_RATIO'])
+
+    def test_overlap(self):
+        # With an overlap covering the whole trace, shards are exact
+        for policy in [{'name': 'LRU'}, {'name': 'SS'}]:
+            results = sharded_cache_hit_ratio(self.contents, policy, 100, 4,
+                                              20000, n_warmup=1000, exact=True,
+                                              n_processes=1)
+            self.assertEqual(0, results['ERROR']['MEAN'])
+            self.assertEqual(4, len(results['SHARDS']))
+
+    def test_error(self):
+        results = sharded_cache_hit_ratio(self.contents, {'name': 'LRU'}, 100, 4,
+                                          500, n_warmup=1000, n_measured=16000,
+                                          weights=self.weights, exact=True,
+                                          n_processes=2)
+        self.assertLess(abs(results['ERROR']['MEAN']), 0.005)
+        self.assertAlmostEqual(results['MEAN'], np.mean(results['SHARDS']))
+        self.assertRaises(ValueError, sharded_cache_hit_ratio, self.contents,
+                          {'name': 'OPT'}, 100, 4, 0)
+
@@ -31,7 +31,17 @@ class TestDiscreteDist(unittest.TestCase):
         pdf_1 = np.array([0.4, 0.6])
         pdf_2 = stats.DiscreteDist(pdf_1).pdf
         self.assertTrue(all(pdf_1[i] == pdf_2[i] for i in range(len(pdf_1))))
-        
+
+    def test_rvs(self):
+        dist = stats.DiscreteDist(np.array([0.1, 0.2, 0.7]))
+        rvs = dist.rvs(10000, np.random.default_rng(0))
+        self.assertEqual(10000, len(rvs))
+        self.assertEqual({1, 2, 3}, set(rvs.tolist()))
+        self.assertLess(abs(np.mean(rvs == 3) - 0.7), 0.02)
+        self.assertEqual(rvs.tolist(),
+                         dist.rvs(10000, np.random.default_rng(0)).tolist())
+
+
 class TestTruncatedZipfDist(unittest.TestCase):
 
     def test_pdf_sum(self):
@@ -1,7 +1,10 @@
 """Functions for importing and analyzing traffic traces"""
 
 
+import os
+import csv
 import math
+import hashlib
 import collections
 import time
 import dateutil
@@ -19,10 +22,26 @@ __all__ = [
        'parse_wikibench',
        'parse_squid',
        'parse_youtube_umass',
-       'parse_common_log_format'
+       'parse_common_log_format',
+       'TRACE_DTYPE',
+       'binary_trace_path',
+       'convert_trace_to_binary',
+       'open_binary_trace',
+       'iter_binary_trace',
+       'trace_contents',
+       'trace_index_path',
+       'trace_content_index'
            ]
 
 
+# Record layout of binary request traces. Each request of a (time, receiver,
+# content) CSV trace is stored as a fixed-width little-endian record so that
+# traces can be memory-mapped instead of being parsed line by line
+TRACE_DTYPE = np.dtype([('time', '<f8'),
+                        ('receiver', '<i4'),
+                        ('content', '<i8')])
+
+
 def frequencies(data):
     """Extract frequencies from traces. Returns array of sorted frequencies
     
@@ -113,7 +132,6 @@ def parse_url_list(path):
     with open(path) as f:
         for line in f:
             yield line
-    raise StopIteration()
 
 
 def parse_wikibench(path):
@@ -138,7 +156,6 @@ def parse_wikibench(path):
                 timestamp=entry[1],
                 url=entry[2]
                       )
-    raise StopIteration()
 
 
 def parse_squid(path):
@@ -193,7 +210,6 @@ def parse_squid(path):
                 hostname=hostname,
                 content_type=content_type
                       )
-    raise StopIteration()
 
 
 def parse_youtube_umass(path):
@@ -247,7 +263,6 @@ def parse_youtube_umass(path):
                 video_id=video_id,
                 content_server_addr=content_server_addr,
                       )
-    raise StopIteration()
       
 
 def parse_common_log_format(path):
@@ -290,4 +305,289 @@ def parse_common_log_format(path):
                 bytes=n_bytes
                         )
             yield t, event
-    raise StopIteration()
\ No newline at end of file
+
+
+def binary_trace_path(reqs_file):
+    """Return the path of the binary version of a CSV request trace
+
+    Parameters
+    ----------
+    reqs_file : str
+        The path to the CSV requests file
+
+    Returns
+    -------
+    path : str
+        The path of the binary trace, stored next to the CSV trace
+    """
+    return reqs_file + '.bin'
+
+
+def convert_trace_to_binary(reqs_file, bin_file=None, chunk_size=2**16):
+    """Convert a CSV request trace with rows (time, receiver, content) into
+    the fixed-width binary format described by *TRACE_DTYPE*.
+
+    The binary trace is first written to a temporary file which is then
+    atomically renamed, so that concurrent readers never see a partially
+    written trace.
+
+    Parameters
+    ----------
+    reqs_file : str
+        The path to the CSV requests file
+    bin_file : str, optional
+        The path of the binary trace to write. If not specified, it is
+        derived from *reqs_file* using *binary_trace_path*
+    chunk_size : int, optional
+        The number of requests converted and written at a time
+
+    Returns
+    -------
+    n_requests : int
+        The number of requests written
+    """
+    if bin_file is None:
+        bin_file = binary_trace_path(reqs_file)
+    tmp_file = '%s.%d.tmp' % (bin_file, os.getpid())
+    n_requests = 0
+    try:
+        with open(reqs_file, 'r') as csv_file, open(tmp_file, 'wb') as out:
+            chunk = []
+            for row in csv.reader(csv_file):
+                chunk.append((float(row[0]), int(row[1]), int(row[2])))
+                if len(chunk) == chunk_size:
+                    out.write(np.array(chunk, dtype=TRACE_DTYPE).tobytes())
+                    n_requests += len(chunk)
+                    chunk = []
+            if chunk:
+                out.write(np.array(chunk, dtype=TRACE_DTYPE).tobytes())
+                n_requests += len(chunk)
+        os.replace(tmp_file, bin_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+    return n_requests
+
+
+def open_binary_trace(reqs_file, create=False):
+    """Memory-map the binary version of a CSV request trace
+
+    A binary trace is considered valid only if it is at least as recent as
+    the CSV trace it was converted from and its size is a multiple of the
+    record size.
+
+    Parameters
+    ----------
+    reqs_file : str
+        The path to the CSV requests file
+    create : bool, optional
+        If *True*, (re)build the binary trace if missing or stale
+
+    Returns
+    -------
+    trace : numpy.ndarray
+        A read-only structured array of dtype *TRACE_DTYPE* or *None* if no
+        valid binary trace is available
+    """
+    bin_file = binary_trace_path(reqs_file)
+    if not _is_valid_binary_trace(bin_file, reqs_file):
+        if not create:
+            return None
+        convert_trace_to_binary(reqs_file, bin_file)
+    if os.path.getsize(bin_file) == 0:
+        # Empty files cannot be memory-mapped
+        return np.empty(0, dtype=TRACE_DTYPE)
+    return np.memmap(bin_file, dtype=TRACE_DTYPE, mode='r')
+
+
+def _is_valid_binary_trace(bin_file, reqs_file):
+    """Return *True* if *bin_file* is an up to date binary version of
+    *reqs_file*"""
+    if not os.path.isfile(bin_file):
+        return False
+    if os.path.getsize(bin_file) % TRACE_DTYPE.itemsize != 0:
+        return False
+    return not os.path.exists(reqs_file) or \
+        os.path.getmtime(bin_file) >= os.path.getmtime(reqs_file)
+
+
+def iter_binary_trace(trace, start=0, stop=None, chunk_size=2**16):
+    """Iterate over the requests of a binary trace
+
+    Records are converted to native Python types one chunk at a time, which
+    is considerably faster than accessing the array element by element.
+
+    Parameters
+    ----------
+    trace : numpy.ndarray
+        A structured array of dtype *TRACE_DTYPE*
+    start : int, optional
+        The index of the first request to return
+    stop : int, optional
+        The index after the last request to return. If not specified, all
+        requests until the end of the trace are returned
+    chunk_size : int, optional
+        The number of requests converted at a time
+
+    Returns
+    -------
+    requests : iterator of tuples
+        Iterator of (time, receiver, content) tuples
+    """
+    stop = len(trace) if stop is None else min(stop, len(trace))
+    for i in range(start, stop, chunk_size):
+        for request in trace[i:min(i + chunk_size, stop)].tolist():
+            yield request
+
+
+def trace_contents(reqs_file, binary_trace=True):
+    """Return the sequence of contents requested by a CSV request trace
+
+    Parameters
+    ----------
+    reqs_file : str
+        The path to the CSV requests file
+    binary_trace : bool, optional
+        If *True*, read contents from the memory-mapped binary version of the
+        trace, creating it if needed. Contents are parsed from the CSV file
+        if the binary trace cannot be created.
+
+    Returns
+    -------
+    contents : numpy.ndarray
+        Array of content identifiers, one per request
+    """
+    if binary_trace:
+        try:
+            trace = open_binary_trace(reqs_file, create=True)
+            return np.array(trace['content'], dtype=np.int64)
+        except (IOError, OSError, ValueError, IndexError):
+            pass
+    with open(reqs_file, 'rb') as f:
+        return np.fromiter((int(line.split(b',')[2]) for line in f),
+                           dtype=np.int64)
+
+
+def trace_index_path(reqs_file):
+    """Return the path of the content index of a CSV request trace
+
+    Parameters
+    ----------
+    reqs_file : str
+        The path to the CSV requests file
+
+    Returns
+    -------
+    path : str
+        The path of the content index, stored next to the CSV trace
+    """
+    return reqs_file + '.idx.npz'
+
+
+def trace_content_index(reqs_file, rebuild=False):
+    """Return the index of the contents requested in a (time, receiver,
+    content) CSV trace.
+
+    The index is built with a single pass over the trace and saved next to
+    it, so that later calls only need to load it. A saved index is used
+    as long as size and modification time of the trace are unchanged. If
+    they changed, the checksum of the trace is compared with the one of the
+    index and the index is rebuilt only if the content of the trace changed.
+
+    Parameters
+    ----------
+    reqs_file : str
+        The path to the CSV requests file
+    rebuild : bool, optional
+        If *True*, rebuild the index even if a valid index exists
+
+    Returns
+    -------
+    index : dict
+        Dictionary with keys:
+         * contents: array of content identifiers, sorted by first request
+         * counts: array of the number of requests of each content
+         * n_contents: the number of distinct contents
+         * n_requests: the number of requests of the trace
+         * checksum: SHA-1 hex digest of the trace
+    """
+    idx_file = trace_index_path(reqs_file)
+    stat = os.stat(reqs_file)
+    if not rebuild and os.path.isfile(idx_file):
+        try:
+            index = _load_trace_index(idx_file)
+        except (IOError, OSError, ValueError, KeyError):
+            index = None
+        if index is not None:
+            if index['size'] == stat.st_size and index['mtime_ns'] == stat.st_mtime_ns:
+                return _public_trace_index(index)
+            if index['size'] == stat.st_size and \
+                    index['checksum'] == _file_checksum(reqs_file):
+                # The trace was touched or copied but is unchanged
+                index['mtime_ns'] = stat.st_mtime_ns
+                _save_trace_index(idx_file, index)
+                return _public_trace_index(index)
+    index = _build_trace_index(reqs_file)
+    index['size'] = stat.st_size
+    index['mtime_ns'] = stat.st_mtime_ns
+    try:
+        _save_trace_index(idx_file, index)
+    except (IOError, OSError):
+        # A read-only trace directory only prevents caching the index
+        pass
+    return _public_trace_index(index)
+
+
+def _build_trace_index(reqs_file):
+    """Build the content index of a trace with a single pass"""
+    checksum = hashlib.sha1()
+    counts = {}
+    n_requests = 0
+    with open(reqs_file, 'rb') as f:
+        for line in f:
+            checksum.update(line)
+            content = int(line.split(b',')[2])
+            counts[content] = counts.get(content, 0) + 1
+            n_requests += 1
+    return {'contents': np.fromiter(counts.keys(), dtype=np.int64, count=len(counts)),
+            'counts': np.fromiter(counts.values(), dtype=np.int64, count=len(counts)),
+            'n_requests': n_requests,
+            'checksum': checksum.hexdigest()}
+
+
+def _file_checksum(path, block_size=2**20):
+    """Return the SHA-1 hex digest of a file"""
+    checksum = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+
+def _save_trace_index(idx_file, index):
+    tmp_file = '%s.%d.tmp' % (idx_file, os.getpid())
+    try:
+        with open(tmp_file, 'wb') as f:
+            np.savez(f, **index)
+        os.replace(tmp_file, idx_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def _load_trace_index(idx_file):
+    with np.load(idx_file, allow_pickle=False) as data:
+        return {'contents': data['contents'],
+                'counts': data['counts'],
+                'n_requests': int(data['n_requests']),
+                'checksum': str(data['checksum']),
+                'size': int(data['size']),
+                'mtime_ns': int(data['mtime_ns'])}
+
+
+def _public_trace_index(index):
+    return {'contents': index['contents'],
+            'counts': index['counts'],
+            'n_contents': len(index['contents']),
+            'n_requests': index['n_requests'],
+            'checksum': index['checksum']}
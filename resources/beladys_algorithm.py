@@ -1,94 +1,74 @@
-import csv
-import heapq
-from copy import deepcopy
+"""Compute the cache hit ratio of Belady's optimal offline replacement policy
+(OPT) on the traces listed in trace_overview.csv.
 
-def beladys_algorithm(max_cache_sizes, traces):
-    results = {}
-    for s in max_cache_sizes:
-        results[s] = []
-    warmups = [4*x for x in max_cache_sizes]
+Usage, from the root of the repository:
+    PYTHONPATH=. python resources/beladys_algorithm.py -s 100 1000 -r 2 5
+"""
+import argparse
+import csv
 
-    for trace_path in traces:
-        with open('resources/' + trace_path, 'r') as trace:
-            csv_reader = csv.reader(trace)
+from icarus.tools import trace_contents, belady_cache_hit_ratio
 
-            # pre-processing
-            original_occurrences = {}
-            request_index = 0
-            for line in csv_reader:
-                request_index += 1
-                object = int(line[2])
+__all__ = ['beladys_algorithm']
 
-                if object in original_occurrences:
-                    original_occurrences[object].append(request_index)
-                else:
-                    original_occurrences[object] = [request_index]
 
+def beladys_algorithm(max_cache_sizes, traces, binary_trace=True):
+    """Print the OPT cache hit ratio of each trace and cache size.
 
+    All cache sizes are evaluated in a single pass over each trace. The
+    requests of the first four times the cache size are used to warm up the
+    cache.
 
-        for i, max_cache_size in enumerate(max_cache_sizes):
-            warmup = warmups[i]
-            with open('resources/' + trace_path, 'r') as trace:
-                csv_reader = csv.reader(trace)
-                # actual processing of workload
-                request_index = 0
-                cache_hits = 0
-                cache = {}
-                cache_size = 0
-                occurrences = deepcopy(original_occurrences)
-                # next_occurrence will be underlying data structure of a max heap
-                # heapq library only supports min heaps, so every element will be negated
-                next_occurrence = []
-                for line in csv_reader:
-                    request_index += 1
-                    object = int(line[2])
+    Parameters
+    ----------
+    max_cache_sizes : list of int
+        The cache sizes
+    traces : list of str
+        The paths of the traces, relative to the resources directory
+    binary_trace : bool, optional
+        If *True*, read the traces from their memory-mapped binary version
 
-                    occurrences[object] = occurrences[object][1:]
+    Returns
+    -------
+    results : dict
+        Dictionary keyed by cache size of lists of cache hit ratios, one per
+        trace
+    """
+    results = {}
+    for s in max_cache_sizes:
+        results[s] = []
+    warmups = [4*x for x in max_cache_sizes]
 
-                    if object in cache:
-                        cache_hits += 1
-                        next_occurrence.remove((-request_index, object))
-                        heapq.heapify(next_occurrence)
-                        if occurrences[object] == []:
-                            # no future occurrences - remove element from cache
-                            cache_size -= 1
-                            del cache[object]
-                        else:
-                            heapq.heappush(next_occurrence, (-occurrences[object][0], object))
-                    else:
-                        if cache_size < max_cache_size:
-                            if occurrences[object] == []:
-                                # object won't occur any more
-                                pass
-                            else:
-                                cache[object] = True
-                                cache_size += 1
-                                heapq.heappush(next_occurrence, (-occurrences[object][0], object))
-                        else:
-                            # replacement policy: replace the one which is needed the furthest in the future
-                            # in case the newly observed element is needed the furthest don't cache it
+    for trace_path in traces:
+        contents = trace_contents('resources/' + trace_path, binary_trace)
+        hit_ratios = belady_cache_hit_ratio(contents, max_cache_sizes, warmups)
+        for max_cache_size, hit_ratio in zip(max_cache_sizes, hit_ratios):
+            results[max_cache_size].append(hit_ratio)
+            print('finished', trace_path, max_cache_size, hit_ratio)
 
-                            if occurrences[object] == []:
-                                # newly cached object will not occur in the future, don't change cache
-                                pass
-                            else:
-                                (furthest_occurrence, furthest_needed_object) = heapq.heappop(next_occurrence)
-                                if -furthest_occurrence < occurrences[object][0]:
-                                    # new element will occur further in the future, don't cache it
-                                    heapq.heappush(next_occurrence, (furthest_occurrence, furthest_needed_object))
-                                else:
-                                    del cache[furthest_needed_object]
-                                    cache[object] = True
-                                    heapq.heappush(next_occurrence, (-occurrences[object][0], object))
+    for s in max_cache_sizes:
+        print('\t'.join(str(r) for r in results[s]))
+    return results
 
-                    # neglect cache hits from warmup period
-                    if request_index == warmup:
-                        cache_hits = 0
 
-                # ignore requests from warmup period
-                results[max_cache_size].append(str(float(cache_hits) / float(request_index - warmup)))
-                print('finished', trace_path, results[max_cache_size][-1])
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-s", "--sizes", dest="sizes", type=int, nargs='+',
+                        required=True, help='The cache sizes')
+    parser.add_argument("-r", "--rows", dest="rows", type=int, nargs='+',
+                        help='The rows of the trace overview to evaluate, '
+                             'starting from 1. All traces by default')
+    parser.add_argument("-o", "--overview", dest="overview",
+                        default='resources/trace_overview.csv',
+                        help='The trace overview file')
+    args = parser.parse_args()
+    traces = []
+    with open(args.overview, 'r') as trace_file:
+        for i, line in enumerate(csv.reader(trace_file), 1):
+            if (args.rows is None or i in args.rows) and line[0] not in traces:
+                traces.append(line[0])
+    beladys_algorithm(args.sizes, traces)
 
 
-    for s in max_cache_sizes:
-        print('\t'.join(results[s]))
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Compare the Space Saving and the Count-Min Sketch frequency estimators of
+the DSCA family of cache policies.
+
+For each cache policy, the same Zipf-distributed request stream is replayed
+with both frequency estimators and the cache hit ratio, the processing time
+and the peak memory allocated by the cache are printed side by side.
+
+Usage:
+    python benchfrequencyestimators.py [-s CACHE_SIZE] [-n REQUESTS] [-p POLICY ...]
+"""
+import argparse
+import time
+import tracemalloc
+
+from icarus.registry import CACHE_POLICY
+from icarus.tools import TruncatedMandelbrotZipfDist
+
+__all__ = ['benchmark_frequency_estimators']
+
+ESTIMATORS = ['SS', 'CMS']
+
+
+def benchmark_frequency_estimators(policy, cache_size, n_requests, alpha=0.8,
+                                   seed=0, **params):
+    """Replay the same request stream on a cache policy with each frequency
+    estimator.
+
+    Parameters
+    ----------
+    policy : str
+        The name of the cache policy, which must accept a
+        *frequency_estimator* parameter
+    cache_size : int
+        The size of the cache
+    n_requests : int
+        The number of requests
+    alpha : float, optional
+        The Zipf exponent of the content popularity
+    seed : int, optional
+        The seed of the request stream
+    params : keyworded parameters
+        Other parameters of the cache policy
+
+    Returns
+    -------
+    results : dict
+        Dictionary keyed by estimator of (cache hit ratio, time, peak memory)
+        tuples, with time in seconds and peak memory in bytes
+    """
+    zipf = TruncatedMandelbrotZipfDist(alpha=alpha, n=100 * cache_size, seed=seed)
+    requests = [zipf.rv() for _ in range(n_requests)]
+    results = {}
+    for estimator in ESTIMATORS:
+        tracemalloc.start()
+        cache = CACHE_POLICY[policy](cache_size, frequency_estimator=estimator,
+                                     **params)
+        hits = 0
+        start = time.time()
+        for content in requests:
+            if cache.get(content, 1):
+                hits += 1
+            else:
+                cache.put(content, 1)
+        duration = time.time() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[estimator] = (hits / float(n_requests), duration, peak)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-s", "--size", dest="size", type=int, default=1000,
+                        help='The cache size')
+    parser.add_argument("-n", "--requests", dest="requests", type=int,
+                        default=1000000, help='The number of requests')
+    parser.add_argument("-p", "--policy", dest="policies", nargs='+',
+                        default=['DSCA', '2DSCA', 'DSCAFS', 'ADSCASTK'],
+                        help='The cache policies to benchmark')
+    args = parser.parse_args()
+    for policy in args.policies:
+        results = benchmark_frequency_estimators(policy, args.size, args.requests)
+        for estimator in ESTIMATORS:
+            hit_ratio, duration, peak = results[estimator]
+            print("%-10s %-4s hit ratio: %.4f  time: %8.2f s  peak memory: %8.1f MB"
+                  % (policy, estimator, hit_ratio, duration, peak / 2.0 ** 20))
+
+
+if __name__ == "__main__":
+    main()
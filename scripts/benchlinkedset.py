@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""Compare the node-based and the array-backed linked set implementations.
+
+For each cache policy built on linked sets, the same Zipf-distributed request
+stream is replayed with both implementations and the processing time and the
+peak memory allocated by the cache are printed.
+
+Usage:
+    python benchlinkedset.py [-s CACHE_SIZE] [-n REQUESTS] [-p POLICY ...]
+"""
+import argparse
+import time
+import tracemalloc
+
+from icarus.registry import CACHE_POLICY
+from icarus.tools import TruncatedMandelbrotZipfDist
+
+__all__ = ['benchmark_linked_sets']
+
+IMPLEMENTATIONS = ['LINKED', 'ARRAY']
+
+
+def benchmark_linked_sets(policy, cache_size, n_requests, alpha=0.8, seed=0):
+    """Replay the same request stream on a cache policy with each linked set
+    implementation.
+
+    Parameters
+    ----------
+    policy : str
+        The name of the cache policy, which must accept a *linked_set*
+        parameter
+    cache_size : int
+        The size of the cache
+    n_requests : int
+        The number of requests
+    alpha : float, optional
+        The Zipf exponent of the content popularity
+    seed : int, optional
+        The seed of the request stream
+
+    Returns
+    -------
+    results : dict
+        Dictionary keyed by implementation of (time, peak memory) tuples, with
+        time in seconds and peak memory in bytes
+    """
+    zipf = TruncatedMandelbrotZipfDist(alpha=alpha, n=10 * cache_size, seed=seed)
+    requests = [zipf.rv() for _ in range(n_requests)]
+    results = {}
+    for impl in IMPLEMENTATIONS:
+        tracemalloc.start()
+        cache = CACHE_POLICY[policy](cache_size, linked_set=impl)
+        start = time.time()
+        for content in requests:
+            if not cache.get(content, 1):
+                cache.put(content, 1)
+        duration = time.time() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[impl] = (duration, peak)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-s", "--size", dest="size", type=int, default=100000,
+                        help='The cache size')
+    parser.add_argument("-n", "--requests", dest="requests", type=int,
+                        default=1000000, help='The number of requests')
+    parser.add_argument("-p", "--policy", dest="policies", nargs='+',
+                        default=['LRU', 'SLRU', 'ARC', 'ADSCASTK'],
+                        help='The cache policies to benchmark')
+    args = parser.parse_args()
+    for policy in args.policies:
+        results = benchmark_linked_sets(policy, args.size, args.requests)
+        for impl in IMPLEMENTATIONS:
+            duration, peak = results[impl]
+            print("%-10s %-7s time: %8.2f s  peak memory: %8.1f MB"
+                  % (policy, impl, duration, peak / 2.0 ** 20))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""This script converts a results file from a format to another, e.g. from
+SPICKLE to RECORDS. Results are converted one at a time if the input is
+read lazily and the output format can be appended to, so that large files
+are never loaded in memory at once.
+"""
+import argparse
+from icarus.io import ResultSet
+from icarus.registry import RESULTS_READER, RESULTS_WRITER, RESULTS_APPENDER
+
+__all__ = ['convert_results']
+
+
+def convert_results(input, input_format, output, output_format):
+    """Convert a results file to another format.
+    
+    If output file exists, it is overwritten.
+    
+    Parameters
+    ----------
+    input : str
+        File name of the input results
+    input_format : str
+        Format of the input results, e.g. SPICKLE
+    output : str
+        File name of the output results
+    output_format : str
+        Format of the output results, e.g. RECORDS
+    """
+    results = RESULTS_READER[input_format](input)
+    if output_format not in RESULTS_APPENDER and not isinstance(results, ResultSet):
+        # Other formats are written from a whole result set
+        resultset = ResultSet()
+        for result in results:
+            resultset.add(*result)
+        results = resultset
+    RESULTS_WRITER[output_format](results, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-f", "--input-format", dest="input_format",
+                        default='SPICKLE', help='The input results format')
+    parser.add_argument("-t", "--output-format", dest="output_format",
+                        default='RECORDS', help='The output results format')
+    parser.add_argument("input", help="The input results file")
+    parser.add_argument("output", help="The output results file")
+    args = parser.parse_args()
+    convert_results(args.input, args.input_format, args.output,
+                    args.output_format)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""This script computes the cache hit ratio of a single cache under a
+(time, receiver, content) request trace by replaying shards of the trace in
+parallel, one per process, and optionally measures the error due to sharding
+against an exact replay.
+
+Example, from the root of the repository:
+    PYTHONPATH=. python scripts/shardedreplay.py -p DSCA -a window_size=1000 \\
+        -s 100 1000 -k 8 -o 100000 -w 10000 --exact trace.csv
+"""
+import argparse
+
+import icarus
+from icarus.tools import trace_contents, sharded_cache_hit_ratio
+from icarus.scenarios.workload import assign_weights
+
+__all__ = ['sharded_replay']
+
+
+def sharded_replay(reqs_file, cache_policy, cache_sizes, n_shards, overlap,
+                   n_warmup=0, n_measured=None, weights=None, exact=False,
+                   n_processes=None):
+    """Print the sharded cache hit ratio of a trace for each cache size.
+
+    Parameters
+    ----------
+    reqs_file : str
+        The path to the CSV requests file
+    cache_policy : dict
+        The cache policy name and parameters
+    cache_sizes : list of int
+        The cache sizes
+    n_shards : int
+        The number of shards
+    overlap : int
+        The number of requests replayed before each shard to warm it up
+    n_warmup : int, optional
+        The number of warmup requests of the trace
+    n_measured : int, optional
+        The number of measured requests of the trace
+    weights : str, optional
+        The path to the weights file. All weights are 1 by default
+    exact : bool, optional
+        If *True*, also replay the trace without sharding to measure the error
+    n_processes : int, optional
+        The number of worker processes
+
+    Returns
+    -------
+    results : dict
+        Dictionary keyed by cache size of the results of
+        *sharded_cache_hit_ratio*
+    """
+    contents = trace_contents(reqs_file)
+    weights = None if weights is None else assign_weights(weights, reqs_file)[1]
+    results = {}
+    for cache_size in cache_sizes:
+        res = sharded_cache_hit_ratio(contents, cache_policy, cache_size,
+                                      n_shards, overlap, n_warmup, n_measured,
+                                      weights, exact, n_processes)
+        results[cache_size] = res
+        line = '%s\t%d\t%f\t%f' % (cache_policy['name'], cache_size,
+                                   res['MEAN'], res['WEIGHTED_CACHE_HIT_RATIO'])
+        if exact:
+            line += '\terror: %+e\tspeedup: %.2f' % (res['ERROR']['MEAN'],
+                                                     res['SPEEDUP'])
+        print(line)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-p", "--policy", dest="policy", required=True,
+                        help='The cache policy')
+    parser.add_argument("-a", "--policy-arg", dest="policy_args", action="append",
+                        help='key=value parameter of the cache policy')
+    parser.add_argument("-s", "--sizes", dest="sizes", type=int, nargs='+',
+                        required=True, help='The cache sizes')
+    parser.add_argument("-k", "--shards", dest="shards", type=int, required=True,
+                        help='The number of shards')
+    parser.add_argument("-o", "--overlap", dest="overlap", type=int, required=True,
+                        help='The number of warmup requests of each shard')
+    parser.add_argument("-w", "--warmup", dest="warmup", type=int, default=0,
+                        help='The number of warmup requests of the trace')
+    parser.add_argument("-n", "--measured", dest="measured", type=int,
+                        help='The number of measured requests of the trace')
+    parser.add_argument("--weights", dest="weights",
+                        help='The weights file of the trace')
+    parser.add_argument("-j", "--processes", dest="processes", type=int,
+                        help='The number of processes')
+    parser.add_argument("--exact", dest="exact", action="store_true",
+                        help='measure the error against an exact replay')
+    parser.add_argument("trace", help="The CSV requests file")
+    args = parser.parse_args()
+    cache_policy = {'name': args.policy}
+    for arg in (args.policy_args or []):
+        k, v = arg.split('=')
+        try:
+            v = eval(v)
+        except NameError:
+            pass
+        cache_policy[k] = v
+    sharded_replay(args.trace, cache_policy, args.sizes, args.shards,
+                   args.overlap, args.warmup, args.measured, args.weights,
+                   args.exact, args.processes)
+
+
+if __name__ == "__main__":
+    main()